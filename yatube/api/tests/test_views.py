@@ -0,0 +1,139 @@
+import json
+from http import HTTPStatus
+
+from django.core.cache import cache
+from django.test import TestCase
+from django.urls import reverse
+
+from posts.models import Group, Post, User
+from posts.tests.utils import QueryBudgetMixin
+
+PAGE_SIZE = 10
+
+
+class FeedApiTest(QueryBudgetMixin, TestCase):
+    """JSON-ленты: курсор, набор полей и условный GET."""
+
+    FEED_QUERIES = 1
+    OBJECT_FEED_QUERIES = 3
+
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        POSTS = 13
+        cls.user = User.objects.create_user(username='HasNoName')
+        cls.group = Group.objects.create(
+            title='Тест Группа',
+            slug='test-slug',
+            description='тест описание группы'
+        )
+        Post.objects.bulk_create(
+            Post(
+                text=f'Тестовый текст {i}',
+                author=cls.user,
+                group=cls.group if i % 2 else None,
+            )
+            for i in range(POSTS)
+        )
+        cls.posts = list(Post.objects.order_by('-pub_date', '-id'))
+
+    def setUp(self):
+        cache.clear()
+
+    def get_json(self, url, **params):
+        response = self.client.get(url, params)
+        content = b''.join(response.streaming_content)
+        return response, json.loads(content)
+
+    def test_cursor_pages(self):
+        """Лента листается по ссылке next и обратно по previous."""
+
+        url = reverse('api:posts')
+        _, first = self.get_json(url)
+        self.assertEqual(
+            [row['id'] for row in first['results']],
+            [post.pk for post in self.posts[:PAGE_SIZE]])
+        self.assertIsNone(first['previous'])
+
+        _, second = self.get_json(first['next'])
+        self.assertEqual(
+            [row['id'] for row in second['results']],
+            [post.pk for post in self.posts[PAGE_SIZE:]])
+        self.assertIsNone(second['next'])
+
+        _, back = self.get_json(second['previous'])
+        self.assertEqual(back['results'], first['results'])
+
+    def test_sparse_fields(self):
+        """?fields= задает поля ответа и столбцы запроса."""
+
+        url = reverse('api:posts')
+        with self.assertMaxQueries(self.FEED_QUERIES) as context:
+            _, data = self.get_json(url, fields='text')
+        self.assertEqual(data['results'][0], {'text': self.posts[0].text})
+        sql = context.captured_queries[0]['sql']
+        self.assertNotIn('auth_user', sql)
+        self.assertNotIn('"posts_post"."group_id"', sql)
+
+        _, data = self.get_json(url, fields='author,group', limit=2)
+        self.assertEqual(data['results'], [
+            {
+                'author': self.user.username,
+                'group': post.group and post.group.slug,
+            }
+            for post in self.posts[:2]
+        ])
+
+    def test_bad_parameters(self):
+        """Неизвестное поле и неверный limit дают 400."""
+
+        url = reverse('api:posts')
+        for params in ({'fields': 'password'}, {'limit': 1000}):
+            with self.subTest(params=params):
+                response = self.client.get(url, params)
+                self.assertEqual(
+                    response.status_code, HTTPStatus.BAD_REQUEST)
+
+    def test_object_feeds(self):
+        """Ленты группы и автора; неизвестный объект дает JSON 404."""
+
+        url_results = {
+            reverse('api:group_posts', args=[self.group.slug]):
+            [post.pk for post in self.posts if post.group_id][:PAGE_SIZE],
+            reverse('api:profile_posts', args=[self.user.username]):
+            [post.pk for post in self.posts][:PAGE_SIZE],
+        }
+        for url, expected in url_results.items():
+            with self.subTest(url=url):
+                with self.assertMaxQueries(self.OBJECT_FEED_QUERIES):
+                    _, data = self.get_json(url, fields='id')
+                self.assertEqual(
+                    [row['id'] for row in data['results']], expected)
+
+        for url in (reverse('api:group_posts', args=['missing']),
+                    reverse('api:profile_posts', args=['missing']),
+                    reverse('api:post_detail', args=[0])):
+            with self.subTest(url=url):
+                response = self.client.get(url)
+                self.assertEqual(response.status_code, HTTPStatus.NOT_FOUND)
+                self.assertIn('detail', response.json())
+
+    def test_post_detail(self):
+        """Пост отдается одним объектом с выбранными полями."""
+
+        post = self.posts[0]
+        response = self.client.get(
+            reverse('api:post_detail', args=[post.pk]), {'fields': 'id,text'})
+        self.assertEqual(response.json(), {'id': post.pk, 'text': post.text})
+
+    def test_conditional_get(self):
+        """Повтор с ETag дает 304, пока лента не изменилась."""
+
+        url = reverse('api:posts')
+        etag = self.client.get(url)['ETag']
+        response = self.client.get(url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, HTTPStatus.NOT_MODIFIED)
+
+        Post.objects.create(text='Новый пост', author=self.user)
+        response = self.client.get(url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, HTTPStatus.OK)
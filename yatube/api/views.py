@@ -0,0 +1,157 @@
+from functools import wraps
+
+from django.core.serializers.json import DjangoJSONEncoder
+from django.http import Http404, JsonResponse, StreamingHttpResponse
+from django.views.decorators.http import require_safe
+
+from core.db import replica_reads
+from posts.cache import FEED, conditional_page
+from posts.models import Group, Post, User
+from posts.paginators import CursorPage, CursorPaginator
+from posts.views import group_scopes, post_detail_scopes, profile_scopes
+
+PAGE_SIZE = 10
+MAX_PAGE_SIZE = 100
+
+# Поле ответа -> поле для values(); в SELECT попадают только
+# запрошенные столбцы, а связи присоединяются, только если нужны.
+POST_FIELDS = {
+    'id': 'id',
+    'text': 'text',
+    'pub_date': 'pub_date',
+    'author': 'author__username',
+    'group': 'group__slug',
+}
+
+encoder = DjangoJSONEncoder(ensure_ascii=False)
+
+
+class BadRequest(Exception):
+    """Некорректные параметры запроса; текст уходит клиенту."""
+
+
+class ValuesCursorPage(CursorPage):
+    """Страница из словарей values() вместо объектов модели."""
+
+    def position(self, row):
+        return row['pub_date'], row['id']
+
+
+class ValuesCursorPaginator(CursorPaginator):
+    page_class = ValuesCursorPage
+
+
+def api_view(scopes_func):
+    """GET/HEAD из реплики с условным GET по областям кеша и ошибками
+    в JSON."""
+
+    def decorator(view):
+        @wraps(view)
+        def wrapper(request, *args, **kwargs):
+            try:
+                return view(request, *args, **kwargs)
+            except Http404:
+                return JsonResponse({'detail': 'Не найдено.'}, status=404)
+            except BadRequest as error:
+                return JsonResponse({'detail': str(error)}, status=400)
+        return require_safe(
+            replica_reads(conditional_page(scopes_func)(wrapper)))
+    return decorator
+
+
+def requested_fields(request):
+    """Поля из `?fields=a,b`; без параметра отдаются все поля."""
+    raw = request.GET.get('fields')
+    if not raw:
+        return list(POST_FIELDS)
+    fields = list(dict.fromkeys(
+        field.strip() for field in raw.split(',') if field.strip()))
+    unknown = [field for field in fields if field not in POST_FIELDS]
+    if unknown or not fields:
+        raise BadRequest(
+            f'Неизвестные поля: {", ".join(unknown)}. '
+            f'Доступны: {", ".join(POST_FIELDS)}.')
+    return fields
+
+
+def page_size(request):
+    try:
+        size = int(request.GET.get('limit', PAGE_SIZE))
+    except ValueError:
+        size = 0
+    if not 1 <= size <= MAX_PAGE_SIZE:
+        raise BadRequest(f'limit должен быть от 1 до {MAX_PAGE_SIZE}.')
+    return size
+
+
+def serialize(row, fields):
+    return encoder.encode({field: row[POST_FIELDS[field]] for field in fields})
+
+
+def page_url(request, cursor):
+    if cursor is None:
+        return None
+    query = request.GET.copy()
+    query['cursor'] = cursor
+    return request.build_absolute_uri(f'?{query.urlencode()}')
+
+
+def stream_page(request, page, fields):
+    """JSON страницы по частям, по записи за раз."""
+    yield '{"results": ['
+    for number, row in enumerate(page):
+        yield (',' if number else '') + serialize(row, fields)
+    next_url = page_url(request, page.next_cursor if page.has_next() else None)
+    previous_url = page_url(
+        request, page.previous_cursor if page.has_previous() else None)
+    yield (
+        f'], "next": {encoder.encode(next_url)}, '
+        f'"previous": {encoder.encode(previous_url)}}}'
+    )
+
+
+def feed_response(request, posts):
+    fields = requested_fields(request)
+    columns = dict.fromkeys(
+        [POST_FIELDS[field] for field in fields] + ['id', 'pub_date'])
+    paginator = ValuesCursorPaginator(
+        posts.values(*columns), page_size(request))
+    page = paginator.get_cursor_page(request.GET.get('cursor'))
+    return StreamingHttpResponse(
+        stream_page(request, page, fields),
+        content_type='application/json')
+
+
+@api_view(lambda: [FEED])
+def posts(request):
+    return feed_response(request, Post.objects.all())
+
+
+@api_view(group_scopes)
+def group_posts(request, slug):
+    group_id = Group.objects.filter(slug=slug).values_list(
+        'pk', flat=True).first()
+    if group_id is None:
+        raise Http404
+    return feed_response(request, Post.objects.filter(group_id=group_id))
+
+
+@api_view(profile_scopes)
+def profile_posts(request, username):
+    author_id = User.objects.filter(username=username).values_list(
+        'pk', flat=True).first()
+    if author_id is None:
+        raise Http404
+    return feed_response(request, Post.objects.filter(author_id=author_id))
+
+
+@api_view(post_detail_scopes)
+def post_detail(request, post_id):
+    fields = requested_fields(request)
+    row = Post.objects.filter(pk=post_id).values(
+        *[POST_FIELDS[field] for field in fields]).first()
+    if row is None:
+        raise Http404
+    return JsonResponse(
+        {field: row[POST_FIELDS[field]] for field in fields},
+        json_dumps_params={'ensure_ascii': False})
@@ -0,0 +1,24 @@
+from django.contrib import admin
+from django.utils import timezone
+
+from .models import Task
+
+
+class TaskAdmin(admin.ModelAdmin):
+    list_display = ('pk', 'name', 'status', 'run_at', 'attempts',
+                    'last_error')
+    list_filter = ('status',)
+    readonly_fields = ('name', 'payload', 'attempts', 'last_error',
+                       'created_at')
+    actions = ('retry',)
+
+    def retry(self, request, queryset):
+        updated = queryset.update(
+            status=Task.QUEUED, attempts=0, run_at=timezone.now())
+        self.message_user(request, f'Задач снова в очереди: {updated}.')
+
+    retry.short_description = 'Повторить'
+    retry.allowed_permissions = ('change',)
+
+
+admin.site.register(Task, TaskAdmin)
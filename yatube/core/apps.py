@@ -1,5 +1,15 @@
 from django.apps import AppConfig
+from django.db.backends.signals import connection_created
 
 
 class CoreConfig(AppConfig):
     name = 'core'
+
+    def ready(self):
+        from posts.cache import versions_bumped
+
+        from .db import tune_sqlite
+        from .prerender import regenerate_for_scopes
+
+        connection_created.connect(tune_sqlite)
+        versions_bumped.connect(regenerate_for_scopes)
@@ -0,0 +1,125 @@
+import random
+import sqlite3
+import threading
+import time
+from contextlib import contextmanager
+from functools import wraps
+
+from django.conf import settings
+from django.db import connections
+
+# Время в сессии, до которого чтения пользователя идут в основную базу.
+PRIMARY_UNTIL_KEY = '_db_primary_until'
+
+_state = threading.local()
+
+
+def tune_sqlite(sender, connection, **kwargs):
+    """Применяет SQLITE_PRAGMAS к каждому новому соединению с SQLite."""
+    if connection.vendor != 'sqlite':
+        return
+    with connection.cursor() as cursor:
+        for name, value in settings.SQLITE_PRAGMAS.items():
+            cursor.execute(f'PRAGMA {name} = {value}')
+
+
+class ReplicaRouter:
+    """Чтения внутри `use_replica()` идут в реплику, все записи - в default.
+
+    После первой записи внутри `track_writes()` чтения до конца запроса
+    тоже идут в основную базу, чтобы запрос видел свои изменения.
+    """
+
+    def db_for_read(self, model, **hints):
+        if getattr(_state, 'writes', None):
+            return 'default'
+        return getattr(_state, 'replica', None)
+
+    def db_for_write(self, model, **hints):
+        if getattr(_state, 'writes', None) is not None:
+            _state.writes += 1
+        return 'default'
+
+    def allow_relation(self, obj1, obj2, **hints):
+        return True
+
+    def allow_migrate(self, db, app_label, **hints):
+        # Схема попадает в реплики вместе с данными.
+        return db not in settings.REPLICA_DATABASES
+
+
+@contextmanager
+def use_replica():
+    """Направляет чтения блока в случайную реплику из REPLICA_DATABASES."""
+    previous = getattr(_state, 'replica', None)
+    _state.replica = random.choice(settings.REPLICA_DATABASES)
+    try:
+        yield _state.replica
+    finally:
+        _state.replica = previous
+
+
+@contextmanager
+def track_writes():
+    """Считает записи в основную базу внутри блока (запроса).
+
+    Отдает функцию, возвращающую число записей на текущий момент.
+    """
+    previous = getattr(_state, 'writes', None)
+    _state.writes = 0
+    try:
+        yield lambda: _state.writes
+    finally:
+        _state.writes = previous
+
+
+def pinned_to_primary(request):
+    session = getattr(request, 'session', None)
+    return bool(session) and session.get(PRIMARY_UNTIL_KEY, 0) > time.time()
+
+
+def pin_to_primary(request):
+    """Оставляет чтения сессии на основной базе на REPLICA_LAG_WINDOW."""
+    if hasattr(request, 'session'):
+        request.session[PRIMARY_UNTIL_KEY] = (
+            time.time() + settings.REPLICA_LAG_WINDOW)
+
+
+def replica_reads(view):
+    """Читает данные view из реплики, если сессия недавно не писала.
+
+    Сессия и пользователь загружаются до переключения, из основной
+    базы: свежий вход в реплике может быть еще не виден.
+    """
+
+    @wraps(view)
+    def wrapper(request, *args, **kwargs):
+        if not settings.REPLICA_DATABASES or pinned_to_primary(request):
+            return view(request, *args, **kwargs)
+        if hasattr(request, 'user'):
+            request.user.is_authenticated
+        with use_replica():
+            return view(request, *args, **kwargs)
+    return wrapper
+
+
+def copy_sqlite(source, target):
+    """Копирует согласованный снимок базы SQLite через backup API."""
+    src, dst = sqlite3.connect(source), sqlite3.connect(target)
+    try:
+        src.backup(dst)
+    finally:
+        src.close()
+        dst.close()
+
+
+def replicate():
+    """Заменитель репликации для локальной проверки: копирует default в
+    каждую реплику SQLite. Возвращает псевдонимы обновленных реплик."""
+    primary = connections['default'].settings_dict
+    if primary['ENGINE'] != 'django.db.backends.sqlite3':
+        return []
+    for alias in settings.REPLICA_DATABASES:
+        connections[alias].close()
+        copy_sqlite(primary['NAME'], connections[alias].settings_dict['NAME'])
+    return list(settings.REPLICA_DATABASES)
@@ -0,0 +1,39 @@
+from django.conf import settings
+from django.core.mail import EmailMultiAlternatives, get_connection
+from django.core.mail.backends.base import BaseEmailBackend
+
+from .tasks import task
+
+
+class QueuedEmailBackend(BaseEmailBackend):
+    """Ставит письма в очередь задач вместо отправки в запросе.
+
+    Отправляет их обработчик очереди через `TASK_EMAIL_BACKEND`.
+    Письма с вложениями отправляются сразу: вложения в очередь
+    не кладем.
+    """
+
+    def send_messages(self, email_messages):
+        for message in email_messages:
+            if message.attachments:
+                get_connection(settings.TASK_EMAIL_BACKEND).send_messages(
+                    [message])
+                continue
+            send_message.delay({
+                'subject': message.subject,
+                'body': message.body,
+                'from_email': message.from_email,
+                'to': message.to,
+                'cc': message.cc,
+                'bcc': message.bcc,
+                'reply_to': message.reply_to,
+                'headers': message.extra_headers,
+                'alternatives': getattr(message, 'alternatives', []),
+            })
+        return len(email_messages)
+
+
+@task
+def send_message(data):
+    message = EmailMultiAlternatives(**data)
+    get_connection(settings.TASK_EMAIL_BACKEND).send_messages([message])
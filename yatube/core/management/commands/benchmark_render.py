@@ -0,0 +1,110 @@
+import time
+
+from django.contrib.auth.models import AnonymousUser
+from django.core.management.base import BaseCommand
+from django.core.paginator import Paginator
+from django.template import Context, Template
+from django.template.loader import render_to_string
+from django.test import RequestFactory
+from django.urls import reverse
+from django.utils import timezone
+
+from posts.models import Group, Post, User
+from posts.views import VISIBLE_POSTCOUNT
+
+URL_TAGS = (
+    "{% for post in posts %}"
+    "{% url 'posts:profile' post.author.username %}"
+    "{% url 'posts:group_list' post.group.slug %}"
+    "{% url 'posts:post_detail' post.id %}"
+    "{% endfor %}"
+)
+URL_METHODS = (
+    "{% for post in posts %}"
+    "{{ post.author.get_absolute_url }}"
+    "{{ post.group.get_absolute_url }}"
+    "{{ post.get_absolute_url }}"
+    "{% endfor %}"
+)
+# Прежняя отрисовка: {% include %} и {% cache %} на каждую карточку.
+INCLUDE_CARDS = (
+    "{% load cache %}"
+    "{% for post in posts %}"
+    "{% cache 86400 post_card post.pk post.card_version True False %}"
+    "{% include 'includes/post.html' with view_group_link=True %}"
+    "{% endcache %}"
+    "{% endfor %}"
+)
+COMPILED_CARDS = (
+    "{% load post_cards %}"
+    "{% for post in posts %}"
+    "{% post_card posts view_group_link=True %}"
+    "{% endfor %}"
+)
+
+
+class Command(BaseCommand):
+    help = (
+        'Микробенчмарк отрисовки ленты без базы: ссылки карточек через '
+        '{% url %} и через кешированные адреса, карточки через '
+        '{% include %} и {% post_card %} с холодным и теплым кешем '
+        'фрагментов, страница ленты целиком.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--iterations', type=int, default=500)
+
+    def handle(self, *args, **options):
+        iterations = options['iterations']
+        posts = self.posts()
+
+        def cold(render):
+            def run(number):
+                # Новая версия карточек: фрагменты рисуются заново.
+                for post in posts:
+                    post.card_version = number
+                render(number)
+            return run
+
+        def from_string(source):
+            compiled = Template(source)
+            return lambda number: compiled.render(Context({'posts': posts}))
+
+        request = RequestFactory().get(reverse('posts:index'))
+        request.user = AnonymousUser()
+        request.resolver_match = None
+        page = Paginator(posts, VISIBLE_POSTCOUNT).page(1)
+        results = {
+            'url tag': from_string(URL_TAGS),
+            'cached url': from_string(URL_METHODS),
+            'include, cold': cold(from_string(INCLUDE_CARDS)),
+            'post_card, cold': cold(from_string(COMPILED_CARDS)),
+            'include, warm': from_string(INCLUDE_CARDS),
+            'post_card, warm': from_string(COMPILED_CARDS),
+            'index page': cold(lambda number: render_to_string(
+                'posts/index.html', {'page_obj': page}, request)),
+        }
+        for name, render in results.items():
+            seconds = self.timed(render, iterations)
+            self.stdout.write(
+                f'{name:16} {seconds / iterations * 1000:8.3f} мс')
+
+    def posts(self):
+        now = timezone.now()
+        return [
+            Post(
+                pk=number,
+                text=f'Пост {number}',
+                pub_date=now,
+                author=User(pk=number, username=f'author{number}'),
+                group=Group(pk=number, slug=f'group-{number}'),
+            )
+            for number in range(1, VISIBLE_POSTCOUNT + 1)
+        ]
+
+    def timed(self, render, iterations):
+        render(-1)
+        started = time.perf_counter()
+        for number in range(iterations):
+            render(number)
+        return time.perf_counter() - started
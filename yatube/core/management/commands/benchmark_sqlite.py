@@ -0,0 +1,111 @@
+import os
+import sqlite3
+import tempfile
+import threading
+import time
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+
+SCHEMA = (
+    'CREATE TABLE post ('
+    'id INTEGER PRIMARY KEY, text TEXT, pub_date TEXT, author_id INTEGER)',
+    'CREATE INDEX post_pub_date ON post (pub_date, id)',
+)
+READ = 'SELECT id, text FROM post ORDER BY pub_date DESC, id DESC LIMIT 10'
+WRITE = (
+    "INSERT INTO post (text, pub_date, author_id) "
+    "VALUES ('benchmark', datetime('now'), 1)"
+)
+
+
+class Command(BaseCommand):
+    help = (
+        'Сравнивает пропускную способность SQLite при одновременном '
+        'чтении и записи: настройки по умолчанию с новым соединением на '
+        'каждый запрос против SQLITE_PRAGMAS с постоянным соединением.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--readers', type=int, default=4)
+        parser.add_argument('--writers', type=int, default=2)
+        parser.add_argument('--seconds', type=float, default=3)
+        parser.add_argument('--rows', type=int, default=10000)
+
+    def handle(self, *args, **options):
+        modes = {
+            'default': {'pragmas': {}, 'persistent': False, 'timeout': 5},
+            'tuned': {
+                'pragmas': settings.SQLITE_PRAGMAS,
+                'persistent': True,
+                'timeout': 20,
+            },
+        }
+        for name, mode in modes.items():
+            with tempfile.TemporaryDirectory() as directory:
+                path = os.path.join(directory, 'benchmark.sqlite3')
+                self.seed(path, options['rows'])
+                result = self.run_mode(path, mode, options)
+            self.stdout.write(
+                f'{name:8} reads/s={result["reads"]:9.0f} '
+                f'writes/s={result["writes"]:7.0f} '
+                f'errors={result["errors"]}'
+            )
+
+    def seed(self, path, rows):
+        with sqlite3.connect(path) as db:
+            for statement in SCHEMA:
+                db.execute(statement)
+            db.executemany(
+                'INSERT INTO post (text, pub_date, author_id) '
+                "VALUES (?, datetime('now', ?), 1)",
+                ((f'post {i}', f'-{i} seconds') for i in range(rows)),
+            )
+
+    def connect(self, path, mode):
+        db = sqlite3.connect(
+            path, timeout=mode['timeout'], isolation_level=None)
+        for name, value in mode['pragmas'].items():
+            db.execute(f'PRAGMA {name} = {value}')
+        return db
+
+    def run_mode(self, path, mode, options):
+        counts = {'reads': 0, 'writes': 0, 'errors': 0}
+        lock = threading.Lock()
+        deadline = time.monotonic() + options['seconds']
+
+        def worker(kind, statement):
+            db = self.connect(path, mode) if mode['persistent'] else None
+            done = errors = 0
+            while time.monotonic() < deadline:
+                connection = db or self.connect(path, mode)
+                try:
+                    connection.execute(statement).fetchall()
+                    done += 1
+                except sqlite3.OperationalError:
+                    errors += 1
+                finally:
+                    if db is None:
+                        connection.close()
+            with lock:
+                counts[kind] += done
+                counts['errors'] += errors
+
+        threads = [
+            threading.Thread(target=worker, args=('reads', READ))
+            for _ in range(options['readers'])
+        ] + [
+            threading.Thread(target=worker, args=('writes', WRITE))
+            for _ in range(options['writers'])
+        ]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+        seconds = options['seconds']
+        return {
+            'reads': counts['reads'] / seconds,
+            'writes': counts['writes'] / seconds,
+            'errors': counts['errors'],
+        }
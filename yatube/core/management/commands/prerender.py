@@ -0,0 +1,17 @@
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+
+from core.prerender import prerender_all
+
+
+class Command(BaseCommand):
+    help = (
+        'Записывает в PRERENDER_ROOT готовые страницы для анонимов: '
+        '«Об авторе», «Технологии», 404 и первые страницы лент.'
+    )
+
+    def handle(self, *args, **options):
+        if not settings.PRERENDER_ROOT:
+            raise CommandError('Каталог не настроен: задайте PRERENDER_ROOT.')
+        prerender_all()
+        self.stdout.write(f'Страницы записаны в {settings.PRERENDER_ROOT}')
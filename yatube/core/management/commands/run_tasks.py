@@ -0,0 +1,39 @@
+from django.core.management.base import BaseCommand
+
+from core.tasks import run_pending, start_workers
+
+
+class Command(BaseCommand):
+    help = (
+        'Обработчик очереди задач: выполняет отложенную работу '
+        '(письма, раскладку постов по лентам, удаление пользователей).'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--threads', type=int, default=2,
+            help='Число потоков-обработчиков.')
+        parser.add_argument(
+            '--poll-interval', type=float, default=1,
+            help='Пауза между опросами пустой очереди, секунды.')
+        parser.add_argument(
+            '--once', action='store_true',
+            help='Выполнить готовые задачи и выйти.')
+
+    def handle(self, *args, **options):
+        if options['once']:
+            done = run_pending()
+            self.stdout.write(f'Выполнено задач: {done}')
+            return
+        stop, workers = start_workers(
+            options['threads'], options['poll_interval'])
+        self.stdout.write(
+            f'Обработчиков запущено: {len(workers)}. Остановка - Ctrl+C.')
+        try:
+            while any(worker.is_alive() for worker in workers):
+                for worker in workers:
+                    worker.join(1)
+        except KeyboardInterrupt:
+            stop.set()
+            for worker in workers:
+                worker.join()
@@ -0,0 +1,31 @@
+import time
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+
+from core.db import replicate
+
+
+class Command(BaseCommand):
+    help = (
+        'Заменитель репликации для локальной проверки: копирует основную '
+        'базу SQLite в реплики из DB_REPLICAS, один раз или по интервалу.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--interval', type=float, default=0,
+            help='Повторять копирование каждые N секунд (0 - один раз).')
+
+    def handle(self, *args, **options):
+        if not settings.REPLICA_DATABASES:
+            raise CommandError('Реплики не настроены: задайте DB_REPLICAS.')
+        while True:
+            replicas = replicate()
+            if not replicas:
+                raise CommandError('Копирование поддерживается только для '
+                                   'SQLite.')
+            self.stdout.write(f'Реплики обновлены: {", ".join(replicas)}')
+            if not options['interval']:
+                return
+            time.sleep(options['interval'])
@@ -0,0 +1,59 @@
+from contextlib import ExitStack
+
+from django.db import connections
+
+from . import timing
+from .db import pin_to_primary, track_writes
+
+UNRESOLVED = '<unresolved>'
+
+
+class RequestTimingMiddleware:
+    """Считает SQL-запросы, время БД и шаблонов для каждого запроса.
+
+    Итог уходит в заголовок Server-Timing и в гистограммы по view
+    (core.timing.registry).
+    """
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        timings = timing.start_request()
+        try:
+            with ExitStack() as stack:
+                for connection in connections.all():
+                    stack.enter_context(connection.execute_wrapper(timings))
+                response = self.get_response(request)
+        finally:
+            timing.finish_request()
+
+        metrics = timings.as_metrics()
+        response['Server-Timing'] = (
+            f'db;dur={metrics["db_ms"]:.1f};'
+            f'desc="{metrics["db_queries"]} queries", '
+            f'tpl;dur={metrics["template_ms"]:.1f}, '
+            f'total;dur={metrics["total_ms"]:.1f}'
+        )
+        match = request.resolver_match
+        timing.registry.record(
+            match.view_name if match else UNRESOLVED, metrics)
+        return response
+
+
+class ReadAfterWriteMiddleware:
+    """После записи в базу закрепляет сессию за основной базой.
+
+    Реплики отстают, поэтому пока идет REPLICA_LAG_WINDOW, view с
+    replica_reads читают для этой сессии из default.
+    """
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        with track_writes() as writes:
+            response = self.get_response(request)
+            if writes():
+                pin_to_primary(request)
+        return response
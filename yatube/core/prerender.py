@@ -0,0 +1,198 @@
+"""Готовые HTML-файлы страниц, одинаковых для всех анонимов.
+
+Файлы кладутся в PRERENDER_ROOT по пути страницы: первая страница
+ленты - `<путь>/index.html`, страница `?page=N` - `<путь>/page-N.html`,
+страница 404 - `404.html`. Фронтенд отдает их анонимам сам, например
+в nginx:
+
+    map $args $prerendered {
+        "" index.html;
+        "~^page=([0-9]+)$" page-$1.html;
+        default "";
+    }
+
+    location / {
+        if ($cookie_sessionid) { proxy_pass http://yatube; }
+        if ($prerendered = "") { proxy_pass http://yatube; }
+        try_files /prerendered$uri/$prerendered @yatube;
+    }
+
+Файл берется, только если строки запроса нет или в ней ровно
+`page=N`: запросы с `?cursor=` и другими параметрами, а также
+страницы дальше PRERENDER_FEED_PAGES (их файлов нет) идут в Django.
+"""
+import json
+import math
+import os
+import shutil
+import tempfile
+from datetime import timedelta
+
+from django.conf import settings
+from django.contrib.auth.models import AnonymousUser
+from django.contrib.sessions.backends.base import SessionBase
+from django.http import Http404, HttpRequest, QueryDict
+from django.template.loader import render_to_string
+from django.urls import resolve, reverse
+from django.utils import timezone
+
+from core.models import Task
+from core.tasks import enqueue, task
+from posts.cache import FEED
+from posts.counters import total_posts
+from posts.models import Group
+from posts.views import VISIBLE_POSTCOUNT
+
+# Изменения за эти секунды собираются в одну перерисовку.
+REGENERATE_DELAY = 5
+GROUPS_DIR = 'group'
+# Хост запросов отрисовки: страницы от него не зависят, но он должен
+# быть в ALLOWED_HOSTS.
+SERVER_NAME = 'localhost'
+
+
+def anonymous_request(path, query=None):
+    """GET-запрос анонима к `path`, как его видит view."""
+    request = HttpRequest()
+    request.method = 'GET'
+    request.path = request.path_info = path
+    request.GET = QueryDict(mutable=True)
+    request.GET.update(query or {})
+    request.META.update({
+        'SERVER_NAME': SERVER_NAME,
+        'SERVER_PORT': '80',
+        'QUERY_STRING': request.GET.urlencode(),
+    })
+    request.user = AnonymousUser()
+    request.session = SessionBase()
+    return request
+
+
+def render_page(path, query=None):
+    """Отрисовывает страницу для анонима; None, если ее нет."""
+    request = anonymous_request(path, query)
+    try:
+        match = resolve(path)
+    except Http404:
+        return None
+    request.resolver_match = match
+    try:
+        response = match.func(request, *match.args, **match.kwargs)
+    except Http404:
+        return None
+    if hasattr(response, 'render'):
+        response.render()
+    return response.content if response.status_code == 200 else None
+
+
+def render_not_found():
+    """Страница 404 без адреса: она общая для всех путей."""
+    return render_to_string(
+        'core/404.html', {'path': ''}, anonymous_request('/')).encode()
+
+
+def file_path(path, page=1):
+    directory = os.path.join(settings.PRERENDER_ROOT, path.strip('/'))
+    name = 'index.html' if page == 1 else f'page-{page}.html'
+    return os.path.join(directory, name)
+
+
+def write_file(target, content):
+    """Атомарно заменяет файл: пишет рядом и переименовывает."""
+    if content is None:
+        if os.path.exists(target):
+            os.remove(target)
+        return
+    directory = os.path.dirname(target)
+    os.makedirs(directory, exist_ok=True)
+    descriptor, temporary = tempfile.mkstemp(dir=directory, suffix='.tmp')
+    with os.fdopen(descriptor, 'wb') as stream:
+        stream.write(content)
+    os.chmod(temporary, 0o644)
+    os.replace(temporary, target)
+
+
+def prerender_feed(path, total):
+    """Первые PRERENDER_FEED_PAGES страниц ленты из `total` постов.
+
+    Файлы страниц, которых больше нет, удаляются.
+    """
+    pages = min(
+        settings.PRERENDER_FEED_PAGES,
+        max(1, math.ceil(total / VISIBLE_POSTCOUNT)))
+    for page in range(1, pages + 1):
+        query = None if page == 1 else {'page': page}
+        write_file(file_path(path, page), render_page(path, query))
+    directory = os.path.dirname(file_path(path))
+    for name in os.listdir(directory) if os.path.isdir(directory) else []:
+        number = name[len('page-'):-len('.html')]
+        if name.startswith('page-') and number.isdigit() and (
+                int(number) > pages):
+            os.remove(os.path.join(directory, name))
+
+
+def remove_stale_groups():
+    """Удаляет файлы групп, которых больше нет (или сменился slug)."""
+    root = os.path.join(settings.PRERENDER_ROOT, GROUPS_DIR)
+    if not os.path.isdir(root):
+        return
+    slugs = set(Group.objects.values_list('slug', flat=True))
+    for name in os.listdir(root):
+        if name not in slugs:
+            shutil.rmtree(os.path.join(root, name), ignore_errors=True)
+
+
+@task
+def prerender_index():
+    prerender_feed(reverse('posts:index'), total_posts())
+
+
+@task
+def prerender_group(group_id):
+    group = Group.objects.filter(pk=group_id).values_list(
+        'slug', 'posts_count').first()
+    if group is not None:
+        prerender_feed(
+            reverse('posts:group_list', args=[group[0]]), group[1])
+    remove_stale_groups()
+
+
+def prerender_all():
+    """Перерисовывает все страницы: «о сайте», 404 и ленты."""
+    pages = [reverse('about:author'), reverse('about:tech')]
+    for path in pages:
+        write_file(file_path(path), render_page(path))
+    write_file(
+        os.path.join(settings.PRERENDER_ROOT, '404.html'),
+        render_not_found())
+    prerender_feed(reverse('posts:index'), total_posts())
+    groups = Group.objects.values_list('slug', 'posts_count')
+    for slug, posts_count in groups.iterator():
+        prerender_feed(
+            reverse('posts:group_list', args=[slug]), posts_count)
+    remove_stale_groups()
+
+
+def _schedule(func, *args):
+    """Ставит перерисовку с задержкой, если такая еще не ждет в очереди."""
+    pending = Task.objects.filter(
+        name=func.task_name, payload=json.dumps([args, {}]),
+        status=Task.QUEUED, attempts=0, run_at__gt=timezone.now())
+    if not pending.exists():
+        enqueue(func, *args, run_at=(
+            timezone.now() + timedelta(seconds=REGENERATE_DELAY)))
+
+
+def regenerate_for_scopes(sender, scopes, **kwargs):
+    """Обработчик `versions_bumped`: ставит перерисовку затронутых лент.
+
+    Задачи пишутся в текущей транзакции вместе с изменением.
+    """
+    if not settings.PRERENDER_ROOT:
+        return
+    scopes = set(scopes)
+    if FEED in scopes:
+        _schedule(prerender_index)
+    for scope, pk in scopes:
+        if scope == 'group':
+            _schedule(prerender_group, pk)
@@ -0,0 +1,29 @@
+from functools import lru_cache
+
+from django.core.signals import setting_changed
+from django.dispatch import receiver
+from django.urls import get_script_prefix, get_urlconf, reverse
+
+# Адресов в памяти процесса не больше этого числа: карточки постов
+# ссылаются на авторов, группы и сами посты, самые частые остаются.
+URL_CACHE_SIZE = 10000
+
+
+@lru_cache(maxsize=URL_CACHE_SIZE)
+def _reverse(prefix, urlconf, viewname, args):
+    return reverse(viewname, urlconf=urlconf, args=args)
+
+
+def cached_reverse(viewname, *args):
+    """reverse() с запоминанием результата в ограниченном LRU-кеше.
+
+    Адрес зависит только от имени, аргументов, префикса скрипта и
+    URLconf, поэтому сбрасывать кеш при изменении данных не нужно.
+    """
+    return _reverse(get_script_prefix(), get_urlconf(), viewname, args)
+
+
+@receiver(setting_changed)
+def clear_cache(setting, **kwargs):
+    if setting == 'ROOT_URLCONF':
+        _reverse.cache_clear()
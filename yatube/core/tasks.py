@@ -0,0 +1,143 @@
+import json
+import logging
+import threading
+from datetime import timedelta
+
+from django.db import close_old_connections, connections
+from django.db.models import F
+from django.utils import timezone
+from django.utils.module_loading import import_string
+
+from .models import Task
+
+logger = logging.getLogger(__name__)
+
+MAX_ATTEMPTS = 5
+# Срок аренды задачи обработчиком, секунды.
+LEASE = 300
+# Задержка перед повтором: RETRY_DELAY * 2 ** (попытка - 1), секунды.
+RETRY_DELAY = 10
+CLAIM_BATCH = 10
+
+
+def task(func=None, *, max_attempts=MAX_ATTEMPTS, lease=LEASE):
+    """Помечает функцию как задачу очереди и добавляет ей `delay()`.
+
+    Аргументы задачи хранятся в JSON, поэтому передавать нужно id и
+    простые значения, а не объекты моделей. Задача может выполниться
+    повторно (после ошибки или истекшей аренды) и должна это выдерживать.
+    """
+
+    def decorate(func):
+        func.task_name = f'{func.__module__}.{func.__qualname__}'
+        func.max_attempts = max_attempts
+        func.lease = lease
+        func.delay = lambda *args, **kwargs: enqueue(func, *args, **kwargs)
+        return func
+
+    return decorate if func is None else decorate(func)
+
+
+def enqueue(func, *args, run_at=None, **kwargs):
+    """Ставит вызов `func(*args, **kwargs)` в очередь.
+
+    Строка задачи пишется в текущей транзакции: если она откатится,
+    задачи тоже не будет. `run_at` откладывает запуск.
+    """
+    return Task.objects.create(
+        name=func.task_name,
+        payload=json.dumps([args, kwargs]),
+        run_at=run_at or timezone.now(),
+        max_attempts=func.max_attempts,
+    )
+
+
+def resolve(name):
+    func = import_string(name)
+    if not hasattr(func, 'task_name'):
+        raise ImportError(f'{name} не помечена как задача')
+    return func
+
+
+def claim():
+    """Забирает одну готовую задачу или возвращает None.
+
+    Задача захватывается условным UPDATE по старому `run_at`, поэтому
+    одну задачу не заберут два обработчика.
+    """
+    now = timezone.now()
+    candidates = Task.objects.filter(
+        status=Task.QUEUED, run_at__lte=now
+    ).values_list('pk', 'name', 'run_at')[:CLAIM_BATCH]
+    for pk, name, run_at in candidates:
+        try:
+            lease = resolve(name).lease
+        except ImportError:
+            lease = LEASE
+        claimed = Task.objects.filter(pk=pk, run_at=run_at).update(
+            run_at=now + timedelta(seconds=lease),
+            attempts=F('attempts') + 1,
+        )
+        if claimed:
+            return Task.objects.get(pk=pk)
+    return None
+
+
+def execute(task):
+    """Выполняет захваченную задачу и удаляет ее или планирует повтор."""
+    try:
+        args, kwargs = json.loads(task.payload)
+        resolve(task.name)(*args, **kwargs)
+    except Exception as error:
+        logger.exception('Задача %s #%d упала', task.name, task.pk)
+        tasks = Task.objects.filter(pk=task.pk)
+        if task.attempts >= task.max_attempts:
+            tasks.update(status=Task.FAILED, last_error=repr(error))
+        else:
+            delay = RETRY_DELAY * 2 ** (task.attempts - 1)
+            tasks.update(
+                run_at=timezone.now() + timedelta(seconds=delay),
+                last_error=repr(error),
+            )
+        return False
+    Task.objects.filter(pk=task.pk).delete()
+    return True
+
+
+def run_pending(limit=None):
+    """Выполняет готовые задачи в текущем потоке; возвращает их число."""
+    done = 0
+    while limit is None or done < limit:
+        task = claim()
+        if task is None:
+            break
+        execute(task)
+        done += 1
+    return done
+
+
+def work(stop, poll_interval=1):
+    """Цикл обработчика: выполняет задачи, пока не выставлен `stop`."""
+    while not stop.is_set():
+        close_old_connections()
+        task = claim()
+        if task is None:
+            stop.wait(poll_interval)
+            continue
+        execute(task)
+    connections.close_all()
+
+
+def start_workers(threads, poll_interval=1):
+    """Запускает `threads` обработчиков; возвращает событие остановки и
+    потоки."""
+    stop = threading.Event()
+    workers = [
+        threading.Thread(
+            target=work, args=(stop, poll_interval),
+            name=f'task-worker-{number}', daemon=True)
+        for number in range(threads)
+    ]
+    for worker in workers:
+        worker.start()
+    return stop, workers
@@ -0,0 +1,37 @@
+import time
+
+from django.template import TemplateDoesNotExist
+from django.template.backends.django import DjangoTemplates, Template, reraise
+
+from . import timing
+
+
+class TimedTemplate(Template):
+    """Шаблон, добавляющий время отрисовки к счетчикам запроса."""
+
+    def render(self, context=None, request=None):
+        timings = timing.current()
+        if timings is None:
+            return super().render(context, request)
+        timings.template_depth += 1
+        started = time.perf_counter()
+        try:
+            return super().render(context, request)
+        finally:
+            timings.template_depth -= 1
+            # Вложенные вызовы уже входят во время внешнего.
+            if not timings.template_depth:
+                timings.template_seconds += time.perf_counter() - started
+
+
+class TimedDjangoTemplates(DjangoTemplates):
+
+    def from_string(self, template_code):
+        return TimedTemplate(self.engine.from_string(template_code), self)
+
+    def get_template(self, template_name):
+        try:
+            return TimedTemplate(
+                self.engine.get_template(template_name), self)
+        except TemplateDoesNotExist as exc:
+            reraise(exc, self)
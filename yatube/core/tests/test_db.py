@@ -0,0 +1,98 @@
+import os
+import sqlite3
+import tempfile
+import time
+from contextlib import closing
+
+from django.conf import settings
+from django.contrib.auth.models import AnonymousUser
+from django.contrib.sessions.backends.db import SessionStore
+from django.db import connection, router
+from django.test import RequestFactory, TestCase, override_settings
+from django.urls import reverse
+
+from core.db import (PRIMARY_UNTIL_KEY, copy_sqlite, pin_to_primary,
+                     replica_reads, track_writes, use_replica)
+from posts.models import Post, User
+
+
+class SQLiteTuningTests(TestCase):
+
+    def test_pragmas_applied_to_connection(self):
+        """Новое соединение с SQLite получает SQLITE_PRAGMAS."""
+
+        if connection.vendor != 'sqlite' or not settings.SQLITE_PRAGMAS:
+            self.skipTest('Настройки SQLite отключены.')
+        expected = {
+            'busy_timeout': settings.SQLITE_PRAGMAS['busy_timeout'],
+            'synchronous': 1,
+        }
+        with connection.cursor() as cursor:
+            for name, value in expected.items():
+                with self.subTest(pragma=name):
+                    cursor.execute(f'PRAGMA {name}')
+                    self.assertEqual(cursor.fetchone()[0], value)
+
+
+@override_settings(REPLICA_DATABASES=['replica1'])
+class ReplicaRouterTests(TestCase):
+    """Чтения лент идут в реплику, кроме сессий, которые недавно писали."""
+
+    def setUp(self):
+        self.request = RequestFactory().get('/')
+        self.request.session = SessionStore()
+        self.request.user = AnonymousUser()
+
+    @staticmethod
+    @replica_reads
+    def read_view(request):
+        return router.db_for_read(Post)
+
+    def test_reads_in_block_use_replica(self):
+        """Внутри use_replica() чтения идут в реплику, записи - в default.
+        """
+
+        with track_writes():
+            self.assertEqual(router.db_for_read(Post), 'default')
+            with use_replica():
+                self.assertEqual(router.db_for_read(Post), 'replica1')
+                self.assertEqual(router.db_for_write(Post), 'default')
+                self.assertEqual(router.db_for_read(Post), 'default')
+
+    def test_view_reads_from_replica(self):
+        """View с replica_reads читает из реплики."""
+
+        self.assertEqual(self.read_view(self.request), 'replica1')
+
+    def test_pinned_session_reads_from_primary(self):
+        """Сессия, которая недавно писала, читает из default."""
+
+        pin_to_primary(self.request)
+        self.assertEqual(self.read_view(self.request), 'default')
+
+    def test_write_request_pins_session(self):
+        """Создание поста закрепляет сессию за основной базой."""
+
+        user = User.objects.create_user(username='HasNoName')
+        self.client.force_login(user)
+        self.client.post(reverse('posts:post_create'), {'text': 'Текст'})
+        self.assertGreater(
+            self.client.session[PRIMARY_UNTIL_KEY], time.time())
+
+
+class CopySQLiteTests(TestCase):
+
+    def test_copy_sqlite(self):
+        """copy_sqlite переносит данные основной базы в файл реплики."""
+
+        with tempfile.TemporaryDirectory() as directory:
+            source = os.path.join(directory, 'primary.sqlite3')
+            target = os.path.join(directory, 'replica.sqlite3')
+            with closing(sqlite3.connect(source)) as db:
+                db.execute('CREATE TABLE post (text TEXT)')
+                db.execute("INSERT INTO post VALUES ('Текст')")
+                db.commit()
+            copy_sqlite(source, target)
+            with closing(sqlite3.connect(target)) as db:
+                rows = db.execute('SELECT text FROM post').fetchall()
+        self.assertEqual(rows, [('Текст',)])
@@ -0,0 +1,70 @@
+import os
+import shutil
+import tempfile
+from io import StringIO
+
+from django.core.management import call_command
+from django.test import TestCase, override_settings
+
+from core.models import Task
+from core.prerender import prerender_all
+from core.tasks import run_pending
+from posts.models import Group, Post, User
+from posts.views import VISIBLE_POSTCOUNT
+
+PRERENDER_ROOT = tempfile.mkdtemp()
+
+
+@override_settings(PRERENDER_ROOT=PRERENDER_ROOT, PRERENDER_FEED_PAGES=2)
+class PrerenderTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.author = User.objects.create_user(username='author')
+        cls.group = Group.objects.create(title='Группа', slug='group')
+        Post.objects.bulk_create(
+            Post(text=f'Пост {number}', author=cls.author, group=cls.group)
+            for number in range(VISIBLE_POSTCOUNT + 1)
+        )
+
+    @classmethod
+    def tearDownClass(cls):
+        shutil.rmtree(PRERENDER_ROOT, ignore_errors=True)
+        super().tearDownClass()
+
+    def read(self, *parts):
+        with open(os.path.join(PRERENDER_ROOT, *parts), encoding='utf8') as f:
+            return f.read()
+
+    def test_command_writes_pages(self):
+        call_command('prerender', stdout=StringIO())
+        self.assertIn('Пост 10', self.read('index.html'))
+        self.assertIn('Пост 0', self.read('page-2.html'))
+        self.assertIn('Пост 10', self.read('group', 'group', 'index.html'))
+        self.assertIn(
+            'Регистрация', self.read('about', 'author', 'index.html'))
+        self.assertIn('Такой страницы не существует', self.read('404.html'))
+        self.assertNotIn(
+            'Пользователь:', self.read('about', 'tech', 'index.html'))
+
+    def test_changes_schedule_regeneration(self):
+        prerender_all()
+        Post.objects.filter(group=self.group).exclude(
+            text='Пост 10').delete()
+        Group.objects.create(title='Новая', slug='new')
+        Group.objects.get(slug='group').delete()
+        Task.objects.update(run_at='2000-01-01T00:00Z')
+        run_pending()
+
+        self.assertFalse(os.path.exists(
+            os.path.join(PRERENDER_ROOT, 'page-2.html')))
+        self.assertNotIn('Пост 0', self.read('index.html'))
+        self.assertTrue(os.path.exists(
+            os.path.join(PRERENDER_ROOT, 'group', 'new', 'index.html')))
+        self.assertFalse(os.path.exists(
+            os.path.join(PRERENDER_ROOT, 'group', 'group')))
+
+    def test_regeneration_is_debounced(self):
+        for number in range(3):
+            Post.objects.create(text=f'Новый {number}', author=self.author)
+        self.assertEqual(Task.objects.filter(
+            name='core.prerender.prerender_index').count(), 1)
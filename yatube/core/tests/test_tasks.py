@@ -0,0 +1,83 @@
+from datetime import timedelta
+
+from django.core import mail
+from django.test import TestCase, override_settings
+from django.urls import reverse
+from django.utils import timezone
+
+from core import tasks
+from core.models import Task
+from posts.models import User
+
+calls = []
+
+
+@tasks.task
+def remember(value, suffix=''):
+    calls.append(f'{value}{suffix}')
+
+
+@tasks.task(max_attempts=2)
+def broken():
+    raise ValueError('сломано')
+
+
+class TaskQueueTests(TestCase):
+    def setUp(self):
+        calls.clear()
+
+    def test_delay_runs_in_worker_and_removes_task(self):
+        remember.delay('a', suffix='!')
+        self.assertEqual(calls, [])
+        self.assertEqual(tasks.run_pending(), 1)
+        self.assertEqual(calls, ['a!'])
+        self.assertFalse(Task.objects.exists())
+
+    def test_scheduled_task_waits_for_run_at(self):
+        tasks.enqueue(
+            remember, 'later', run_at=timezone.now() + timedelta(hours=1))
+        self.assertEqual(tasks.run_pending(), 0)
+        self.assertEqual(calls, [])
+
+    def test_claimed_task_is_not_claimed_again(self):
+        remember.delay('once')
+        claimed = tasks.claim()
+        self.assertEqual(claimed.attempts, 1)
+        self.assertGreater(claimed.run_at, timezone.now())
+        self.assertIsNone(tasks.claim())
+
+    def test_failed_task_is_retried_then_marked_failed(self):
+        broken.delay()
+        with self.assertLogs('core.tasks', 'ERROR'):
+            tasks.run_pending()
+        task = Task.objects.get()
+        self.assertEqual(task.status, Task.QUEUED)
+        self.assertGreater(task.run_at, timezone.now())
+        self.assertIn('сломано', task.last_error)
+
+        Task.objects.update(run_at=timezone.now())
+        with self.assertLogs('core.tasks', 'ERROR'):
+            tasks.run_pending()
+        task.refresh_from_db()
+        self.assertEqual(task.status, Task.FAILED)
+        self.assertEqual(tasks.run_pending(), 0)
+
+    def test_only_marked_functions_run(self):
+        Task.objects.create(name='os.remove', payload='[["x"], {}]',
+                            max_attempts=1)
+        with self.assertLogs('core.tasks', 'ERROR'):
+            tasks.run_pending()
+        self.assertEqual(Task.objects.get().status, Task.FAILED)
+
+    @override_settings(
+        EMAIL_BACKEND='core.mail.QueuedEmailBackend',
+        TASK_EMAIL_BACKEND='django.core.mail.backends.locmem.EmailBackend')
+    def test_password_reset_mail_is_sent_by_worker(self):
+        User.objects.create_user(
+            username='reader', email='reader@example.com', password='pass')
+        self.client.post(
+            reverse('password_reset'), {'email': 'reader@example.com'})
+        self.assertEqual(mail.outbox, [])
+        self.assertEqual(tasks.run_pending(), 1)
+        self.assertEqual(len(mail.outbox), 1)
+        self.assertEqual(mail.outbox[0].to, ['reader@example.com'])
@@ -0,0 +1,47 @@
+from http import HTTPStatus
+
+from django.contrib.auth import get_user_model
+from django.test import Client, TestCase
+
+from core.timing import registry
+
+User = get_user_model()
+
+
+class RequestTimingTests(TestCase):
+
+    def setUp(self):
+        registry.reset()
+        self.guest_client = Client()
+
+    def test_server_timing_header(self):
+        """Ответ содержит Server-Timing с БД, шаблонами и общим временем."""
+
+        response = self.guest_client.get('/about/author/')
+        header = response['Server-Timing']
+        for metric in ('db;dur=', 'tpl;dur=', 'total;dur='):
+            with self.subTest(metric=metric):
+                self.assertIn(metric, header)
+
+    def test_views_are_aggregated(self):
+        """Запросы попадают в гистограммы своего view."""
+
+        for _ in range(3):
+            self.guest_client.get('/about/tech/')
+        views = registry.snapshot()['views']
+        self.assertEqual(views['about:tech']['total_ms']['count'], 3)
+        self.assertGreater(
+            views['about:tech']['template_ms']['mean'], 0)
+
+    def test_timings_endpoint_for_staff_only(self):
+        """Гистограммы доступны только сотрудникам."""
+
+        response = self.guest_client.get('/admin/timings/')
+        self.assertEqual(response.status_code, HTTPStatus.FOUND)
+
+        staff = User.objects.create_user(username='staff', is_staff=True)
+        staff_client = Client()
+        staff_client.force_login(staff)
+        response = staff_client.get('/admin/timings/')
+        self.assertEqual(response.status_code, HTTPStatus.OK)
+        self.assertIn('views', response.json())
@@ -0,0 +1,112 @@
+import os
+import threading
+import time
+from bisect import bisect_left
+
+# Верхние границы корзин гистограмм, миллисекунды.
+BUCKETS_MS = (5, 10, 25, 50, 100, 250, 500, 1000, 2500, float('inf'))
+METRICS = ('total_ms', 'db_ms', 'db_queries', 'template_ms')
+
+_local = threading.local()
+
+
+class RequestTimings:
+    """Счетчики одного запроса: SQL и время отрисовки шаблонов."""
+
+    def __init__(self):
+        self.started = time.perf_counter()
+        self.db_queries = 0
+        self.db_seconds = 0.0
+        self.template_seconds = 0.0
+        self.template_depth = 0
+
+    def __call__(self, execute, sql, params, many, context):
+        started = time.perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            self.db_seconds += time.perf_counter() - started
+            self.db_queries += 1
+
+    def as_metrics(self):
+        return {
+            'total_ms': (time.perf_counter() - self.started) * 1000,
+            'db_ms': self.db_seconds * 1000,
+            'db_queries': self.db_queries,
+            'template_ms': self.template_seconds * 1000,
+        }
+
+
+def start_request():
+    _local.timings = RequestTimings()
+    return _local.timings
+
+
+def finish_request():
+    _local.timings = None
+
+
+def current():
+    """Счетчики текущего запроса или None вне запроса."""
+    return getattr(_local, 'timings', None)
+
+
+class Histogram:
+    """Гистограмма с фиксированными корзинами, суммой и числом значений."""
+
+    def __init__(self):
+        self.counts = [0] * len(BUCKETS_MS)
+        self.count = 0
+        self.total = 0.0
+
+    def add(self, value):
+        self.counts[bisect_left(BUCKETS_MS, value)] += 1
+        self.count += 1
+        self.total += value
+
+    def as_dict(self):
+        return {
+            'count': self.count,
+            'mean': self.total / self.count if self.count else None,
+            'buckets': {
+                str(bound): count
+                for bound, count in zip(BUCKETS_MS, self.counts)
+            },
+        }
+
+
+class Registry:
+    """Гистограммы по view в пределах процесса."""
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.views = {}
+
+    def record(self, view_name, metrics):
+        with self.lock:
+            histograms = self.views.get(view_name)
+            if histograms is None:
+                histograms = self.views[view_name] = {
+                    metric: Histogram() for metric in METRICS}
+            for metric, value in metrics.items():
+                histograms[metric].add(value)
+
+    def snapshot(self):
+        with self.lock:
+            return {
+                'pid': os.getpid(),
+                'views': {
+                    view_name: {
+                        metric: histogram.as_dict()
+                        for metric, histogram in histograms.items()
+                    }
+                    for view_name, histograms in sorted(self.views.items())
+                },
+            }
+
+    def reset(self):
+        with self.lock:
+            self.views.clear()
+
+
+registry = Registry()
@@ -1,6 +1,16 @@
+from django.contrib.admin.views.decorators import staff_member_required
+from django.http import JsonResponse
 from django.shortcuts import render
 
+from .timing import registry
+
 
 def page_not_found(request, exception):
 
     return render(request, 'core/404.html', {'path': request.path}, status=404)
+
+
+@staff_member_required
+def request_timings(request):
+    """Гистограммы времени запросов по view для текущего процесса."""
+    return JsonResponse(registry.snapshot())
@@ -1,6 +1,164 @@
-from django.contrib import admin
+from datetime import date, datetime, timedelta
 
-from .models import Group, Post
+from django import forms
+from django.conf import settings
+from django.contrib import admin, messages
+from django.contrib.admin import helpers
+from django.contrib.admin.views.main import ChangeList
+from django.contrib.admin.widgets import AutocompleteSelect
+from django.core.paginator import Paginator
+from django.db.models import Max, Min, Sum
+from django.db.models.functions import Coalesce
+from django.template.response import TemplateResponse
+from django.utils import timezone
+from django.utils.functional import cached_property
+
+from .bulk import schedule_operation
+from .counters import total_posts
+from .models import (AuthorCounter, BulkOperation, Group, Post, PostQuerySet,
+                     User)
+from .search import matching_posts
+
+# Больше строк отфильтрованного списка не считаем: страницы дальше
+# доступны только через уточнение фильтров или поиска.
+COUNT_LIMIT = 10000
+
+
+def _next_period(start, kind):
+    if kind == 'year':
+        return date(start.year + 1, 1, 1)
+    if kind == 'month':
+        return date(start.year + start.month // 12, start.month % 12 + 1, 1)
+    return start + timedelta(days=1)
+
+
+def _period_start(day, kind):
+    if kind == 'year':
+        return date(day.year, 1, 1)
+    if kind == 'month':
+        return date(day.year, day.month, 1)
+    return day
+
+
+def _as_date(value):
+    return timezone.localdate(value) if settings.USE_TZ else value.date()
+
+
+def _as_datetime(day):
+    value = datetime.combine(day, datetime.min.time())
+    return timezone.make_aware(value) if settings.USE_TZ else value
+
+
+class ChangeListQuerySet(PostQuerySet):
+    """Посты списка в админке с `dates()` по индексу даты.
+
+    Стандартный `dates()` для `date_hierarchy` делает DISTINCT по
+    всей таблице. Здесь начало каждого следующего непустого периода
+    ищется через MIN по диапазону дат, то есть одним переходом по
+    индексу `post_pub_date_idx` на период.
+    """
+
+    def dates(self, field_name, kind, order='ASC'):
+        if kind not in ('year', 'month', 'day'):
+            return super().dates(field_name, kind, order)
+        result = []
+        queryset = self
+        while True:
+            first = queryset.aggregate(first=Min(field_name))['first']
+            if first is None:
+                break
+            result.append(_period_start(_as_date(first), kind))
+            queryset = self.filter(**{
+                f'{field_name}__gte':
+                    _as_datetime(_next_period(result[-1], kind)),
+            })
+        return result if order == 'ASC' else result[::-1]
+
+
+class PostChangeList(ChangeList):
+    """Список постов, у которого `dates()` ищет периоды по индексу."""
+
+    def get_queryset(self, request):
+        queryset = super().get_queryset(request)
+        return ChangeListQuerySet(
+            model=queryset.model, query=queryset.query, using=queryset.db)
+
+
+class CountFreePaginator(Paginator):
+    """Пагинатор списка постов без COUNT(*) по всей таблице.
+
+    Без фильтров число постов берется из счетчиков авторов, а
+    отфильтрованный список считается не дальше `COUNT_LIMIT` строк.
+    Если строк больше, `capped` становится True, и шаблоны списка
+    показывают число как «10000+».
+    """
+
+    capped = False
+
+    @cached_property
+    def count(self):
+        if not self.object_list.query.where:
+            return total_posts()
+        count = self.object_list.order_by()[:COUNT_LIMIT + 1].count()
+        self.capped = count > COUNT_LIMIT
+        return min(count, COUNT_LIMIT)
+
+
+class ListGroupSelect(AutocompleteSelect):
+    """Автокомплит группы, который берет выбранную группу из поста.
+
+    Стандартный виджет читает выбранную группу запросом на каждую
+    строку списка, а у постов списка она уже загружена через
+    `list_select_related`.
+    """
+
+    known = ()
+
+    def optgroups(self, name, value, attr=None):
+        known = {str(group.pk): group for group in self.known}
+        selected = {
+            str(pk) for pk in value
+            if str(pk) not in self.choices.field.empty_values
+        }
+        if not selected <= known.keys():
+            return super().optgroups(name, value, attr)
+        options = []
+        if not self.is_required:
+            options.append(self.create_option(name, '', '', False, 0))
+        for pk in selected:
+            options.append(self.create_option(
+                name, known[pk].pk,
+                self.choices.field.label_from_instance(known[pk]),
+                selected, len(options)))
+        return [(None, options, 0)]
+
+
+class PostListForm(forms.ModelForm):
+    """Форма строки списка: выбранная группа не читается заново."""
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        widget = self.fields['group'].widget
+        # Админка оборачивает виджет ссылками на добавление и правку.
+        widget = getattr(widget, 'widget', widget)
+        if Post.group.is_cached(self.instance) and self.instance.group:
+            widget.known = [self.instance.group]
+
+
+class GroupForm(forms.Form):
+    group = forms.ModelChoiceField(Group.objects.all(), label='Группа')
+
+
+class DateRangeForm(forms.Form):
+    start = forms.DateTimeField(label='С')
+    end = forms.DateTimeField(label='По')
+
+    def clean(self):
+        data = super().clean()
+        if data.get('start') and data.get('end') and (
+                data['start'] > data['end']):
+            raise forms.ValidationError('Начало периода позже конца.')
+        return data
 
 
 class PostAdmin(admin.ModelAdmin):
@@ -11,16 +169,199 @@ class PostAdmin(admin.ModelAdmin):
         'author',
         'group',
     )
+    list_select_related = ('author', 'group')
     list_editable = ('group',)
     search_fields = ('text',)
     list_filter = ('pub_date',)
+    date_hierarchy = 'pub_date'
+    raw_id_fields = ('author',)
+    autocomplete_fields = ('group',)
+    paginator = CountFreePaginator
+    show_full_result_count = False
     empty_value_display = '-пусто-'
+    actions = (
+        'delete_selected_posts',
+        'move_to_group',
+        'clear_group',
+        'delete_by_author',
+        'delete_by_date_range',
+    )
+
+    def get_actions(self, request):
+        # Стандартное удаление загружает посты и все связи в память.
+        actions = super().get_actions(request)
+        actions.pop('delete_selected', None)
+        return actions
+
+    def get_changelist(self, request, **kwargs):
+        return PostChangeList
+
+    def get_changelist_form(self, request, **kwargs):
+        return super().get_changelist_form(
+            request, form=PostListForm, **kwargs)
+
+    def formfield_for_foreignkey(self, db_field, request, **kwargs):
+        if db_field.name == 'group':
+            kwargs['widget'] = ListGroupSelect(
+                db_field.remote_field, self.admin_site,
+                using=kwargs.get('using'))
+        return super().formfield_for_foreignkey(db_field, request, **kwargs)
+
+    def get_search_results(self, request, queryset, search_term):
+        """Ищет по поисковому индексу вместо LIKE по `search_fields`."""
+        if not search_term:
+            return queryset, False
+        return matching_posts(queryset, search_term), False
+
+    def confirm_action(self, request, action, title, description,
+                       form=None, **context):
+        """Страница подтверждения действия; повторно отправляет выбор."""
+        return TemplateResponse(
+            request, 'admin/posts/post/bulk_action.html', {
+                **self.admin_site.each_context(request),
+                'opts': self.model._meta,
+                'title': title,
+                'description': description,
+                'form': form,
+                'action': action,
+                'action_checkbox_name': helpers.ACTION_CHECKBOX_NAME,
+                'selected': request.POST.getlist(
+                    helpers.ACTION_CHECKBOX_NAME),
+                'select_across': request.POST.get('select_across') == '1',
+                **context,
+            })
+
+    def run_bulk(self, request, action, description, posts_total,
+                 **params):
+        """Ставит операцию в очередь задач: в запросе посты не меняются.
+        """
+        schedule_operation(
+            action, description, posts_total,
+            requested_by=request.user.get_username(), **params)
+        self.message_user(
+            request,
+            f'{description}: запущено в фоне, постов: {posts_total}. '
+            f'Ход выполнения - в разделе «Массовые операции с постами».',
+            messages.SUCCESS)
+
+    def run_on_selected(self, request, queryset, action, description,
+                        **params):
+        # Выбор фиксируется списком id: к началу операции фильтры
+        # списка могут давать уже другие посты.
+        post_ids = list(queryset.order_by('pk').values_list('pk', flat=True))
+        self.run_bulk(request, action, description, len(post_ids),
+                      post_ids=post_ids, **params)
+
+    def delete_selected_posts(self, request, queryset):
+        if not request.POST.get('apply'):
+            return self.confirm_action(
+                request, 'delete_selected_posts', 'Удаление постов',
+                'Выбранные посты будут удалены.')
+        self.run_on_selected(request, queryset, BulkOperation.DELETE,
+                             'Удаление выбранных постов')
+
+    delete_selected_posts.short_description = 'Удалить выбранные посты'
+    delete_selected_posts.allowed_permissions = ('delete',)
+
+    def move_to_group(self, request, queryset):
+        form = GroupForm(request.POST if request.POST.get('apply') else None)
+        if not form.is_valid():
+            return self.confirm_action(
+                request, 'move_to_group', 'Перенос постов в группу',
+                'Выбранные посты будут перенесены в группу.', form)
+        group = form.cleaned_data['group']
+        self.run_on_selected(
+            request, queryset.exclude(group=group), BulkOperation.MOVE,
+            f'Перенос постов в группу {group.slug}', group_id=group.pk)
+
+    move_to_group.short_description = 'Перенести в группу'
+    move_to_group.allowed_permissions = ('change',)
+
+    def clear_group(self, request, queryset):
+        self.run_on_selected(
+            request, queryset.exclude(group=None), BulkOperation.MOVE,
+            'Удаление постов из групп', group_id=None)
+
+    clear_group.short_description = 'Убрать из группы'
+    clear_group.allowed_permissions = ('change',)
+
+    def delete_by_author(self, request, queryset):
+        author_ids = queryset.order_by().values_list(
+            'author_id', flat=True).distinct()
+        if not request.POST.get('apply'):
+            return self.confirm_action(
+                request, 'delete_by_author', 'Удаление постов авторов',
+                'Будут удалены все посты этих авторов, а не только '
+                'выбранные:',
+                authors=User.objects.filter(
+                    pk__in=author_ids).select_related('counter'))
+        author_ids = list(author_ids)
+        posts_total = AuthorCounter.objects.filter(
+            author_id__in=author_ids).aggregate(
+                total=Coalesce(Sum('posts_count'), 0))['total']
+        self.run_bulk(request, BulkOperation.DELETE,
+                      'Удаление всех постов авторов', posts_total,
+                      author_ids=author_ids)
+
+    delete_by_author.short_description = 'Удалить все посты авторов'
+    delete_by_author.allowed_permissions = ('delete',)
+
+    def delete_by_date_range(self, request, queryset):
+        if request.POST.get('apply'):
+            form = DateRangeForm(request.POST)
+        else:
+            form = DateRangeForm(initial=queryset.aggregate(
+                start=Min('pub_date'), end=Max('pub_date')))
+        if not form.is_valid():
+            return self.confirm_action(
+                request, 'delete_by_date_range', 'Удаление постов за период',
+                'Будут удалены все посты, опубликованные за период, '
+                'включая границы.', form)
+        start, end = form.cleaned_data['start'], form.cleaned_data['end']
+        self.run_bulk(
+            request, BulkOperation.DELETE,
+            f'Удаление постов с {start:%d.%m.%Y %H:%M} '
+            f'по {end:%d.%m.%Y %H:%M}',
+            Post.objects.filter(
+                pub_date__gte=start, pub_date__lte=end).count(),
+            start=start.isoformat(), end=end.isoformat())
+
+    delete_by_date_range.short_description = 'Удалить все посты за период'
+    delete_by_date_range.allowed_permissions = ('delete',)
+
+
+class BulkOperationAdmin(admin.ModelAdmin):
+    list_display = (
+        'description',
+        'requested_by',
+        'requested_at',
+        'progress',
+        'finished_at',
+    )
+    readonly_fields = list_display
+    fields = list_display
+
+    def progress(self, obj):
+        return f'{obj.posts_done} / {obj.posts_total}'
+
+    progress.short_description = 'Обработано постов'
+
+    def has_add_permission(self, request):
+        return False
+
+    def has_change_permission(self, request, obj=None):
+        return False
+
+    def has_delete_permission(self, request, obj=None):
+        return False
 
 
 class GroupAdmin(admin.ModelAdmin):
-    list_display = ('pk', 'title', 'slug')
+    list_display = ('pk', 'title', 'slug', 'posts_count')
+    search_fields = ('title', 'slug')
     prepopulated_fields = {'slug': ('title',)}
 
 
 admin.site.register(Post, PostAdmin)
 admin.site.register(Group, GroupAdmin)
+admin.site.register(BulkOperation, BulkOperationAdmin)
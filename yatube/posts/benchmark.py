@@ -0,0 +1,126 @@
+import random
+import statistics
+import time
+from itertools import cycle, islice
+
+from django.db import connection
+from django.db.models import Max, Min
+from django.test import Client
+from django.test.utils import CaptureQueriesContext
+from faker import Faker
+from mixer.backend.django import mixer
+
+from .models import Group, Post, User
+
+BATCH_SIZE = 5000
+TEXT_POOL_SIZE = 1000
+
+
+def seed(posts_total, users=100, groups=20):
+    """Доводит число постов до `posts_total`, дописывая недостающие."""
+    fake = Faker('ru_RU')
+    authors = list(User.objects.values_list('pk', flat=True))
+    if len(authors) < users:
+        mixer.cycle(users - len(authors)).blend(
+            User, username=mixer.sequence('bench_user_{0}'))
+        authors = list(User.objects.values_list('pk', flat=True))
+    group_ids = list(Group.objects.values_list('pk', flat=True))
+    if len(group_ids) < groups:
+        mixer.cycle(groups - len(group_ids)).blend(
+            Group, slug=mixer.sequence('bench-group-{0}'))
+        group_ids = list(Group.objects.values_list('pk', flat=True))
+
+    texts = cycle(fake.paragraph() for _ in range(TEXT_POOL_SIZE))
+    missing = posts_total - Post.objects.count()
+    while missing > 0:
+        batch = min(missing, BATCH_SIZE)
+        Post.objects.bulk_create(
+            Post(
+                text=text,
+                author_id=random.choice(authors),
+                group_id=random.choice(group_ids + [None]),
+            )
+            for text in islice(texts, batch)
+        )
+        missing -= batch
+
+
+def percentile(values, share):
+    ordered = sorted(values)
+    index = min(len(ordered) - 1, int(round(share * (len(ordered) - 1))))
+    return ordered[index]
+
+
+def measure(client, request, repeat):
+    """Выполняет `request(client)` `repeat` раз и собирает статистику.
+
+    `request` возвращает ответ тестового клиента; время и число SQL
+    запросов считаются для каждого вызова отдельно.
+    """
+    timings, queries = [], []
+    for _ in range(repeat):
+        with CaptureQueriesContext(connection) as captured:
+            started = time.perf_counter()
+            response = request(client)
+            timings.append(time.perf_counter() - started)
+        queries.append(len(captured.captured_queries))
+        if response.status_code >= 400:
+            raise RuntimeError(
+                f'Ответ {response.status_code} при замере.')
+    total = sum(timings)
+    return {
+        'requests': repeat,
+        'rps': repeat / total if total else None,
+        'p50_ms': percentile(timings, 0.5) * 1000,
+        'p99_ms': percentile(timings, 0.99) * 1000,
+        'queries': statistics.median(queries),
+        'max_queries': max(queries),
+    }
+
+
+def hot_paths(author):
+    """Сценарии запросов: имя -> функция, выполняющая один запрос."""
+    bounds = Post.objects.aggregate(low=Min('pk'), high=Max('pk'))
+    sample = random.sample(
+        range(bounds['low'], bounds['high'] + 1),
+        min(100, bounds['high'] - bounds['low'] + 1))
+    post_ids = list(
+        Post.objects.filter(pk__in=sample).values_list('pk', flat=True))
+    group_slugs = list(Group.objects.values_list('slug', flat=True))
+    usernames = list(User.objects.values_list('username', flat=True)[:100])
+    own_post = Post.objects.filter(author=author).order_by('-pk').first()
+    if own_post is None:
+        own_post = Post.objects.create(author=author, text='Пост для правки')
+
+    def random_post_detail(client):
+        return client.get(f'/posts/{random.choice(post_ids)}/')
+
+    return {
+        'index': lambda client: client.get('/'),
+        'group_posts': lambda client: client.get(
+            f'/group/{random.choice(group_slugs)}/'),
+        'profile': lambda client: client.get(
+            f'/profile/{random.choice(usernames)}/'),
+        'post_detail': random_post_detail,
+        'post_create': lambda client: client.post(
+            '/create/', {'text': 'Пост из замера'}),
+        'post_edit': lambda client: client.post(
+            f'/posts/{own_post.pk}/edit/', {'text': 'Правка из замера'}),
+    }
+
+
+def run(sizes, repeat, anonymous=False):
+    """Заполняет базу до каждого размера из `sizes` и замеряет сценарии."""
+    results = []
+    for size in sorted(sizes):
+        seed(size)
+        author = User.objects.order_by('pk').first()
+        client = Client()
+        if not anonymous:
+            client.force_login(author)
+        for view, request in hot_paths(author).items():
+            if anonymous and view in ('post_create', 'post_edit'):
+                continue
+            stats = measure(client, request, repeat)
+            results.append({'size': size, 'view': view, **stats})
+    return results
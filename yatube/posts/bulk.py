@@ -0,0 +1,201 @@
+import json
+import logging
+from collections import Counter
+
+from django.core.exceptions import ImproperlyConfigured
+from django.db import connections, router, transaction
+from django.utils import timezone
+from django.utils.dateparse import parse_datetime
+
+from core.tasks import task
+
+from .cache import bump_versions, post_scopes
+from .counters import change_group_count, count_posts
+from .models import BulkOperation, Post, SearchTerm, TimelineEntry
+from .search import get_backend
+
+logger = logging.getLogger(__name__)
+
+# SQLite ограничивает число параметров запроса 999.
+CHUNK_SIZE = 500
+
+# Модели со ссылками на посты, строки которых delete_posts удаляет сам:
+# посты удаляются одним DELETE, мимо коллектора Django.
+CLEANED_MODELS = (TimelineEntry, SearchTerm)
+
+# Параметры операции со списками id и условия выбора постов по ним.
+SELECTIONS = {
+    'post_ids': 'pk__in',
+    'author_ids': 'author_id__in',
+}
+
+
+def _chunks(posts):
+    """Строки (pk, author_id, group_id) пачками по возрастанию pk.
+
+    Следующая пачка читается после обработки предыдущей, поэтому
+    обработанные строки могут выпадать из `posts`.
+    """
+    rows = posts.order_by('pk').values_list(
+        'pk', 'author_id', 'group_id', named=True)
+    last_pk = 0
+    while True:
+        chunk = list(rows.filter(pk__gt=last_pk)[:CHUNK_SIZE])
+        if not chunk:
+            return
+        yield chunk
+        last_pk = chunk[-1].pk
+
+
+def _scopes(rows):
+    return {
+        scope
+        for row in rows
+        for scope in post_scopes(row.pk, row.author_id, row.group_id)
+    }
+
+
+def move_posts(posts, group_id, on_chunk=None):
+    """Переносит посты в группу `group_id` (None - убирает из группы).
+
+    Каждая пачка - один UPDATE и сдвиг счетчиков групп в одной
+    транзакции. После пачки вызывается `on_chunk(done)`. Возвращает
+    число перенесенных постов.
+    """
+    if group_id is None:
+        posts = posts.exclude(group=None)
+    else:
+        posts = posts.exclude(group_id=group_id)
+    done = 0
+    for rows in _chunks(posts):
+        with transaction.atomic():
+            Post.objects.filter(pk__in=[row.pk for row in rows]).update(
+                group_id=group_id)
+            for old_group_id, number in Counter(
+                    row.group_id for row in rows).items():
+                change_group_count(old_group_id, -number)
+            change_group_count(group_id, len(rows))
+        bump_versions(
+            _scopes(rows)
+            | _scopes(row._replace(group_id=group_id) for row in rows))
+        done += len(rows)
+        if on_chunk is not None:
+            on_chunk(done)
+    return done
+
+
+def _check_relations():
+    """Ошибка, если на посты ссылается модель не из CLEANED_MODELS."""
+    unknown = sorted(
+        rel.related_model._meta.label
+        for rel in Post._meta.get_fields(include_hidden=True)
+        if rel.auto_created and not rel.concrete
+        and rel.related_model not in CLEANED_MODELS
+    )
+    if unknown:
+        raise ImproperlyConfigured(
+            f'delete_posts не удаляет ссылки на посты из {", ".join(unknown)}'
+            '; добавьте их в CLEANED_MODELS.')
+
+
+def _delete_rows(pks):
+    connection = connections[router.db_for_write(Post)]
+    quote = connection.ops.quote_name
+    with connection.cursor() as cursor:
+        cursor.execute(
+            'DELETE FROM {} WHERE {} IN ({})'.format(
+                quote(Post._meta.db_table), quote(Post._meta.pk.column),
+                ', '.join(['%s'] * len(pks))),
+            pks)
+
+
+def delete_posts(posts, on_chunk=None):
+    """Удаляет посты пачками без загрузки объектов в память.
+
+    Строки лент подписок и поискового индекса удаляются вместе с
+    постами, счетчики авторов и групп уменьшаются в той же транзакции.
+    После пачки вызывается `on_chunk(done)`. Возвращает число удаленных
+    постов.
+    """
+    _check_relations()
+    done = 0
+    for rows in _chunks(posts):
+        pks = [row.pk for row in rows]
+        with transaction.atomic():
+            # Ссылки на посты (ленты подписок posts_timelineentry и
+            # поисковый индекс posts_searchterm) удаляются отдельными
+            # DELETE, затем сами посты: обычный delete() поднял бы
+            # каждый пост ради сигналов и коллектора.
+            TimelineEntry.objects.filter(post_id__in=pks).delete()
+            SearchTerm.objects.filter(post_id__in=pks).delete()
+            get_backend().remove(pks)
+            _delete_rows(pks)
+            count_posts(rows, -1)
+        bump_versions(_scopes(rows))
+        done += len(rows)
+        if on_chunk is not None:
+            on_chunk(done)
+    return done
+
+
+def _selected_posts(params):
+    """Запросы постов операции; списки id режутся по CHUNK_SIZE."""
+    if 'start' in params:
+        yield Post.objects.filter(
+            pub_date__gte=parse_datetime(params['start']),
+            pub_date__lte=parse_datetime(params['end']))
+        return
+    for key, lookup in SELECTIONS.items():
+        ids = params.get(key, ())
+        for start in range(0, len(ids), CHUNK_SIZE):
+            yield Post.objects.filter(
+                **{lookup: ids[start:start + CHUNK_SIZE]})
+
+
+def schedule_operation(action, description, posts_total, requested_by='',
+                       **params):
+    """Записывает операцию и ставит ее выполнение в очередь задач.
+
+    Посты выбираются списком `post_ids`, списком авторов `author_ids`
+    или периодом `start`/`end` (ISO 8601); переносу нужен `group_id`.
+    """
+    if action == BulkOperation.DELETE:
+        _check_relations()
+    with transaction.atomic():
+        operation = BulkOperation.objects.create(
+            action=action,
+            description=description,
+            params=json.dumps(params),
+            requested_by=requested_by,
+            posts_total=posts_total,
+        )
+        run_operation.delay(operation.pk)
+    return operation
+
+
+@task(lease=60 * 60)
+def run_operation(operation_id):
+    """Выполняет массовую операцию пачками и пишет ее ход.
+
+    Можно вызывать повторно после сбоя: удаленные и уже перенесенные
+    посты выпадают из выбора, и операция продолжается с того же места.
+    """
+    operation = BulkOperation.objects.filter(
+        pk=operation_id, finished_at=None).first()
+    if operation is None:
+        return
+    params = json.loads(operation.params)
+    done = operation.posts_done
+
+    def progress(number):
+        BulkOperation.objects.filter(pk=operation.pk).update(
+            posts_done=done + number)
+
+    for posts in _selected_posts(params):
+        if operation.action == BulkOperation.MOVE:
+            done += move_posts(posts, params['group_id'], progress)
+        else:
+            done += delete_posts(posts, progress)
+    BulkOperation.objects.filter(pk=operation.pk).update(
+        posts_done=done, finished_at=timezone.now())
+    logger.info('%s: обработано постов: %d', operation.description, done)
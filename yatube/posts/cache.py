@@ -0,0 +1,154 @@
+import time
+from datetime import datetime, timezone
+from hashlib import md5
+
+from django.core.cache import cache
+from django.dispatch import Signal
+from django.http import HttpResponse
+from django.template.loader import render_to_string
+from django.views.decorators.http import condition
+
+FEED_PAGE_TIMEOUT = 60 * 10
+VERSION_PREFIX = 'posts:version'
+FEED_PAGE_PREFIX = 'posts:page'
+
+FEED = ('feed', 0)
+
+# Метка на месте шапки в кешируемых страницах; base.html выводит ее,
+# если в контексте есть `header_hole`.
+HEADER_HOLE = '<!--header-->'
+
+# Отправляется после смены версий; аргумент `scopes` - области кеша.
+versions_bumped = Signal(providing_args=['scopes'])
+
+
+def version_key(scope, pk):
+    return f'{VERSION_PREFIX}:{scope}:{pk}'
+
+
+def get_versions(scopes):
+    """Возвращает текущие версии областей кеша одним запросом к кешу.
+
+    Версия, вытесненная из кеша, заменяется новой, а не нулем: иначе
+    после вытеснения снова подошли бы старые фрагменты.
+    """
+    keys = {version_key(*scope): scope for scope in scopes}
+    versions = cache.get_many(keys)
+    missing = {key: time.time_ns() for key in keys if key not in versions}
+    if missing:
+        cache.set_many(missing, None)
+        versions.update(missing)
+    return {scope: versions[key] for key, scope in keys.items()}
+
+
+def bump_versions(scopes):
+    """Делает устаревшими все записи кеша, зависящие от `scopes`.
+
+    Версии хранятся в кеше default: с кешем в памяти процесса сброс
+    видит только текущий процесс (см. CACHES в настройках).
+    """
+    version = time.time_ns()
+    cache.set_many(
+        {version_key(*scope): version for scope in scopes}, None)
+    versions_bumped.send(sender=None, scopes=scopes)
+
+
+def post_scopes(post_id, author_id, group_id):
+    """Области кеша, которые затрагивает изменение поста."""
+    scopes = [FEED, ('post', post_id), ('author', author_id)]
+    if group_id is not None:
+        scopes.append(('group', group_id))
+    return scopes
+
+
+def attach_card_versions(posts):
+    """Проставляет `card_version` постам страницы для ключа фрагмента."""
+    scopes = set()
+    for post in posts:
+        scopes.update(post_scopes(post.pk, post.author_id, post.group_id))
+    versions = get_versions(scopes)
+    for post in posts:
+        post.card_version = '.'.join(
+            str(versions[scope])
+            for scope in post_scopes(post.pk, post.author_id, post.group_id)
+            if scope != FEED
+        )
+
+
+def feed_page_key(request, scopes, anonymous_only=False):
+    """Ключ страницы ленты или None, если страницу кешировать нельзя.
+
+    Кешируются GET-запросы: шапка пользователя в кеш не попадает
+    (см. `fill_header`), поэтому страница общая для всех. Страницы
+    с другими личными частями передают `anonymous_only`.
+    """
+    if request.method != 'GET' or (
+            anonymous_only and request.user.is_authenticated):
+        return None
+    versions = get_versions(scopes)
+    version = '.'.join(str(versions[scope]) for scope in scopes)
+    return f'{FEED_PAGE_PREFIX}:{request.get_full_path()}:{version}'
+
+
+def fill_header(content, request):
+    """Вставляет шапку текущего пользователя на место `HEADER_HOLE`."""
+    header = render_to_string('includes/header.html', request=request)
+    return content.replace(HEADER_HOLE.encode(), header.encode(), 1)
+
+
+def cached_feed_page(page_key, request):
+    """Готовая страница ленты из кеша или None."""
+    if page_key is None:
+        return None
+    content = cache.get(page_key)
+    if content is None:
+        return None
+    return HttpResponse(fill_header(content, request))
+
+
+def cache_feed_page(page_key, response, request):
+    """Сохраняет страницу ленты с меткой вместо шапки и возвращает ответ
+    с шапкой пользователя."""
+    if page_key is not None and response.status_code == 200:
+        cache.set(page_key, response.content, FEED_PAGE_TIMEOUT)
+    response.content = fill_header(response.content, request)
+    return response
+
+
+def conditional_page(scopes_func):
+    """Условный GET по версиям областей кеша, от которых зависит страница.
+
+    `scopes_func` получает аргументы view и возвращает список областей
+    или None, если объекта нет (тогда view сам ответит 404). ETag
+    учитывает пользователя: у авторизованных другая шапка и своя область
+    ('user', pk), например для кнопки подписки. Last-Modified
+    отдается только анонимам, поскольку время изменения у них общее.
+    """
+
+    def page_versions(request, *args, **kwargs):
+        if not hasattr(request, '_page_versions'):
+            scopes = scopes_func(*args, **kwargs)
+            if scopes is not None and request.user.is_authenticated:
+                scopes = [*scopes, ('user', request.user.pk)]
+            request._page_versions = (
+                None if scopes is None else get_versions(scopes))
+        return request._page_versions
+
+    def etag(request, *args, **kwargs):
+        versions = page_versions(request, *args, **kwargs)
+        if versions is None:
+            return None
+        marker = '|'.join(
+            [request.get_full_path(), str(request.user.pk)]
+            + [f'{scope}={versions[scope]}' for scope in sorted(versions)]
+        )
+        return md5(marker.encode()).hexdigest()
+
+    def last_modified(request, *args, **kwargs):
+        versions = page_versions(request, *args, **kwargs)
+        if versions is None or request.user.is_authenticated:
+            return None
+        return datetime.fromtimestamp(
+            max(versions.values()) / 10 ** 9, tz=timezone.utc)
+
+    return condition(etag_func=etag, last_modified_func=last_modified)
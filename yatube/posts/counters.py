@@ -0,0 +1,122 @@
+from collections import Counter
+
+from django.conf import settings
+from django.db.models import (Count, F, IntegerField, OuterRef, Subquery,
+                              Sum)
+from django.db.models.functions import Coalesce
+
+from .models import AuthorCounter, Follow, Group, Post, User
+
+
+def change_author_count(author_id, delta):
+    """Сдвигает счетчик постов автора одним UPDATE."""
+    updated = AuthorCounter.objects.filter(author_id=author_id).update(
+        posts_count=F('posts_count') + delta)
+    if not updated and delta > 0:
+        # Строки еще нет (например, пользователь старше счетчиков).
+        AuthorCounter.objects.update_or_create(
+            author_id=author_id,
+            defaults={
+                'posts_count': Post.objects.filter(author_id=author_id).count()
+            },
+        )
+
+
+def author_counter(author):
+    """Счетчики автора; недостающая строка создается по таблице постов."""
+    try:
+        return author.counter
+    except AuthorCounter.DoesNotExist:
+        counter, _ = AuthorCounter.objects.get_or_create(
+            author=author,
+            defaults={
+                'posts_count': Post.objects.filter(author=author).count()
+            },
+        )
+        author.counter = counter
+        return counter
+
+
+def total_posts():
+    """Число всех постов по счетчикам авторов, без COUNT(*) по постам."""
+    return AuthorCounter.objects.aggregate(
+        total=Coalesce(Sum('posts_count'), 0))['total']
+
+
+def change_followers_count(author_id, delta):
+    """Сдвигает счетчик подписчиков автора одним UPDATE.
+
+    Автор, у которого подписчиков стало больше порога, навсегда
+    переводится на сборку ленты при чтении: посты, написанные после
+    этого, в ленты подписчиков уже не раскладываются.
+    """
+    counters = AuthorCounter.objects.filter(author_id=author_id)
+    updated = counters.update(followers_count=F('followers_count') + delta)
+    if not updated and delta > 0:
+        AuthorCounter.objects.update_or_create(
+            author_id=author_id,
+            defaults={
+                'posts_count':
+                    Post.objects.filter(author_id=author_id).count(),
+                'followers_count':
+                    Follow.objects.filter(author_id=author_id).count(),
+            },
+        )
+    if delta > 0:
+        counters.filter(
+            followers_count__gt=settings.TIMELINE_FANOUT_LIMIT,
+            fan_out_on_read=False,
+        ).update(fan_out_on_read=True)
+
+
+def change_group_count(group_id, delta):
+    """Сдвигает счетчик постов группы одним UPDATE."""
+    if group_id is not None:
+        Group.objects.filter(pk=group_id).update(
+            posts_count=F('posts_count') + delta)
+
+
+def count_posts(posts, delta):
+    """Применяет `delta` к счетчикам авторов и групп переданных постов."""
+    authors = Counter(post.author_id for post in posts)
+    groups = Counter(post.group_id for post in posts)
+    for author_id, number in authors.items():
+        change_author_count(author_id, number * delta)
+    for group_id, number in groups.items():
+        change_group_count(group_id, number * delta)
+
+
+def move_post(post, old_author_id, old_group_id):
+    """Переносит пост между счетчиками после смены автора или группы."""
+    if old_author_id != post.author_id:
+        change_author_count(old_author_id, -1)
+        change_author_count(post.author_id, 1)
+    if old_group_id != post.group_id:
+        change_group_count(old_group_id, -1)
+        change_group_count(post.group_id, 1)
+
+
+def _count_subquery(field, model=Post):
+    posts = (
+        model.objects.filter(**{field: OuterRef('pk')})
+        .order_by()
+        .values(field)
+        .annotate(total=Count('pk'))
+        .values('total')
+    )
+    return Coalesce(Subquery(posts, output_field=IntegerField()), 0)
+
+
+def rebuild_counters():
+    """Пересчитывает все счетчики с нуля по таблице постов."""
+    missing = User.objects.filter(counter__isnull=True).values_list(
+        'pk', flat=True)
+    AuthorCounter.objects.bulk_create(
+        [AuthorCounter(author_id=pk) for pk in missing],
+        ignore_conflicts=True,
+    )
+    AuthorCounter.objects.update(
+        posts_count=_count_subquery('author'),
+        followers_count=_count_subquery('author', Follow),
+    )
+    Group.objects.update(posts_count=_count_subquery('group'))
@@ -0,0 +1,72 @@
+import json
+import os
+import platform
+import tempfile
+
+import django
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection
+from django.utils import timezone
+
+from posts.benchmark import run
+
+DEFAULT_SIZES = (1000, 100000, 1000000)
+
+
+class Command(BaseCommand):
+    help = (
+        'Замеряет запросы/с, p50/p99 и число SQL-запросов для лент, '
+        'страницы поста, создания и правки на базах разного размера. '
+        'Работает на отдельной временной базе и выводит JSON.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--sizes', type=int, nargs='+', default=DEFAULT_SIZES,
+            help='Число постов в базе для каждого прогона.')
+        parser.add_argument(
+            '--requests', type=int, default=100,
+            help='Сколько запросов делать к каждой странице.')
+        parser.add_argument(
+            '--anonymous', action='store_true',
+            help='Замерять от имени гостя (со всеми его кешами).')
+        parser.add_argument(
+            '--db-file',
+            help='Новый файл временной базы SQLite (по умолчанию во '
+                 'временной папке); после замера он удаляется.')
+        parser.add_argument(
+            '--output', help='Файл для JSON вместо stdout.')
+
+    def handle(self, *args, **options):
+        # Временная база пересоздается и удаляется: чужой файл не трогаем.
+        if options['db_file'] and os.path.exists(options['db_file']):
+            raise CommandError(
+                f'Файл {options["db_file"]} уже существует; укажите путь '
+                'к новому файлу.')
+        with tempfile.TemporaryDirectory() as directory:
+            if connection.vendor == 'sqlite':
+                connection.settings_dict['TEST']['NAME'] = (
+                    options['db_file']
+                    or os.path.join(directory, 'benchmark.sqlite3'))
+            old_name = connection.creation.create_test_db(
+                verbosity=0, autoclobber=True, serialize=False)
+            try:
+                results = run(
+                    options['sizes'], options['requests'],
+                    options['anonymous'])
+            finally:
+                connection.creation.destroy_test_db(old_name, verbosity=0)
+
+        report = json.dumps({
+            'created': timezone.now().isoformat(),
+            'python': platform.python_version(),
+            'django': django.get_version(),
+            'database': connection.vendor,
+            'anonymous': options['anonymous'],
+            'results': results,
+        }, ensure_ascii=False, indent=2)
+        if options['output']:
+            with open(options['output'], 'w') as output:
+                output.write(report)
+        else:
+            self.stdout.write(report)
@@ -0,0 +1,75 @@
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection
+from django.utils import timezone
+
+from posts.models import Post
+from posts.paginators import BACKWARD, FORWARD, CursorPaginator, encode_cursor
+
+TEMP_SORT = 'USE TEMP B-TREE'
+
+
+class Command(BaseCommand):
+    help = (
+        'Проверяет планы запросов лент: ни одна не должна сортировать '
+        'строки во временном B-дереве.'
+    )
+
+    def feed_querysets(self):
+        """Запросы страниц ленты в том виде, в каком их строят view."""
+        cursor_post = Post(pk=1, pub_date=timezone.now())
+        feeds = {
+            'index': Post.objects.for_feed(),
+            'group_posts': Post.objects.filter(group_id=1).for_feed(),
+            'profile': Post.objects.filter(author_id=1).for_feed(),
+        }
+        for view, posts in feeds.items():
+            paginator = CursorPaginator(posts, 10, count=100)
+            pages = {
+                'first': None,
+                'next': encode_cursor(FORWARD, cursor_post),
+                'previous': encode_cursor(BACKWARD, cursor_post),
+            }
+            for page, cursor in pages.items():
+                yield f'{view} {page}', self.capture(
+                    paginator.get_cursor_page, cursor)
+            yield f'{view} ?page=N', self.capture(paginator.page, 2)
+
+    def capture(self, get_page, argument):
+        """Возвращает SQL первого запроса страницы к таблице постов."""
+        queries = []
+
+        def execute(execute, sql, params, many, context):
+            queries.append((sql, params))
+            return execute(sql, params, many, context)
+
+        # Новое соединение выполняет свои PRAGMA (core.db.tune_sqlite),
+        # они не должны попасть в перехваченные запросы.
+        connection.ensure_connection()
+        with connection.execute_wrapper(execute):
+            get_page(argument)
+        table = connection.ops.quote_name(Post._meta.db_table)
+        return next(
+            (sql, params) for sql, params in queries
+            if sql.startswith('SELECT') and f'FROM {table}' in sql)
+
+    def handle(self, *args, **options):
+        if connection.vendor != 'sqlite':
+            raise CommandError(
+                'EXPLAIN QUERY PLAN поддерживается только для SQLite.')
+
+        failed = []
+        for name, (sql, params) in self.feed_querysets():
+            with connection.cursor() as cursor:
+                cursor.execute(f'EXPLAIN QUERY PLAN {sql}', params)
+                plan = [row[-1] for row in cursor.fetchall()]
+            ok = not any(TEMP_SORT in step for step in plan)
+            if not ok:
+                failed.append(name)
+            status = self.style.SUCCESS('OK') if ok else self.style.ERROR(
+                'SORT')
+            self.stdout.write(f'{status} {name}: {"; ".join(plan)}')
+
+        if failed:
+            raise CommandError(
+                'Запросы сортируют во временном B-дереве: '
+                + ', '.join(failed))
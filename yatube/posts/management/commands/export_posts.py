@@ -0,0 +1,34 @@
+from django.core.management.base import BaseCommand
+
+from posts.transfer import (FIELDS, FORMATS, export_records, guess_format,
+                            write_records)
+
+
+class Command(BaseCommand):
+    help = (
+        'Выгружает посты, группы или пользователей в JSONL или CSV '
+        'потоком, не загружая таблицу в память.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            'path', nargs='?', default='-',
+            help='Файл для выгрузки; "-" или пусто - stdout.')
+        parser.add_argument(
+            '--model', choices=tuple(FIELDS), default='posts',
+            help='Что выгружать.')
+        parser.add_argument(
+            '--format', choices=FORMATS,
+            help='Формат файла (по умолчанию по расширению, иначе JSONL).')
+
+    def handle(self, *args, **options):
+        path = options['path']
+        fmt = options['format'] or guess_format(path)
+        records = export_records(options['model'])
+        if path == '-':
+            write_records(options['model'], records, self.stdout, fmt)
+            return
+        with open(path, 'w', encoding='utf-8', newline='') as stream:
+            written = write_records(options['model'], records, stream, fmt)
+        self.stdout.write(self.style.SUCCESS(
+            f'Выгружено записей: {written}.'))
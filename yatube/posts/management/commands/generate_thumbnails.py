@@ -0,0 +1,19 @@
+from django.core.management.base import BaseCommand
+
+from posts.thumbnails import generate_missing
+
+
+class Command(BaseCommand):
+    help = (
+        'Создает недостающие миниатюры картинок постов, например после '
+        'перезапуска, потерявшего очередь пула, или смены VARIANTS.'
+    )
+
+    def handle(self, *args, **options):
+        def on_batch(created):
+            if options['verbosity'] > 1:
+                self.stdout.write(f'Обработано картинок: {created}')
+
+        created = generate_missing(on_batch)
+        self.stdout.write(self.style.SUCCESS(
+            f'Миниатюры созданы для картинок: {created}.'))
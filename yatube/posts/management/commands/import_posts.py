@@ -0,0 +1,55 @@
+import os
+
+from django.core.management.base import BaseCommand, CommandError
+
+from posts.transfer import (FIELDS, FORMATS, TransferError, guess_format,
+                            import_records, read_records)
+
+
+class Command(BaseCommand):
+    help = (
+        'Загружает посты, группы или пользователей из JSONL или CSV '
+        'пачками. Авторы и группы постов должны уже '
+        'быть в базе. С --resume продолжает прерванный импорт.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('path', help='Файл с записями.')
+        parser.add_argument(
+            '--model', choices=tuple(FIELDS), default='posts',
+            help='Что загружать.')
+        parser.add_argument(
+            '--format', choices=FORMATS,
+            help='Формат файла (по умолчанию по расширению, иначе JSONL).')
+        parser.add_argument(
+            '--resume', action='store_true',
+            help='Пропустить записи, уже загруженные прошлым запуском.')
+
+    def handle(self, *args, **options):
+        path = options['path']
+        fmt = options['format'] or guess_format(path)
+        # Число загруженных записей сохраняется после каждой пачки.
+        checkpoint = f'{path}.progress'
+        skip = 0
+        if options['resume'] and os.path.exists(checkpoint):
+            with open(checkpoint) as stream:
+                skip = int(stream.read() or 0)
+
+        def on_chunk(done):
+            with open(checkpoint, 'w') as stream:
+                stream.write(str(done))
+            if options['verbosity'] > 0:
+                self.stdout.write(f'Загружено записей: {done}')
+
+        with open(path, encoding='utf-8', newline='') as stream:
+            try:
+                done = import_records(
+                    options['model'], read_records(stream, fmt),
+                    skip=skip, on_chunk=on_chunk)
+            except TransferError as error:
+                raise CommandError(
+                    f'{error} Загрузку можно продолжить с --resume.')
+        if os.path.exists(checkpoint):
+            os.remove(checkpoint)
+        self.stdout.write(self.style.SUCCESS(
+            f'Импорт завершен, записей: {done}.'))
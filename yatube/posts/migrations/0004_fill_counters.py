@@ -0,0 +1,34 @@
+from django.conf import settings
+from django.db import migrations
+from django.db.models import Count
+
+
+def fill_counters(apps, schema_editor):
+    User = apps.get_model(settings.AUTH_USER_MODEL)
+    Group = apps.get_model('posts', 'Group')
+    Post = apps.get_model('posts', 'Post')
+    AuthorCounter = apps.get_model('posts', 'AuthorCounter')
+
+    authors = dict(
+        Post.objects.order_by().values_list('author').annotate(Count('pk')))
+    AuthorCounter.objects.bulk_create(
+        AuthorCounter(author_id=pk, posts_count=authors.get(pk, 0))
+        for pk in User.objects.values_list('pk', flat=True)
+    )
+    groups = (
+        Post.objects.order_by().exclude(group=None)
+        .values_list('group').annotate(Count('pk'))
+    )
+    for group_id, posts_count in groups:
+        Group.objects.filter(pk=group_id).update(posts_count=posts_count)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('posts', '0003_counters'),
+    ]
+
+    operations = [
+        migrations.RunPython(fill_counters, migrations.RunPython.noop),
+    ]
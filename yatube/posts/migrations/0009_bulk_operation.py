@@ -0,0 +1,32 @@
+# Generated by Django 2.2.16 on 2026-10-17 05:16
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('posts', '0008_post_image'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='BulkOperation',
+            fields=[
+                ('id', models.AutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('action', models.CharField(choices=[('delete', 'Удаление'), ('move', 'Перенос в группу')], max_length=16, verbose_name='Операция')),
+                ('description', models.CharField(max_length=200, verbose_name='Описание')),
+                ('params', models.TextField(verbose_name='Параметры')),
+                ('requested_by', models.CharField(max_length=150, verbose_name='Кто запустил')),
+                ('requested_at', models.DateTimeField(auto_now_add=True, verbose_name='Запрошено')),
+                ('finished_at', models.DateTimeField(blank=True, null=True, verbose_name='Завершено')),
+                ('posts_total', models.PositiveIntegerField(default=0, verbose_name='Постов')),
+                ('posts_done', models.PositiveIntegerField(default=0, verbose_name='Обработано постов')),
+            ],
+            options={
+                'verbose_name': 'Массовая операция с постами',
+                'verbose_name_plural': 'Массовые операции с постами',
+                'ordering': ('-requested_at',),
+            },
+        ),
+    ]
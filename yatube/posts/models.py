@@ -1,5 +1,8 @@
 from django.contrib.auth import get_user_model
-from django.db import models
+from django.core.management.color import no_style
+from django.db import connections, models, transaction
+
+from core.reverse import cached_reverse
 
 User = get_user_model()
 
@@ -13,6 +16,10 @@ class Group(models.Model):
         verbose_name='Тег')
     description = models.TextField(
         verbose_name='Описание')
+    posts_count = models.PositiveIntegerField(
+        default=0,
+        editable=False,
+        verbose_name='Число постов')
 
     class Meta:
         verbose_name = 'Группа'
@@ -21,6 +28,130 @@ class Group(models.Model):
     def __str__(self):
         return self.title
 
+    def get_absolute_url(self):
+        return cached_reverse('posts:group_list', self.slug)
+
+
+class AuthorCounter(models.Model):
+    """Счетчики автора, которые поддерживаются при записи постов."""
+
+    author = models.OneToOneField(
+        User,
+        on_delete=models.CASCADE,
+        primary_key=True,
+        related_name='counter')
+    posts_count = models.PositiveIntegerField(
+        default=0,
+        verbose_name='Число постов')
+    followers_count = models.PositiveIntegerField(
+        default=0,
+        verbose_name='Число подписчиков')
+    fan_out_on_read = models.BooleanField(
+        default=False,
+        verbose_name='Лента подписчиков собирается при чтении')
+
+    class Meta:
+        verbose_name = 'Счетчик автора'
+        verbose_name_plural = 'Счетчики авторов'
+
+    def __str__(self):
+        return f'{self.author_id}: {self.posts_count}'
+
+
+class PostQuerySet(models.QuerySet):
+
+    def for_feed(self):
+        """Посты для лент: автор и группа одним запросом, без лишних полей."""
+        return self.select_related('author', 'group').only(
+            'text',
+            'pub_date',
+            'image',
+            'author__username',
+            'group__slug',
+        )
+
+    def bulk_create(self, objs, *args, keep_pub_date=False, **kwargs):
+        """Массовая вставка без сигналов, поэтому счетчики, версии кеша,
+        поисковый индекс и ленты подписок правим здесь.
+
+        С `keep_pub_date` строки получают pub_date самих объектов (для
+        импорта), а не текущее время от auto_now_add.
+        """
+        from .cache import bump_versions, post_scopes
+        from .counters import count_posts
+        from .search import get_backend
+        from .timeline import fan_out
+
+        objs = list(objs)
+        self._for_write = True
+        explicit = [post for post in objs if post.pk]
+        known_ids = len(explicit) == len(objs) or (
+            not keep_pub_date
+            and connections[self.db].features.can_return_ids_from_bulk_insert)
+        if not known_ids:
+            last_pk = self.model.objects.aggregate(
+                last=models.Max('pk'))['last'] or 0
+        if keep_pub_date:
+            self._insert_as_is(objs)
+        else:
+            objs = super().bulk_create(objs, *args, **kwargs)
+        count_posts(objs, 1)
+        if known_ids:
+            added = objs
+        else:
+            # База не вернула id вставленных строк: дочитываем их. Посты
+            # с заданным id берем как есть, они могут быть и ниже last_pk.
+            explicit_ids = {post.pk for post in explicit}
+            added = explicit + [
+                post for post in self.model.objects.filter(
+                    pk__gt=last_pk).only('text', 'author', 'pub_date')
+                if post.pk not in explicit_ids
+            ]
+        get_backend().index(added)
+        fan_out(added)
+        bump_versions({
+            scope
+            for post in objs
+            for scope in post_scopes(post.pk, post.author_id, post.group_id)
+        })
+        return objs
+
+    def _insert_as_is(self, objs):
+        """INSERT строк со значениями полей объектов как есть.
+
+        Общее поле модели не меняется (auto_now_add не выключается):
+        в том же процессе посты могут создаваться параллельно. Запросов
+        два: для постов с id и без id. После явных id последовательность
+        первичного ключа сдвигается, как после loaddata.
+        """
+        connection = connections[self.db]
+        quote = connection.ops.quote_name
+        for with_pk in (True, False):
+            rows = [post for post in objs if (post.pk is not None) == with_pk]
+            if not rows:
+                continue
+            fields = [
+                field for field in self.model._meta.concrete_fields
+                if with_pk or not field.primary_key
+            ]
+            sql = 'INSERT INTO {} ({}) VALUES ({})'.format(
+                quote(self.model._meta.db_table),
+                ', '.join(quote(field.column) for field in fields),
+                ', '.join(['%s'] * len(fields)),
+            )
+            with connection.cursor() as cursor:
+                cursor.executemany(sql, [
+                    # add=False: auto_now_add не заменяет дату объекта.
+                    [field.get_db_prep_save(field.pre_save(post, False),
+                                            connection)
+                     for field in fields]
+                    for post in rows
+                ])
+                if with_pk:
+                    for sql in connection.ops.sequence_reset_sql(
+                            no_style(), [self.model]):
+                        cursor.execute(sql)
+
 
 class Post(models.Model):
     text = models.TextField(
@@ -37,11 +168,161 @@ class Post(models.Model):
         blank=True,
         null=True,
         related_name='posts')
+    image = models.ImageField(
+        'Картинка',
+        upload_to='posts/',
+        blank=True)
+
+    objects = PostQuerySet.as_manager()
 
     class Meta:
         ordering = ('-pub_date',)
+        indexes = (
+            models.Index(
+                fields=('pub_date', 'id'),
+                name='post_pub_date_idx'),
+            models.Index(
+                fields=('author', 'pub_date', 'id'),
+                name='post_author_pub_date_idx'),
+            models.Index(
+                fields=('group', 'pub_date', 'id'),
+                name='post_group_pub_date_idx'),
+        )
         verbose_name = 'Пост'
         verbose_name_plural = 'Посты'
 
     def __str__(self):
         return self.text[:15]
+
+    def get_absolute_url(self):
+        return cached_reverse('posts:post_detail', self.pk)
+
+    def get_edit_url(self):
+        return cached_reverse('posts:post_edit', self.pk)
+
+    @classmethod
+    def from_db(cls, db, field_names, values):
+        post = super().from_db(db, field_names, values)
+        post.remember_loaded_state()
+        return post
+
+    def remember_loaded_state(self):
+        """Запоминает автора, группу и картинку, чтобы после save()
+        перенести счетчики и создать новые миниатюры."""
+        self._loaded_author_id = self.__dict__.get('author_id')
+        self._loaded_group_id = self.__dict__.get('group_id')
+        image = self.__dict__.get('image')
+        self._loaded_image = getattr(image, 'name', image)
+
+    def save(self, *args, **kwargs):
+        with transaction.atomic():
+            super().save(*args, **kwargs)
+
+
+class SearchTerm(models.Model):
+    """Строка обратного индекса поиска: слово и пост, где оно встречается.
+
+    Используется, если база не поддерживает SQLite FTS5.
+    """
+
+    term = models.CharField(max_length=64)
+    post = models.ForeignKey(
+        Post,
+        on_delete=models.CASCADE,
+        related_name='search_terms')
+    count = models.PositiveIntegerField(default=1)
+
+    class Meta:
+        unique_together = ('term', 'post')
+        verbose_name = 'Слово поиска'
+        verbose_name_plural = 'Слова поиска'
+
+    def __str__(self):
+        return self.term
+
+
+class Follow(models.Model):
+    user = models.ForeignKey(
+        User,
+        on_delete=models.CASCADE,
+        related_name='follower')
+    author = models.ForeignKey(
+        User,
+        on_delete=models.CASCADE,
+        related_name='following')
+
+    class Meta:
+        unique_together = ('user', 'author')
+        constraints = (
+            models.CheckConstraint(
+                check=~models.Q(user=models.F('author')),
+                name='follow_not_self'),
+        )
+        verbose_name = 'Подписка'
+        verbose_name_plural = 'Подписки'
+
+    def __str__(self):
+        return f'{self.user_id} -> {self.author_id}'
+
+
+class TimelineEntry(models.Model):
+    """Пост в заранее собранной ленте подписок пользователя.
+
+    `pub_date` повторяет дату поста, чтобы лента читалась по индексу
+    (user, pub_date, post) без обращения к таблице постов.
+    """
+
+    user = models.ForeignKey(
+        User,
+        on_delete=models.CASCADE,
+        related_name='timeline')
+    post = models.ForeignKey(
+        Post,
+        on_delete=models.CASCADE,
+        related_name='+')
+    pub_date = models.DateTimeField()
+
+    class Meta:
+        unique_together = ('user', 'post')
+        indexes = (
+            models.Index(
+                fields=('user', 'pub_date', 'post'),
+                name='timeline_user_pub_date_idx'),
+        )
+        verbose_name = 'Запись ленты подписок'
+        verbose_name_plural = 'Записи ленты подписок'
+
+    def __str__(self):
+        return f'{self.user_id}: {self.post_id}'
+
+
+class BulkOperation(models.Model):
+    """Массовая операция с постами из админки и ход ее выполнения.
+
+    Выполняется в обработчике очереди задач (posts.bulk.run_operation);
+    `params` - JSON с выбором постов и аргументами операции.
+    """
+
+    DELETE = 'delete'
+    MOVE = 'move'
+    ACTIONS = (
+        (DELETE, 'Удаление'),
+        (MOVE, 'Перенос в группу'),
+    )
+
+    action = models.CharField('Операция', max_length=16, choices=ACTIONS)
+    description = models.CharField('Описание', max_length=200)
+    params = models.TextField('Параметры')
+    requested_by = models.CharField('Кто запустил', max_length=150)
+    requested_at = models.DateTimeField('Запрошено', auto_now_add=True)
+    finished_at = models.DateTimeField('Завершено', null=True, blank=True)
+    posts_total = models.PositiveIntegerField('Постов', default=0)
+    posts_done = models.PositiveIntegerField('Обработано постов', default=0)
+
+    class Meta:
+        ordering = ('-requested_at',)
+        verbose_name = 'Массовая операция с постами'
+        verbose_name_plural = 'Массовые операции с постами'
+
+    def __str__(self):
+        return self.description
@@ -0,0 +1,179 @@
+from django.core.paginator import Page, Paginator
+from django.db.models import Q
+from django.utils.dateparse import parse_datetime
+from django.utils.encoding import force_bytes
+from django.utils.functional import cached_property
+from django.utils.http import urlsafe_base64_decode, urlsafe_base64_encode
+
+FORWARD = 'n'
+BACKWARD = 'p'
+ELLIPSIS = '…'
+
+
+def encode_position(direction, pub_date, pk):
+    """Упаковывает позицию (pub_date, id) в непрозрачный токен для
+    `?cursor=`."""
+    raw = f'{direction}|{pub_date.isoformat()}|{pk}'
+    return urlsafe_base64_encode(force_bytes(raw))
+
+
+def encode_cursor(direction, post):
+    """Курсор для позиции поста."""
+    return encode_position(direction, post.pub_date, post.pk)
+
+
+def decode_cursor(cursor):
+    """Распаковывает токен в (направление, pub_date, id) или None."""
+    try:
+        raw = urlsafe_base64_decode(cursor).decode()
+        direction, pub_date, pk = raw.split('|')
+        pub_date, pk = parse_datetime(pub_date), int(pk)
+    except (TypeError, ValueError):
+        return None
+    if direction not in (FORWARD, BACKWARD) or pub_date is None:
+        return None
+    return direction, pub_date, pk
+
+
+def seek(queryset, direction, pub_date, pk, id_field='id'):
+    """Записи строго после позиции (pub_date, pk) в направлении чтения.
+
+    Условие записано как `pub_date <= d AND (pub_date < d OR id < pk)`,
+    чтобы база начинала чтение индекса сразу с позиции курсора.
+    """
+    if direction == FORWARD:
+        return queryset.filter(pub_date__lte=pub_date).filter(
+            Q(pub_date__lt=pub_date) | Q(**{f'{id_field}__lt': pk})
+        ).order_by('-pub_date', f'-{id_field}')
+    return queryset.filter(pub_date__gte=pub_date).filter(
+        Q(pub_date__gt=pub_date) | Q(**{f'{id_field}__gt': pk})
+    ).order_by('pub_date', id_field)
+
+
+class CursorPage(Page):
+    """Страница, знающая курсоры соседних страниц.
+
+    В режиме курсора номер страницы неизвестен (`number` равен None),
+    а наличие соседей определяется по лишней выбранной строке,
+    без подсчета всех записей.
+    """
+
+    def __init__(self, object_list, number, paginator,
+                 has_next=None, has_previous=None):
+        super().__init__(object_list, number, paginator)
+        self._has_next = has_next
+        self._has_previous = has_previous
+
+    def has_next(self):
+        if self._has_next is None:
+            return super().has_next()
+        return self._has_next
+
+    def has_previous(self):
+        if self._has_previous is None:
+            return super().has_previous()
+        return self._has_previous
+
+    @property
+    def page_range(self):
+        """Окно номеров страниц вокруг текущей для навигации."""
+        if self.number is None:
+            return []
+        return list(self.paginator.get_elided_page_range(self.number))
+
+    def position(self, row):
+        """Позиция (pub_date, id) записи страницы для курсора."""
+        return row.pub_date, row.pk
+
+    @property
+    def next_cursor(self):
+        if not self.object_list:
+            return None
+        return encode_position(FORWARD, *self.position(self.object_list[-1]))
+
+    @property
+    def previous_cursor(self):
+        if not self.object_list:
+            return None
+        return encode_position(BACKWARD, *self.position(self.object_list[0]))
+
+
+class CursorPaginator(Paginator):
+    """Пагинатор по ключу (pub_date, id) вместо LIMIT/OFFSET.
+
+    `get_cursor_page` выбирает одну страницу запросом по индексу
+    независимо от глубины. Унаследованные `page`/`get_page` оставлены
+    для старых ссылок вида `?page=N`; им можно передать готовое
+    число записей `count` из счетчиков, чтобы не считать их заново.
+    `count` может быть функцией: она вызывается, только если число
+    записей понадобилось.
+    """
+
+    ELLIPSIS = ELLIPSIS
+    ordering = ('-pub_date', '-id')
+
+    def __init__(self, object_list, per_page, count=None, **kwargs):
+        object_list = object_list.order_by(*self.ordering)
+        super().__init__(object_list, per_page, **kwargs)
+        self._count = count
+
+    @cached_property
+    def count(self):
+        if self._count is None:
+            return super().count
+        return self._count() if callable(self._count) else self._count
+
+    page_class = CursorPage
+
+    def _get_page(self, object_list, number, paginator, **kwargs):
+        return self.page_class(list(object_list), number, paginator, **kwargs)
+
+    def get_cursor_page(self, cursor=None):
+        """Возвращает страницу после (или до) позиции из курсора."""
+        position = decode_cursor(cursor) if cursor else None
+        if position is None:
+            return self._slice_page(self.object_list, has_previous=False)
+
+        posts = seek(self.object_list, *position)
+        if position[0] == FORWARD:
+            return self._slice_page(posts, has_previous=True)
+
+        rows = list(posts[:self.per_page + 1])
+        if len(rows) <= self.per_page:
+            # Дошли до начала ленты: показываем полную первую страницу.
+            return self.get_cursor_page()
+        return self._get_page(
+            rows[:self.per_page][::-1], None, self,
+            has_next=True, has_previous=True)
+
+    def get_elided_page_range(self, number, on_each_side=2, on_ends=1):
+        """Номера страниц: края, `on_each_side` соседей и многоточия.
+
+        Длина результата не зависит от числа страниц, в отличие от
+        `page_range`, который перечисляет их все.
+        """
+        number = self.validate_number(number)
+        num_pages = self.num_pages
+        if num_pages <= (on_each_side + on_ends) * 2 + 1:
+            yield from self.page_range
+            return
+
+        if number > 1 + on_each_side + on_ends + 1:
+            yield from range(1, on_ends + 1)
+            yield ELLIPSIS
+            yield from range(number - on_each_side, number + 1)
+        else:
+            yield from range(1, number + 1)
+
+        if number < num_pages - on_each_side - on_ends - 1:
+            yield from range(number + 1, number + on_each_side + 1)
+            yield ELLIPSIS
+            yield from range(num_pages - on_ends + 1, num_pages + 1)
+        else:
+            yield from range(number + 1, num_pages + 1)
+
+    def _slice_page(self, posts, has_previous):
+        rows = list(posts[:self.per_page + 1])
+        return self._get_page(
+            rows[:self.per_page], None, self,
+            has_next=len(rows) > self.per_page, has_previous=has_previous)
@@ -0,0 +1,239 @@
+import re
+from collections import Counter
+
+from django.core.paginator import Page
+from django.db import connection
+from django.db.models import Count, Max, Q, Sum
+from django.db.models.expressions import RawSQL
+from django.utils.encoding import force_bytes
+from django.utils.http import urlsafe_base64_decode, urlsafe_base64_encode
+
+from .models import Post, SearchTerm
+
+FTS_TABLE = 'posts_post_fts'
+MAX_QUERY_TERMS = 10
+TERM_LENGTH = SearchTerm._meta.get_field('term').max_length
+INDEX_CHUNK = 2000
+WORD_RE = re.compile(r'\w+')
+
+
+def tokenize(text):
+    return [word[:TERM_LENGTH] for word in WORD_RE.findall(text.casefold())]
+
+
+def query_terms(query):
+    """Уникальные слова запроса; пост должен содержать их все."""
+    return list(dict.fromkeys(tokenize(query)))[:MAX_QUERY_TERMS]
+
+
+class RowIds(RawSQL):
+    """Подзапрос для `pk__in` из сырого SQL.
+
+    RawSQL сам берет SQL в скобки, а `__in` добавляет свои, и SQLite
+    читает `IN ((SELECT ...))` как скалярный подзапрос: из него берется
+    только первая строка.
+    """
+
+    def as_sql(self, compiler, connection):
+        return self.sql, self.params
+
+
+class FTS5Backend:
+    """Индекс в виртуальной таблице SQLite FTS5, ранжирование по bm25.
+
+    Меньший `score` означает лучшее совпадение.
+    """
+
+    def index(self, posts):
+        rows = [(post.pk, post.text) for post in posts]
+        with connection.cursor() as cursor:
+            cursor.executemany(
+                f'DELETE FROM {FTS_TABLE} WHERE rowid = %s',
+                [(pk,) for pk, _ in rows])
+            cursor.executemany(
+                f'INSERT INTO {FTS_TABLE} (rowid, text) VALUES (%s, %s)',
+                rows)
+
+    def remove(self, post_ids):
+        with connection.cursor() as cursor:
+            cursor.executemany(
+                f'DELETE FROM {FTS_TABLE} WHERE rowid = %s',
+                [(pk,) for pk in post_ids])
+
+    def index_missing(self):
+        """Добавляет посты новее последнего проиндексированного."""
+        with connection.cursor() as cursor:
+            cursor.execute(
+                f'INSERT INTO {FTS_TABLE} (rowid, text) '
+                f'SELECT id, text FROM posts_post WHERE id > '
+                f'(SELECT COALESCE(MAX(rowid), 0) FROM {FTS_TABLE})')
+
+    def rebuild(self):
+        with connection.cursor() as cursor:
+            cursor.execute(f'DELETE FROM {FTS_TABLE}')
+            cursor.execute(
+                f'INSERT INTO {FTS_TABLE} (rowid, text) '
+                f'SELECT id, text FROM posts_post')
+
+    def match_expression(self, terms):
+        return ' '.join('"{}"'.format(term.replace('"', '""'))
+                        for term in terms)
+
+    def matching(self, terms):
+        return RowIds(
+            f'SELECT rowid FROM {FTS_TABLE} WHERE {FTS_TABLE} MATCH %s',
+            (self.match_expression(terms),))
+
+    def ranked(self, terms, after, limit):
+        rank = f'bm25({FTS_TABLE})'
+        sql = (
+            f'SELECT rowid, {rank} FROM {FTS_TABLE} '
+            f'WHERE {FTS_TABLE} MATCH %s'
+        )
+        params = [self.match_expression(terms)]
+        if after is not None:
+            sql += f' AND ({rank} > %s OR ({rank} = %s AND rowid < %s))'
+            params += [after[0], after[0], after[1]]
+        sql += f' ORDER BY {rank}, rowid DESC LIMIT %s'
+        params.append(limit)
+        with connection.cursor() as cursor:
+            cursor.execute(sql, params)
+            return cursor.fetchall()
+
+
+class TableBackend:
+    """Обратный индекс в таблице SearchTerm для баз без FTS5.
+
+    `score` - сумма вхождений слов запроса со знаком минус, чтобы
+    порядок совпадал с FTS5.
+    """
+
+    def index(self, posts):
+        posts = list(posts)
+        SearchTerm.objects.filter(
+            post_id__in=[post.pk for post in posts]).delete()
+        SearchTerm.objects.bulk_create(
+            SearchTerm(term=term, post_id=post.pk, count=count)
+            for post in posts
+            for term, count in Counter(tokenize(post.text)).items()
+        )
+
+    def remove(self, post_ids):
+        SearchTerm.objects.filter(post_id__in=post_ids).delete()
+
+    def index_posts(self, posts):
+        posts = posts.only('text').order_by('pk')
+        last_pk = 0
+        while True:
+            chunk = list(posts.filter(pk__gt=last_pk)[:INDEX_CHUNK])
+            if not chunk:
+                return
+            self.index(chunk)
+            last_pk = chunk[-1].pk
+
+    def index_missing(self):
+        last_pk = SearchTerm.objects.aggregate(last=Max('post_id'))['last']
+        self.index_posts(Post.objects.filter(pk__gt=last_pk or 0))
+
+    def rebuild(self):
+        SearchTerm.objects.all().delete()
+        self.index_posts(Post.objects.all())
+
+    def matches(self, terms):
+        return (
+            SearchTerm.objects.filter(term__in=terms)
+            .values('post_id')
+            .annotate(matched=Count('term'), score=-Sum('count'))
+            .filter(matched=len(terms))
+        )
+
+    def matching(self, terms):
+        return self.matches(terms).values('post_id')
+
+    def ranked(self, terms, after, limit):
+        rows = self.matches(terms)
+        if after is not None:
+            score, pk = after
+            rows = rows.filter(
+                Q(score__gt=score) | Q(score=score, post_id__lt=pk))
+        rows = rows.order_by('score', '-post_id').values_list(
+            'post_id', 'score')
+        return list(rows[:limit])
+
+
+_fts_available = {}
+
+
+def get_backend():
+    """FTS5, если таблица индекса есть в текущей базе, иначе SearchTerm."""
+    name = connection.settings_dict['NAME']
+    if name not in _fts_available:
+        _fts_available[name] = (
+            connection.vendor == 'sqlite'
+            and FTS_TABLE in connection.introspection.table_names()
+        )
+    return FTS5Backend() if _fts_available[name] else TableBackend()
+
+
+def matching_posts(queryset, query):
+    """Посты `queryset`, содержащие все слова `query`, без LIKE."""
+    terms = query_terms(query)
+    if not terms:
+        return queryset.none()
+    return queryset.filter(pk__in=get_backend().matching(terms))
+
+
+def encode_search_cursor(score, pk):
+    return urlsafe_base64_encode(force_bytes(f'{score!r}|{pk}'))
+
+
+def decode_search_cursor(cursor):
+    try:
+        score, pk = urlsafe_base64_decode(cursor).decode().split('|')
+        return float(score), int(pk)
+    except (TypeError, ValueError):
+        return None
+
+
+class SearchPage(Page):
+    """Страница результатов поиска; листается только вперед по курсору."""
+
+    def __init__(self, object_list, last_row, has_next, has_previous):
+        super().__init__(object_list, None, None)
+        self.last_row = last_row
+        self._has_next = has_next
+        self._has_previous = has_previous
+
+    def has_next(self):
+        return self._has_next
+
+    def has_previous(self):
+        return self._has_previous
+
+    @property
+    def next_cursor(self):
+        if self.last_row is None:
+            return None
+        pk, score = self.last_row
+        return encode_search_cursor(score, pk)
+
+    previous_cursor = None
+
+
+def search_page(query, cursor, per_page):
+    """Страница постов по запросу в порядке релевантности."""
+    terms = query_terms(query)
+    after = decode_search_cursor(cursor) if cursor else None
+    if not terms:
+        return SearchPage([], None, has_next=False, has_previous=False)
+
+    rows = get_backend().ranked(terms, after, per_page + 1)
+    has_next = len(rows) > per_page
+    rows = rows[:per_page]
+    posts = Post.objects.for_feed().in_bulk([pk for pk, _ in rows])
+    return SearchPage(
+        [posts[pk] for pk, _ in rows if pk in posts],
+        rows[-1] if rows else None,
+        has_next=has_next,
+        has_previous=after is not None,
+    )
@@ -0,0 +1,105 @@
+from django.db.models.signals import post_delete, post_save, pre_delete
+from django.dispatch import receiver
+
+from .cache import FEED, bump_versions, post_scopes
+from .counters import change_followers_count, count_posts, move_post
+from .models import AuthorCounter, Follow, Group, Post, User
+from .search import get_backend
+from .thumbnails import schedule
+from .timeline import add_author, fan_out_post, reassign_post, remove_author
+
+
+@receiver(post_save, sender=User)
+def create_author_counter(sender, instance, created, **kwargs):
+    if created:
+        AuthorCounter.objects.get_or_create(author=instance)
+
+
+@receiver(post_save, sender=User)
+def expire_author_cache(sender, instance, created, update_fields=None,
+                        **kwargs):
+    # Вход пользователя обновляет только last_login: ленты не меняются.
+    if created or update_fields == frozenset(('last_login',)):
+        return
+    bump_versions([FEED, ('author', instance.pk)])
+
+
+@receiver(post_save, sender=Post)
+def post_saved(sender, instance, created, raw=False, **kwargs):
+    old_author_id = getattr(
+        instance, '_loaded_author_id', instance.author_id)
+    old_group_id = getattr(instance, '_loaded_group_id', instance.group_id)
+    if created and not raw:
+        count_posts([instance], 1)
+        # Подписчиков может быть до TIMELINE_FANOUT_LIMIT: раскладка
+        # по лентам идет в очереди, а не в запросе автора.
+        fan_out_post.delay(instance.pk)
+    elif not raw:
+        move_post(instance, old_author_id, old_group_id)
+        if old_author_id != instance.author_id:
+            reassign_post(instance)
+    bump_versions(set(
+        post_scopes(instance.pk, instance.author_id, instance.group_id)
+        + post_scopes(instance.pk, old_author_id, old_group_id)
+    ))
+    deferred = instance.get_deferred_fields()
+    if 'text' not in deferred:
+        get_backend().index([instance])
+    loaded_image = getattr(instance, '_loaded_image', None)
+    if ('image' not in deferred and instance.image
+            and instance.image.name != loaded_image):
+        schedule(instance)
+    instance.remember_loaded_state()
+
+
+@receiver(post_delete, sender=Post)
+def post_deleted(sender, instance, **kwargs):
+    count_posts([instance], -1)
+    get_backend().remove([instance.pk])
+    bump_versions(
+        post_scopes(instance.pk, instance.author_id, instance.group_id))
+
+
+def group_scopes(group_id):
+    """Области кеша, которые затрагивает изменение группы.
+
+    Кроме лент, это профили авторов ее постов: карточки в профиле
+    ссылаются на группу, а ключ страницы профиля зависит только от
+    автора.
+    """
+    authors = Post.objects.filter(group_id=group_id).order_by().values_list(
+        'author_id', flat=True).distinct()
+    return [FEED, ('group', group_id)] + [
+        ('author', author_id) for author_id in authors]
+
+
+@receiver(post_save, sender=Group)
+def expire_group_cache(sender, instance, **kwargs):
+    bump_versions(group_scopes(instance.pk))
+
+
+@receiver(pre_delete, sender=Group)
+def remember_group_scopes(sender, instance, **kwargs):
+    # После удаления у постов группы уже пустое поле group.
+    instance._cache_scopes = group_scopes(instance.pk)
+
+
+@receiver(post_delete, sender=Group)
+def expire_deleted_group_cache(sender, instance, **kwargs):
+    bump_versions(getattr(
+        instance, '_cache_scopes', [FEED, ('group', instance.pk)]))
+
+
+@receiver(post_save, sender=Follow)
+def follow_saved(sender, instance, created, raw=False, **kwargs):
+    if created and not raw:
+        change_followers_count(instance.author_id, 1)
+        add_author(instance.user_id, instance.author_id)
+    bump_versions([('user', instance.user_id)])
+
+
+@receiver(post_delete, sender=Follow)
+def follow_deleted(sender, instance, **kwargs):
+    change_followers_count(instance.author_id, -1)
+    remove_author(instance.user_id, instance.author_id)
+    bump_versions([('user', instance.user_id)])
@@ -0,0 +1,82 @@
+from django import template
+from django.core.cache import InvalidCacheBackendError, caches
+from django.core.cache.utils import make_template_fragment_key
+from django.template.base import token_kwargs
+
+register = template.Library()
+
+CARD_TEMPLATE = 'includes/post.html'
+CARD_TIMEOUT = 86400
+
+
+def fragment_cache():
+    # Тот же кеш, что выбирает {% cache %}.
+    try:
+        return caches['template_fragments']
+    except InvalidCacheBackendError:
+        return caches['default']
+
+
+def fragment_key(post, values):
+    return make_template_fragment_key('post_card', [
+        post.pk,
+        getattr(post, 'card_version', ''),
+        values.get('view_group_link', False),
+        values.get('secret_author_link', False),
+    ])
+
+
+class PostCardNode(template.Node):
+    """Карточка поста `post` из контекста в цикле по `posts`.
+
+    На первой карточке фрагменты всех постов страницы читаются из кеша
+    одним get_many. Недостающие карточки отрисовываются прямо в текущем
+    контексте и кладутся в кеш; шаблон карточки ищется при первом
+    промахе один раз за страницу.
+    """
+
+    def __init__(self, posts, extra_context):
+        self.posts = posts
+        self.extra_context = extra_context
+
+    def render(self, context):
+        values = {
+            name: value.resolve(context)
+            for name, value in self.extra_context.items()
+        }
+        state = context.render_context.get(self)
+        if state is None:
+            keys = [
+                fragment_key(post, values)
+                for post in self.posts.resolve(context)
+            ]
+            state = {'fragments': fragment_cache().get_many(keys)}
+            context.render_context[self] = state
+        key = fragment_key(context['post'], values)
+        content = state['fragments'].get(key)
+        if content is None:
+            if 'card' not in state:
+                state['card'] = context.template.engine.get_template(
+                    CARD_TEMPLATE)
+            with context.push(**values):
+                content = state['card'].nodelist.render(context)
+            fragment_cache().set(key, content, CARD_TIMEOUT)
+        return content
+
+
+@register.tag
+def post_card(parser, token):
+    """{% post_card page_obj view_group_link=True secret_author_link=True %}
+    """
+    bits = token.split_contents()
+    if len(bits) < 2:
+        raise template.TemplateSyntaxError(
+            f'{bits[0]} ожидает список постов, по которому идет цикл.')
+    posts = parser.compile_filter(bits[1])
+    remaining = bits[2:]
+    extra_context = token_kwargs(remaining, parser)
+    if remaining:
+        raise template.TemplateSyntaxError(
+            f'{bits[0]} после списка постов принимает только именованные '
+            'аргументы.')
+    return PostCardNode(posts, extra_context)
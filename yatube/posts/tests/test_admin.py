@@ -0,0 +1,208 @@
+from datetime import datetime
+from http import HTTPStatus
+from unittest.mock import patch
+
+from django.contrib.admin import helpers
+from django.core.exceptions import ImproperlyConfigured
+from django.test import Client, TestCase
+from django.urls import reverse
+from django.utils import timezone
+
+from core.tasks import run_pending
+from posts.admin import ChangeListQuerySet
+from posts.bulk import delete_posts
+from posts.models import (AuthorCounter, BulkOperation, Follow, Group, Post,
+                          TimelineEntry, User)
+from posts.search import matching_posts
+
+from .utils import QueryBudgetMixin
+
+CHANGELIST_URL = reverse('admin:posts_post_changelist')
+
+
+class PostAdminTests(QueryBudgetMixin, TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.admin = User.objects.create_superuser(
+            username='admin', email='admin@example.com', password='pass')
+        cls.group = Group.objects.create(title='Группа', slug='group')
+        cls.post = Post.objects.create(
+            text='Старый пост', author=cls.admin, group=cls.group)
+        Post.objects.filter(pk=cls.post.pk).update(
+            pub_date=timezone.make_aware(datetime(2020, 3, 1)))
+        Post.objects.bulk_create(
+            Post(text=f'Пост {number}', author=cls.admin, group=cls.group)
+            for number in range(20)
+        )
+
+    def setUp(self):
+        self.client = Client()
+        self.client.force_login(self.admin)
+
+    def test_changelist_query_budget(self):
+        """Список постов без COUNT(*) по таблице и запросов на строку."""
+        self.client.get(CHANGELIST_URL)
+        with self.assertMaxQueries(8) as context:
+            response = self.client.get(CHANGELIST_URL)
+        self.assertEqual(response.status_code, HTTPStatus.OK)
+        self.assertEqual(response.context['cl'].result_count, 21)
+        self.assertIsNotNone(response.context['cl'].formset)
+        for query in context.captured_queries:
+            sql = query['sql']
+            self.assertFalse(
+                'COUNT(' in sql and 'FROM "posts_post"' in sql, sql)
+
+    def test_date_hierarchy(self):
+        """Годы и месяцы иерархии дат совпадают с датами постов."""
+        response = self.client.get(CHANGELIST_URL)
+        self.assertContains(response, '2020')
+        queryset = response.context['cl'].queryset
+        self.assertIsInstance(queryset, ChangeListQuerySet)
+        model_admin = response.context['cl'].model_admin
+        self.assertNotIsInstance(
+            model_admin.get_queryset(response.wsgi_request),
+            ChangeListQuerySet)
+        self.assertEqual(
+            list(queryset.dates('pub_date', 'year')),
+            list(Post.objects.dates('pub_date', 'year')))
+        self.assertEqual(
+            list(queryset.filter(pub_date__year=2020).dates(
+                'pub_date', 'month', order='DESC')),
+            list(Post.objects.filter(pub_date__year=2020).dates(
+                'pub_date', 'month', order='DESC')))
+
+    def test_search_and_filtered_count(self):
+        response = self.client.get(CHANGELIST_URL, {'q': 'старый'})
+        self.assertEqual(
+            list(response.context['cl'].result_list), [self.post])
+        self.assertEqual(response.context['cl'].result_count, 1)
+        self.assertFalse(response.context['cl'].paginator.capped)
+
+    @patch('posts.admin.COUNT_LIMIT', 5)
+    def test_capped_count_is_not_shown_as_exact(self):
+        """Число строк сверх COUNT_LIMIT показывается как «5+»."""
+        response = self.client.get(CHANGELIST_URL, {'q': 'пост'})
+        cl = response.context['cl']
+        self.assertTrue(cl.paginator.capped)
+        self.assertEqual(cl.result_count, 5)
+        self.assertContains(response, '5+ результатов')
+        self.assertContains(response, '5+ Посты')
+
+
+class PostAdminActionsTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.admin = User.objects.create_superuser(
+            username='admin', email='admin@example.com', password='pass')
+        cls.spammer = User.objects.create_user(username='spammer')
+        cls.reader = User.objects.create_user(username='reader')
+        Follow.objects.create(user=cls.reader, author=cls.spammer)
+        cls.group = Group.objects.create(title='Группа', slug='group')
+        cls.other_group = Group.objects.create(title='Другая', slug='other')
+        Post.objects.bulk_create(
+            Post(text=f'спам {number}', author=cls.spammer, group=cls.group)
+            for number in range(7)
+        )
+        cls.posts = list(Post.objects.filter(author=cls.spammer))
+        cls.keep = Post.objects.create(text='Хороший пост', author=cls.admin)
+
+    def setUp(self):
+        self.client = Client()
+        self.client.force_login(self.admin)
+
+    def act(self, action, posts, **data):
+        return self.client.post(CHANGELIST_URL, {
+            'action': action,
+            helpers.ACTION_CHECKBOX_NAME: [post.pk for post in posts],
+            **data,
+        })
+
+    def apply(self, action, posts, **data):
+        """Запускает действие и выполняет поставленную им задачу."""
+        response = self.act(action, posts, apply='yes', **data)
+        run_pending()
+        return response
+
+    def counts(self):
+        return (
+            AuthorCounter.objects.get(author=self.spammer).posts_count,
+            Group.objects.get(pk=self.group.pk).posts_count,
+            Group.objects.get(pk=self.other_group.pk).posts_count,
+        )
+
+    def test_move_to_group_asks_for_group(self):
+        response = self.act('move_to_group', self.posts[:2])
+        self.assertTemplateUsed(response, 'admin/posts/post/bulk_action.html')
+        self.assertEqual(self.counts(), (7, 7, 0))
+
+    @patch('posts.bulk.CHUNK_SIZE', 2)
+    def test_move_to_group_and_clear_group(self):
+        response = self.act(
+            'move_to_group', self.posts[:5],
+            apply='yes', group=self.other_group.pk)
+        self.assertRedirects(response, CHANGELIST_URL)
+        self.assertEqual(self.counts(), (7, 7, 0))
+        run_pending()
+        self.assertEqual(self.counts(), (7, 2, 5))
+        self.assertEqual(
+            Post.objects.filter(group=self.other_group).count(), 5)
+
+        self.apply('clear_group', self.posts[4:])
+        self.assertEqual(self.counts(), (7, 0, 4))
+        self.assertEqual(Post.objects.filter(group=None).count(), 4)
+
+    @patch('posts.bulk.CHUNK_SIZE', 2)
+    def test_delete_by_author(self):
+        response = self.act('delete_by_author', self.posts[:1])
+        self.assertContains(response, self.spammer.username)
+        self.assertEqual(Post.objects.count(), 8)
+
+        self.apply('delete_by_author', self.posts[:1])
+        self.assertEqual(list(Post.objects.all()), [self.keep])
+        self.assertEqual(self.counts(), (0, 0, 0))
+        self.assertFalse(TimelineEntry.objects.exists())
+        self.assertFalse(matching_posts(Post.objects.all(), 'спам').exists())
+
+    def test_delete_selected_posts(self):
+        self.apply('delete_selected_posts', self.posts[:3])
+        self.assertEqual(Post.objects.count(), 5)
+        self.assertEqual(self.counts(), (4, 4, 0))
+        self.assertEqual(
+            TimelineEntry.objects.filter(user=self.reader).count(), 4)
+
+    @patch('posts.bulk.CHUNK_SIZE', 2)
+    def test_operation_runs_in_queue_with_progress(self):
+        """Действие ставит задачу, ход виден в разделе операций."""
+        self.act('delete_selected_posts', self.posts[:5], apply='yes')
+        self.assertEqual(Post.objects.count(), 8)
+        operation = BulkOperation.objects.get()
+        self.assertEqual(
+            (operation.posts_total, operation.requested_by), (5, 'admin'))
+
+        run_pending()
+        self.assertEqual(Post.objects.count(), 3)
+        response = self.client.get(
+            reverse('admin:posts_bulkoperation_changelist'))
+        self.assertContains(response, '5 / 5')
+        operation.refresh_from_db()
+        self.assertIsNotNone(operation.finished_at)
+
+    @patch('posts.bulk.CLEANED_MODELS', (TimelineEntry,))
+    def test_delete_refuses_unknown_relations(self):
+        """Посты со ссылками, которые удаление не чистит, не удаляются."""
+
+        with self.assertRaisesMessage(
+                ImproperlyConfigured, 'posts.SearchTerm'):
+            delete_posts(Post.objects.all())
+        self.assertEqual(Post.objects.count(), 8)
+
+    def test_delete_by_date_range(self):
+        old = timezone.make_aware(datetime(2020, 3, 1))
+        Post.objects.filter(pk=self.keep.pk).update(pub_date=old)
+        response = self.act('delete_by_date_range', [self.keep])
+        self.assertContains(response, 'name="start"')
+        self.apply(
+            'delete_by_date_range', [self.keep],
+            start='2020-01-01 00:00', end='2020-12-31 23:59')
+        self.assertEqual(Post.objects.count(), 7)
+        self.assertFalse(Post.objects.filter(pk=self.keep.pk).exists())
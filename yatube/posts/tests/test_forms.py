@@ -1,12 +1,28 @@
+import shutil
+import tempfile
+
 from django.contrib.auth import get_user_model
-from django.test import Client, TestCase
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.test import Client, TestCase, override_settings
 from django.urls import reverse
 
 from ..models import Group, Post
 
 User = get_user_model()
 
+TEMP_MEDIA_ROOT = tempfile.mkdtemp()
+
+SMALL_GIF = (
+    b'\x47\x49\x46\x38\x39\x61\x02\x00'
+    b'\x01\x00\x80\x00\x00\x00\x00\x00'
+    b'\xFF\xFF\xFF\x21\xF9\x04\x00\x00'
+    b'\x00\x00\x00\x2C\x00\x00\x00\x00'
+    b'\x02\x00\x01\x00\x00\x02\x02\x0C'
+    b'\x0A\x00\x3B'
+)
 
+
+@override_settings(MEDIA_ROOT=TEMP_MEDIA_ROOT)
 class PostFormTests(TestCase):
     """Создаем тестовые посты, пользователей, группу и форму."""
 
@@ -26,6 +42,11 @@ class PostFormTests(TestCase):
             group=cls.group
         )
 
+    @classmethod
+    def tearDownClass(cls):
+        super().tearDownClass()
+        shutil.rmtree(TEMP_MEDIA_ROOT, ignore_errors=True)
+
     def setUp(self):
         """Создаем клиент автора и другого пользователя."""
 
@@ -87,6 +108,24 @@ class PostFormTests(TestCase):
                 author=self.user
             ).exists())
 
+    def test_create_post_with_image(self):
+        """Форма создает запись в Post. С картинкой."""
+
+        form_data = {
+            "text": "Тестовый пост с картинкой",
+            "image": SimpleUploadedFile(
+                name='small.gif', content=SMALL_GIF, content_type='image/gif'
+            ),
+        }
+        self.authorized_client.post(
+            reverse("posts:post_create"), data=form_data,
+        )
+        self.assertTrue(
+            Post.objects.filter(
+                text=form_data["text"],
+                image='posts/small.gif',
+            ).exists())
+
     def test_create_post_with_guest(self):
         """Форма не создает запись в Post от гостя."""
 
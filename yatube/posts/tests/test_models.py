@@ -1,7 +1,16 @@
+from io import StringIO
+
 from django.contrib.auth import get_user_model
+from django.core.management import call_command
+from django.db import connection
 from django.test import TestCase
+from django.urls import reverse
+
+from core.reverse import _reverse
 
+from ..management.commands.check_query_plans import Command
 from ..models import Group, Post
+from ..paginators import CursorPaginator
 
 User = get_user_model()
 
@@ -46,3 +55,123 @@ class GroupModelTest(TestCase):
         group = GroupModelTest.group
         expected_object_name = group.title
         self.assertEqual(expected_object_name, str(group))
+
+
+class PostCounterTest(TestCase):
+    """Проверяем счетчики постов автора и группы."""
+
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.user = User.objects.create_user(username='auth')
+        cls.group = Group.objects.create(
+            title='Тестовая группа',
+            slug='test-slug',
+            description='Тестовое описание',
+        )
+        cls.group_two = Group.objects.create(
+            title='Тестовая группа 2',
+            slug='test-slug-2',
+            description='Тестовое описание 2',
+        )
+
+    def assertCounts(self, author_count, group_count, group_two_count):
+        self.user.counter.refresh_from_db()
+        self.group.refresh_from_db()
+        self.group_two.refresh_from_db()
+        self.assertEqual(self.user.counter.posts_count, author_count)
+        self.assertEqual(self.group.posts_count, group_count)
+        self.assertEqual(self.group_two.posts_count, group_two_count)
+
+    def test_counters_follow_posts(self):
+        """Счетчики меняются при создании, переносе и удалении постов."""
+
+        post = Post.objects.create(
+            author=self.user, text='Текст', group=self.group)
+        self.assertCounts(1, 1, 0)
+
+        post = Post.objects.get(pk=post.pk)
+        post.group = self.group_two
+        post.save()
+        self.assertCounts(1, 0, 1)
+
+        Post.objects.bulk_create(
+            Post(author=self.user, text='Текст', group=self.group)
+            for _ in range(3)
+        )
+        self.assertCounts(4, 3, 1)
+
+        Post.objects.filter(group=self.group).delete()
+        self.assertCounts(1, 0, 1)
+
+        post.delete()
+        self.assertCounts(0, 0, 0)
+
+    def test_rebuild_counters_command(self):
+        """Команда rebuild_post_counters восстанавливает счетчики."""
+
+        Post.objects.create(author=self.user, text='Текст', group=self.group)
+        self.user.counter.delete()
+        Group.objects.update(posts_count=0)
+
+        call_command('rebuild_post_counters', stdout=StringIO())
+
+        self.user = User.objects.get(pk=self.user.pk)
+        self.assertCounts(1, 1, 0)
+
+
+class PostIndexesTest(TestCase):
+
+    def test_feed_queries_use_indexes(self):
+        """Ленты читаются по индексу без сортировки во временном B-дереве."""
+
+        stdout = StringIO()
+        call_command('check_query_plans', stdout=stdout)
+        self.assertNotIn('TEMP B-TREE', stdout.getvalue())
+
+    def test_query_plans_after_reconnect(self):
+        """PRAGMA нового соединения не подменяют проверяемый запрос."""
+
+        connection.close()
+        stdout = StringIO()
+        call_command('check_query_plans', stdout=stdout)
+        self.assertNotIn('PRAGMA', stdout.getvalue())
+
+        def get_page(position):
+            # Так выглядит первое обращение к странице на новом
+            # соединении: сначала выполняются PRAGMA из core.db.
+            with connection.cursor() as cursor:
+                cursor.execute('PRAGMA journal_mode')
+            return CursorPaginator(Post.objects.for_feed(), 10,
+                                   count=0).get_cursor_page(position)
+
+        sql, params = Command().capture(get_page, None)
+        self.assertTrue(sql.startswith('SELECT'))
+        self.assertIn('FROM "posts_post"', sql)
+
+
+class AbsoluteUrlTest(TestCase):
+
+    def test_absolute_urls_match_reverse(self):
+        """Адреса моделей совпадают с reverse() и берутся из кеша."""
+
+        user = User(username='auth')
+        group = Group(slug='test-slug')
+        post = Post(pk=7, author=user, group=group)
+        expected = {
+            user.get_absolute_url():
+                reverse('posts:profile', args=['auth']),
+            group.get_absolute_url():
+                reverse('posts:group_list', args=['test-slug']),
+            post.get_absolute_url():
+                reverse('posts:post_detail', args=[7]),
+            post.get_edit_url():
+                reverse('posts:post_edit', args=[7]),
+        }
+        for url, reversed_url in expected.items():
+            with self.subTest(url=reversed_url):
+                self.assertEqual(url, reversed_url)
+
+        hits = _reverse.cache_info().hits
+        post.get_absolute_url()
+        self.assertEqual(_reverse.cache_info().hits, hits + 1)
@@ -0,0 +1,174 @@
+import os
+import tempfile
+from datetime import datetime, timezone
+from io import StringIO
+
+from django.core.management import call_command
+from django.core.management.base import CommandError
+from django.test import TestCase
+
+from posts.models import (AuthorCounter, Follow, Group, Post, TimelineEntry,
+                          User)
+from posts.search import matching_posts
+from posts.transfer import export_records, import_records
+
+
+class TransferCommandsTest(TestCase):
+    """Выгрузка и загрузка постов, групп и пользователей."""
+
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        POSTS = 7
+        cls.user = User.objects.create_user(username='HasNoName')
+        cls.group = Group.objects.create(
+            title='Тест Группа',
+            slug='test-slug',
+            description='тест описание группы'
+        )
+        Post.objects.bulk_create(
+            Post(
+                text=f'Тестовый текст {i}',
+                author=cls.user,
+                group=cls.group if i % 2 else None,
+            )
+            for i in range(POSTS)
+        )
+
+    def setUp(self):
+        self.directory = tempfile.TemporaryDirectory()
+        self.addCleanup(self.directory.cleanup)
+
+    def path(self, name):
+        return os.path.join(self.directory.name, name)
+
+    def export(self, fmt):
+        paths = {}
+        for model in ('users', 'groups', 'posts'):
+            paths[model] = self.path(f'{model}.{fmt}')
+            call_command(
+                'export_posts', paths[model], model=model, stdout=StringIO())
+        return paths
+
+    def reimport(self, paths):
+        expected = list(export_records('posts'))
+        Post.objects.all().delete()
+        Group.objects.all().delete()
+        User.objects.all().delete()
+        for model in ('users', 'groups', 'posts'):
+            call_command(
+                'import_posts', paths[model], model=model, stdout=StringIO())
+        self.assertEqual(list(export_records('posts')), expected)
+
+    def test_round_trip(self):
+        """После выгрузки и загрузки данные совпадают, дата сохраняется."""
+
+        for fmt in ('jsonl', 'csv'):
+            with self.subTest(fmt=fmt):
+                self.reimport(self.export(fmt))
+                author = User.objects.get(username=self.user.username)
+                group = Group.objects.get(slug=self.group.slug)
+                self.assertFalse(author.has_usable_password())
+                self.assertEqual(
+                    AuthorCounter.objects.get(author=author).posts_count,
+                    Post.objects.count())
+                self.assertEqual(group.posts_count, group.posts.count())
+
+    def test_import_is_idempotent(self):
+        """Повторная загрузка того же файла не создает дублей."""
+
+        path = self.export('jsonl')['posts']
+        call_command('import_posts', path, stdout=StringIO())
+        self.assertEqual(Post.objects.count(), 7)
+
+    def test_resume_skips_loaded_records(self):
+        """--resume продолжает с записи из файла прогресса."""
+
+        path = self.export('jsonl')['posts']
+        Post.objects.all().delete()
+        with open(f'{path}.progress', 'w') as stream:
+            stream.write('5')
+        call_command(
+            'import_posts', path, resume=True, stdout=StringIO())
+        self.assertEqual(Post.objects.count(), 2)
+        self.assertFalse(os.path.exists(f'{path}.progress'))
+
+    def test_unknown_author(self):
+        """Пост с неизвестным автором останавливает загрузку."""
+
+        path = self.path('posts.jsonl')
+        with open(path, 'w') as stream:
+            stream.write('{"text": "Текст", "author": "nobody"}\n')
+        with self.assertRaisesMessage(CommandError, 'Запись 1'):
+            call_command('import_posts', path, stdout=StringIO())
+
+    def test_import_reports_progress(self):
+        """Прогресс сообщается после каждой пачки."""
+
+        pub_date = datetime(2020, 1, 1, tzinfo=timezone.utc)
+        records = [
+            {'text': f'Текст {i}', 'author': self.user.username,
+             'pub_date': pub_date.isoformat()}
+            for i in range(3)
+        ]
+        progress = []
+        done = import_records('posts', iter(records), on_chunk=progress.append)
+        self.assertEqual((done, progress), (3, [3]))
+        self.assertEqual(
+            Post.objects.filter(pub_date=pub_date).count(), 3)
+
+    def test_import_keeps_auto_now_add_for_other_posts(self):
+        """Посты, созданные во время импорта, получают текущую дату."""
+
+        pub_date = datetime(2020, 1, 1, tzinfo=timezone.utc)
+        created = []
+
+        def create_post(done):
+            created.append(
+                Post.objects.create(text='Новый', author=self.user))
+
+        import_records('posts', iter([
+            {'text': 'Старый', 'author': self.user.username,
+             'pub_date': pub_date.isoformat()},
+        ]), on_chunk=create_post)
+        self.assertTrue(Post.objects.filter(
+            text='Старый', pub_date=pub_date).exists())
+        self.assertGreater(created[0].pub_date, pub_date)
+
+    def test_conflicting_id_stops_import(self):
+        """Другой пост под занятым id останавливает загрузку."""
+
+        post = Post.objects.first()
+        path = self.path('posts.jsonl')
+        with open(path, 'w') as stream:
+            stream.write('{"text": "Текст", "author": "HasNoName"}\n')
+            stream.write(
+                f'{{"id": {post.pk}, "text": "Чужой", '
+                f'"author": "HasNoName"}}\n')
+        with self.assertRaisesMessage(CommandError, 'Запись 2'):
+            call_command('import_posts', path, stdout=StringIO())
+        self.assertEqual(Post.objects.count(), 7)
+
+    def test_mixed_batch_indexes_and_fans_out_all_posts(self):
+        """Посты с id ниже последнего тоже попадают в поиск и ленты."""
+
+        reader = User.objects.create_user(username='reader')
+        Follow.objects.create(user=reader, author=self.user)
+        free_pk = Post.objects.order_by('pk').first().pk
+        Post.objects.filter(pk=free_pk).delete()
+        import_records('posts', iter([
+            {'id': free_pk, 'text': 'Возвращенный',
+             'author': self.user.username},
+            {'text': 'Добавленный', 'author': self.user.username},
+        ]))
+
+        for text in ('Возвращенный', 'Добавленный'):
+            with self.subTest(text=text):
+                post = Post.objects.get(text=text)
+                self.assertEqual(
+                    list(matching_posts(Post.objects.all(), text)), [post])
+                self.assertTrue(TimelineEntry.objects.filter(
+                    user=reader, post=post).exists())
+        self.assertGreater(
+            Post.objects.create(text='Новый', author=self.user).pk,
+            Post.objects.get(text='Добавленный').pk)
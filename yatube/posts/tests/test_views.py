@@ -1,8 +1,31 @@
+import os
+import shutil
+from http import HTTPStatus
+from io import StringIO
+from unittest.mock import patch
+
 from django import forms
-from django.test import Client, TestCase
+from django.conf import settings
+from django.core.cache import cache
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.core.management import call_command
+from django.db import connection
+from django.template import Context, Template
+from django.test import Client, TestCase, override_settings
+from django.test.utils import CaptureQueriesContext
 from django.urls import reverse
+from sorl.thumbnail.models import KVStore
+
+from core.tasks import run_pending
+from posts import thumbnails
+from posts.cache import HEADER_HOLE
+from posts.models import (AuthorCounter, Follow, Group, Post, TimelineEntry,
+                          User)
+from posts.paginators import CursorPaginator
+from posts.search import TableBackend, matching_posts, query_terms
 
-from posts.models import Group, Post, User
+from .test_forms import SMALL_GIF, TEMP_MEDIA_ROOT
+from .utils import QueryBudgetMixin
 
 LIMIT_POST = 10
 
@@ -25,7 +48,7 @@ class PostPagesTests(TestCase):
         )
 
     def setUp(self):
-
+        cache.clear()
         self.authorized_client = Client()
         self.authorized_client.force_login(self.user)
 
@@ -110,6 +133,23 @@ class PostPagesTests(TestCase):
 
         self.assertEqual(response.context.get('post'), self.post)
 
+    def test_author_pages_without_counter(self):
+        """Страницы автора без строки счетчика не падают."""
+        AuthorCounter.objects.filter(author=self.user).delete()
+
+        response = self.authorized_client.get(
+            reverse('posts:profile', args=[self.user]))
+        self.assertEqual(response.status_code, HTTPStatus.OK)
+        self.assertEqual(response.context['posts_count'], 1)
+
+        AuthorCounter.objects.filter(author=self.user).delete()
+        response = self.authorized_client.get(reverse(
+            'posts:post_detail', kwargs={'post_id': self.post.id}))
+        self.assertEqual(response.status_code, HTTPStatus.OK)
+        self.assertEqual(response.context['author_posts_count'], 1)
+        self.assertTrue(
+            AuthorCounter.objects.filter(author=self.user).exists())
+
     def test_post_edit_show_correct_context(self):
         """Шаблон post_edit сформирован с правильным контекстом."""
 
@@ -165,6 +205,9 @@ class PaginatorViewsTest(TestCase):
             for i in range(MAX_POST)]
         Post.objects.bulk_create(objs_post)
 
+    def setUp(self):
+        cache.clear()
+
     def test_first_page_contains(self):
         """Проверяем первую станицу пагинатора."""
 
@@ -205,3 +248,569 @@ class PaginatorViewsTest(TestCase):
             with self.subTest(value=value):
                 response = self.client.get(f'{value}?page=2')
                 self.assertEqual(len(response.context['page_obj']), expected)
+
+    def test_index_pages_read_counters(self):
+        """Номера страниц главной считаются по счетчикам, без COUNT(*)."""
+
+        with CaptureQueriesContext(connection) as context:
+            response = self.client.get(reverse('posts:index'), {'page': 2})
+        self.assertEqual(response.context['page_obj'].paginator.count, 13)
+        for query in context.captured_queries:
+            sql = query['sql']
+            self.assertFalse(
+                'COUNT(' in sql and 'FROM "posts_post"' in sql, sql)
+
+    def test_cursor_pages(self):
+        """Проверяем переход по курсорам вперед и назад."""
+
+        url = reverse('posts:index')
+        first_page = self.client.get(url).context['page_obj']
+        self.assertEqual(len(first_page), LIMIT_POST)
+        self.assertTrue(first_page.has_next())
+        self.assertFalse(first_page.has_previous())
+
+        second_page = self.client.get(
+            url, {'cursor': first_page.next_cursor}).context['page_obj']
+        self.assertEqual(len(second_page), 3)
+        self.assertFalse(second_page.has_next())
+        self.assertTrue(second_page.has_previous())
+        self.assertFalse(set(first_page) & set(second_page))
+
+        back_page = self.client.get(
+            url, {'cursor': second_page.previous_cursor}).context['page_obj']
+        self.assertEqual(list(back_page), list(first_page))
+
+    def test_page_range_is_windowed(self):
+        """Навигация по номерам не растет вместе с числом страниц."""
+
+        url = reverse('posts:group_list', kwargs={'slug': self.group.slug})
+        nav_sizes = set()
+        for posts_count in (10 ** 3, 10 ** 5):
+            Group.objects.filter(pk=self.group.pk).update(
+                posts_count=posts_count)
+            last_page = posts_count // LIMIT_POST
+            for page in (1, 50, last_page):
+                with self.subTest(posts_count=posts_count, page=page):
+                    cache.clear()
+                    response = self.client.get(url, {'page': page})
+                    page_obj = response.context['page_obj']
+                    self.assertEqual(page_obj.number, page)
+                    self.assertIn(last_page, page_obj.page_range)
+                    nav_sizes.add(
+                        response.content.decode().count('class="page-item'))
+        self.assertLessEqual(max(nav_sizes), 12)
+
+    def test_elided_page_range(self):
+        """Окно страниц: края, соседи текущей и многоточия."""
+
+        paginator = CursorPaginator(Post.objects.all(), 1, count=100)
+        ellipsis = CursorPaginator.ELLIPSIS
+        cases = {
+            1: [1, 2, 3, ellipsis, 100],
+            50: [1, ellipsis, 48, 49, 50, 51, 52, ellipsis, 100],
+            100: [1, ellipsis, 98, 99, 100],
+        }
+        for number, expected in cases.items():
+            with self.subTest(number=number):
+                self.assertEqual(
+                    list(paginator.get_elided_page_range(number)), expected)
+        short = CursorPaginator(Post.objects.all(), 1, count=5)
+        self.assertEqual(
+            list(short.get_elided_page_range(3)), [1, 2, 3, 4, 5])
+
+    def test_invalid_cursor_returns_first_page(self):
+        """Некорректный курсор открывает первую страницу."""
+
+        url = reverse('posts:index')
+        first_page = self.client.get(url).context['page_obj']
+        response = self.client.get(url, {'cursor': 'не-курсор'})
+        self.assertEqual(list(response.context['page_obj']), list(first_page))
+
+
+class FeedQueriesTest(QueryBudgetMixin, TestCase):
+    """Число запросов ленты не зависит от числа постов на странице."""
+
+    FEED_QUERIES = 1
+    OBJECT_FEED_QUERIES = 3
+
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        POSTS_PER_AUTHOR = 12
+        cls.group = Group.objects.create(
+            title='Тест Группа',
+            slug='test-slug',
+            description='тест описание группы'
+        )
+        cls.user = User.objects.create_user(username='HasNoName')
+        cls.user_two = User.objects.create_user(username='Other')
+        Post.objects.bulk_create(
+            Post(text=f'Текст {i}', author=author, group=cls.group)
+            for author in (cls.user, cls.user_two)
+            for i in range(POSTS_PER_AUTHOR)
+        )
+
+    def setUp(self):
+        cache.clear()
+
+    def test_feed_query_budget(self):
+        """Ленты укладываются в фиксированный бюджет запросов."""
+
+        url_budgets = {
+            reverse('posts:index'): self.FEED_QUERIES,
+            reverse('posts:group_list', kwargs={'slug': self.group.slug}):
+            self.OBJECT_FEED_QUERIES,
+            reverse('posts:profile', args=[self.user]):
+            self.OBJECT_FEED_QUERIES,
+        }
+        for url, budget in url_budgets.items():
+            with self.subTest(url=url):
+                response = self.assertPageQueries(self.client, url, budget)
+                next_url = (
+                    f'{url}?cursor={response.context["page_obj"].next_cursor}'
+                )
+                self.assertPageQueries(self.client, next_url, budget)
+
+
+class CachedPagesTestCase(TestCase):
+    """Пост в группе, клиент автора и ленты с ним; кеш очищен."""
+
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.user = User.objects.create_user(username='HasNoName')
+        cls.group = Group.objects.create(
+            title='Тест Группа',
+            slug='test-slug',
+            description='тест описание группы'
+        )
+        cls.post = Post.objects.create(
+            text='Тест текст поста',
+            author=cls.user,
+            group=cls.group,
+        )
+
+    def setUp(self):
+        cache.clear()
+        self.authorized_client = Client()
+        self.authorized_client.force_login(self.user)
+        self.urls = (
+            reverse('posts:index'),
+            reverse('posts:group_list', kwargs={'slug': self.group.slug}),
+            reverse('posts:profile', args=[self.user]),
+        )
+
+
+class FeedCacheTest(CachedPagesTestCase):
+    """Кеш лент для анонимов и его сброс при изменениях."""
+
+    def test_anonymous_feed_is_cached(self):
+        """Повторный запрос анонима отдается из кеша без запросов к БД."""
+
+        url = reverse('posts:index')
+        first = self.client.get(url)
+        with self.assertNumQueries(0):
+            second = self.client.get(url)
+        self.assertEqual(first.content, second.content)
+
+    def test_authorized_feed_shares_cache_with_own_header(self):
+        """Лента из общего кеша, а шапка у каждого пользователя своя."""
+
+        url = reverse('posts:index')
+        self.client.get(url)
+        with CaptureQueriesContext(connection) as context:
+            response = self.authorized_client.get(url)
+        # Читаются разве что сессия и пользователь, но не посты.
+        for query in context.captured_queries:
+            self.assertNotIn('posts_', query['sql'])
+        self.assertNotIn('page_obj', response.context)
+        self.assertContains(response, f'Пользователь: {self.user.username}')
+        self.assertContains(response, 'Тест текст поста')
+        self.assertNotContains(response, HEADER_HOLE)
+
+        anonymous = self.client.get(url)
+        self.assertNotContains(anonymous, 'Пользователь:')
+        self.assertContains(anonymous, 'Регистрация')
+
+    def test_profile_is_not_shared_with_users(self):
+        """Профиль с кнопкой подписки не отдается пользователям из кеша."""
+
+        url = reverse('posts:profile', args=[self.user])
+        self.client.get(url)
+        response = self.authorized_client.get(url)
+        self.assertIn('page_obj', response.context)
+
+    def test_feed_cache_expires_on_post_changes(self):
+        """Новый, измененный и удаленный пост сразу видны в лентах."""
+
+        for url in self.urls:
+            self.client.get(url)
+
+        new_post = Post.objects.create(
+            text='Новый пост', author=self.user, group=self.group)
+        for url in self.urls:
+            with self.subTest(url=url):
+                self.assertContains(self.client.get(url), 'Новый пост')
+
+        new_post.text = 'Исправленный пост'
+        new_post.save()
+        for url in self.urls:
+            with self.subTest(url=url):
+                self.assertContains(self.client.get(url), 'Исправленный пост')
+
+        new_post.delete()
+        for url in self.urls:
+            with self.subTest(url=url):
+                self.assertNotContains(
+                    self.client.get(url), 'Исправленный пост')
+
+    def test_post_card_expires_on_group_change(self):
+        """Смена slug группы сбрасывает карточки постов этой группы."""
+
+        url = reverse('posts:index')
+        profile_url = reverse('posts:profile', args=[self.user])
+        self.authorized_client.get(url)
+        etag = self.client.get(profile_url)['ETag']
+        self.group.slug = 'new-slug'
+        self.group.save()
+        new_url = reverse('posts:group_list', kwargs={'slug': 'new-slug'})
+        self.assertContains(self.authorized_client.get(url), new_url)
+
+        response = self.client.get(profile_url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, HTTPStatus.OK)
+        self.assertContains(response, new_url)
+
+    def test_post_cards_read_cache_once_per_page(self):
+        """Карточки страницы берутся из кеша одним get_many."""
+
+        posts = [
+            Post(pk=number, text=f'Карточка {number}', author=self.user,
+                 group=self.group)
+            for number in range(1, 4)
+        ]
+        template = Template(
+            '{% load post_cards %}{% for post in posts %}'
+            '{% post_card posts view_group_link=True %}{% endfor %}')
+        template.render(Context({'posts': posts}))
+        posts[0].text = 'Без новой версии'
+        with patch.object(cache, 'get_many', wraps=cache.get_many) as spy:
+            content = template.render(Context({'posts': posts}))
+        spy.assert_called_once()
+        self.assertIn('Карточка 1', content)
+        self.assertNotIn('Без новой версии', content)
+
+        posts[0].card_version = 'new'
+        content = template.render(Context({'posts': posts}))
+        self.assertIn('Без новой версии', content)
+
+
+class ConditionalGetTest(CachedPagesTestCase):
+    """Неизмененные страницы отвечают 304 без отрисовки."""
+
+    def setUp(self):
+        super().setUp()
+        self.urls += (
+            reverse('posts:post_detail', kwargs={'post_id': self.post.id}),
+        )
+
+    def test_not_modified(self):
+        """Повторный запрос с ETag или Last-Modified получает 304."""
+
+        for url in self.urls:
+            with self.subTest(url=url):
+                response = self.client.get(url)
+                self.assertEqual(response.status_code, HTTPStatus.OK)
+                response = self.client.get(
+                    url, HTTP_IF_NONE_MATCH=response['ETag'])
+                self.assertEqual(
+                    response.status_code, HTTPStatus.NOT_MODIFIED)
+                response = self.client.get(
+                    url, HTTP_IF_MODIFIED_SINCE=response['Last-Modified'])
+                self.assertEqual(
+                    response.status_code, HTTPStatus.NOT_MODIFIED)
+
+    def test_modified_after_post_change(self):
+        """После изменения поста старый ETag больше не подходит."""
+
+        etags = {url: self.client.get(url)['ETag'] for url in self.urls}
+        self.post.text = 'Новый текст'
+        self.post.save()
+        for url, etag in etags.items():
+            with self.subTest(url=url):
+                response = self.client.get(url, HTTP_IF_NONE_MATCH=etag)
+                self.assertEqual(response.status_code, HTTPStatus.OK)
+
+    def test_authorized_page_has_own_etag(self):
+        """Страница авторизованного не совпадает по ETag с гостевой."""
+
+        for url in self.urls:
+            with self.subTest(url=url):
+                etag = self.client.get(url)['ETag']
+                response = self.authorized_client.get(
+                    url, HTTP_IF_NONE_MATCH=etag)
+                self.assertEqual(response.status_code, HTTPStatus.OK)
+                self.assertFalse(response.has_header('Last-Modified'))
+                self.assertIn('Cookie', response['Vary'])
+
+
+class SearchViewTest(TestCase):
+    """Поиск по постам: ранжирование, курсоры, оба вида индекса."""
+
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.user = User.objects.create_user(username='HasNoName')
+        cls.best = Post.objects.create(
+            text='Кот и кот, снова кот', author=cls.user)
+        cls.other = Post.objects.create(
+            text='Кот спит на солнце', author=cls.user)
+        cls.unrelated = Post.objects.create(
+            text='Собака гуляет', author=cls.user)
+        Post.objects.bulk_create(
+            Post(text=f'Пушистый кот номер {i}', author=cls.user)
+            for i in range(LIMIT_POST)
+        )
+
+    def search(self, query, **params):
+        response = self.client.get(
+            reverse('posts:search'), {'q': query, **params})
+        return response.context['page_obj']
+
+    def test_search_ranks_and_filters(self):
+        """Найдены только посты со всеми словами, лучший - первым."""
+
+        page_obj = self.search('кот')
+        self.assertEqual(page_obj[0], self.best)
+        self.assertNotIn(self.unrelated, page_obj)
+        self.assertEqual(list(self.search('кот солнце')), [self.other])
+
+    def test_matching_posts_returns_all_matches(self):
+        """Фильтр по индексу находит все посты, а не только первый."""
+
+        self.assertEqual(
+            matching_posts(Post.objects.all(), 'кот').count(),
+            LIMIT_POST + 2)
+
+    def test_search_cursor_pages(self):
+        """Результаты листаются курсором без повторов."""
+
+        first_page = self.search('кот')
+        self.assertEqual(len(first_page), LIMIT_POST)
+        self.assertTrue(first_page.has_next())
+        second_page = self.search('кот', cursor=first_page.next_cursor)
+        self.assertEqual(len(second_page), 2)
+        self.assertFalse(set(first_page) & set(second_page))
+
+    def test_index_follows_post_changes(self):
+        """Индекс обновляется при правке и удалении поста."""
+
+        self.unrelated.text = 'Собака и кот'
+        self.unrelated.save()
+        self.assertIn(self.unrelated, self.search('собака кот'))
+        self.unrelated.delete()
+        self.assertEqual(len(self.search('собака')), 0)
+
+    def test_table_backend(self):
+        """Запасной индекс в таблице дает тот же порядок результатов."""
+
+        backend = TableBackend()
+        backend.rebuild()
+        terms = query_terms('кот')
+        rows = backend.ranked(terms, None, LIMIT_POST * 2)
+        self.assertEqual(rows[0][0], self.best.pk)
+        self.assertEqual(len(rows), LIMIT_POST + 2)
+        pk, score = rows[1]
+        rest = backend.ranked(terms, (score, pk), LIMIT_POST)
+        self.assertEqual(rest, rows[2:])
+        self.assertEqual(
+            list(matching_posts(Post.objects.all(), 'кот солнце')),
+            [self.other])
+
+
+class FollowViewsTest(QueryBudgetMixin, TestCase):
+    """Подписки и лента избранных авторов."""
+
+    FOLLOW_QUERIES = 6
+
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.reader = User.objects.create_user(username='reader')
+        cls.author = User.objects.create_user(username='author')
+        cls.stranger = User.objects.create_user(username='stranger')
+        cls.old_post = Post.objects.create(
+            text='Пост до подписки', author=cls.author)
+
+    def setUp(self):
+        self.reader_client = Client()
+        self.reader_client.force_login(self.reader)
+        self.url = reverse('posts:follow_index')
+
+    def follow(self, author):
+        return self.reader_client.get(
+            reverse('posts:profile_follow', args=[author]))
+
+    def feed(self, **params):
+        return list(self.reader_client.get(
+            self.url, params).context['page_obj'])
+
+    def test_follow_and_unfollow(self):
+        """Подписка переносит посты автора в ленту, отписка убирает."""
+
+        self.follow(self.author)
+        self.assertTrue(Follow.objects.filter(
+            user=self.reader, author=self.author).exists())
+        self.assertEqual(self.feed(), [self.old_post])
+        self.assertEqual(AuthorCounter.objects.get(
+            author=self.author).followers_count, 1)
+
+        self.reader_client.get(
+            reverse('posts:profile_unfollow', args=[self.author]))
+        self.assertFalse(Follow.objects.exists())
+        self.assertEqual(self.feed(), [])
+        self.assertEqual(AuthorCounter.objects.get(
+            author=self.author).followers_count, 0)
+
+    def test_cannot_follow_self(self):
+        """На себя подписаться нельзя."""
+
+        self.follow(self.reader)
+        self.assertFalse(Follow.objects.exists())
+
+    def test_new_post_fans_out_to_followers(self):
+        """Новый пост попадает только в ленты подписчиков."""
+
+        self.follow(self.author)
+        author_client = Client()
+        author_client.force_login(self.author)
+        author_client.post(reverse('posts:post_create'), {'text': 'Новый'})
+        post = Post.objects.get(text='Новый')
+        self.assertFalse(TimelineEntry.objects.filter(post=post).exists())
+        run_pending()
+        self.assertTrue(TimelineEntry.objects.filter(
+            user=self.reader, post=post).exists())
+        self.assertEqual(self.feed()[0], post)
+
+        stranger_client = Client()
+        stranger_client.force_login(self.stranger)
+        response = stranger_client.get(self.url)
+        self.assertNotIn(post, response.context['page_obj'])
+
+    @override_settings(TIMELINE_FANOUT_LIMIT=0)
+    def test_popular_author_is_read_on_request(self):
+        """Посты популярного автора не раскладываются, а читаются."""
+
+        self.follow(self.author)
+        Post.objects.bulk_create(
+            Post(text=f'Популярный {i}', author=self.author)
+            for i in range(LIMIT_POST))
+        self.assertEqual(
+            TimelineEntry.objects.filter(user=self.reader).count(), 0)
+        posts = Post.objects.filter(author=self.author)
+        self.assertEqual(set(self.feed()), set(posts[:LIMIT_POST]))
+
+    def test_cursor_pages_and_query_budget(self):
+        """Лента листается курсором за фиксированное число запросов."""
+
+        popular = User.objects.create_user(username='popular')
+        self.follow(self.author)
+        with override_settings(TIMELINE_FANOUT_LIMIT=0):
+            # Число запросов не зависит от числа таких авторов.
+            self.follow(self.stranger)
+            self.follow(popular)
+        Post.objects.bulk_create(
+            Post(text=f'Текст {i}', author=author)
+            for author in (self.author, self.stranger, popular)
+            for i in range(LIMIT_POST))
+        expected = list(Post.objects.order_by('-pub_date', '-id'))
+
+        pages = []
+        cursor = ''
+        while True:
+            response = self.assertPageQueries(
+                self.reader_client, f'{self.url}?cursor={cursor}',
+                self.FOLLOW_QUERIES)
+            page_obj = response.context['page_obj']
+            pages.append(list(page_obj))
+            if not page_obj.has_next():
+                break
+            cursor = page_obj.next_cursor
+        self.assertEqual(sum(pages, []), expected)
+
+        back = self.feed(cursor=page_obj.previous_cursor)
+        self.assertEqual(back, pages[-2])
+
+
+@override_settings(MEDIA_ROOT=TEMP_MEDIA_ROOT, THUMBNAIL_WORKERS=0)
+class PostImageTest(TestCase):
+    """Миниатюры создаются вне отрисовки и читаются из хранилища ключей."""
+
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.user = User.objects.create_user(username='HasNoName')
+        cls.post = Post.objects.create(
+            text='Пост с картинкой',
+            author=cls.user,
+            image=SimpleUploadedFile(
+                name='small.gif', content=SMALL_GIF, content_type='image/gif'
+            ),
+        )
+
+    @classmethod
+    def tearDownClass(cls):
+        super().tearDownClass()
+        shutil.rmtree(TEMP_MEDIA_ROOT, ignore_errors=True)
+
+    def setUp(self):
+        cache.clear()
+
+    def pages(self):
+        return (
+            reverse('posts:index'),
+            reverse('posts:profile', args=[self.user]),
+            reverse('posts:post_detail', args=[self.post.pk]),
+        )
+
+    def test_render_does_not_create_thumbnails(self):
+        """Страница без готовой миниатюры не создает ее и не падает."""
+
+        for url in self.pages():
+            with self.subTest(url=url):
+                response = self.client.get(url)
+                self.assertNotContains(response, '<img class="card-img')
+        self.assertFalse(KVStore.objects.exists())
+
+    @override_settings(THUMBNAIL_WORKERS=2)
+    def test_render_does_not_start_pool(self):
+        """Промах миниатюры при отрисовке ничего не ставит в пул."""
+
+        with patch('posts.thumbnails.submit') as submit:
+            for url in self.pages():
+                self.client.get(url)
+        submit.assert_not_called()
+
+    def test_generate_thumbnails_command(self):
+        """Команда создает недостающие миниатюры, уже готовые пропускает."""
+
+        call_command('generate_thumbnails', stdout=StringIO())
+        self.assertTrue(thumbnails.has_thumbnails(self.post.image.name))
+        self.assertContains(
+            self.client.get(self.pages()[0]),
+            f'src="{settings.MEDIA_URL}cache/')
+
+        stdout = StringIO()
+        call_command('generate_thumbnails', stdout=stdout)
+        self.assertIn('картинок: 0.', stdout.getvalue())
+
+    def test_pages_use_generated_thumbnails(self):
+        """После пула страницы берут миниатюру без файла картинки."""
+
+        thumbnails.submit(self.post.image.name, [])
+        os.remove(self.post.image.path)
+        for url in self.pages():
+            with self.subTest(url=url):
+                cache.clear()
+                response = self.client.get(url)
+                self.assertContains(
+                    response, f'src="{settings.MEDIA_URL}cache/')
@@ -0,0 +1,26 @@
+from contextlib import contextmanager
+
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+
+
+class QueryBudgetMixin:
+    """Проверки бюджета SQL-запросов на страницу."""
+
+    @contextmanager
+    def assertMaxQueries(self, budget):
+        """Блок должен выполнить не больше `budget` запросов."""
+        with CaptureQueriesContext(connection) as context:
+            yield context
+        executed = len(context.captured_queries)
+        self.assertLessEqual(
+            executed, budget,
+            f'Выполнено {executed} запросов при бюджете {budget}:\n'
+            + '\n'.join(query['sql'] for query in context.captured_queries)
+        )
+
+    def assertPageQueries(self, client, url, budget):
+        """Страница `url` укладывается в `budget` запросов."""
+        with self.assertMaxQueries(budget):
+            response = client.get(url)
+        return response
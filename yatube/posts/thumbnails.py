@@ -0,0 +1,171 @@
+import logging
+from concurrent.futures import ProcessPoolExecutor
+from multiprocessing import get_context
+from threading import Lock
+
+import django
+from django.conf import settings
+from django.db import transaction
+from sorl.thumbnail import default
+from sorl.thumbnail.base import ThumbnailBackend
+from sorl.thumbnail.conf import defaults as default_settings
+from sorl.thumbnail.conf import settings as thumbnail_settings
+from sorl.thumbnail.images import ImageFile
+from sorl.thumbnail.kvstores import cached_db_kvstore
+from sorl.thumbnail.models import KVStore as KVStoreModel
+
+from .cache import bump_versions, post_scopes
+from .models import Post
+
+logger = logging.getLogger(__name__)
+
+# Миниатюры из шаблонов includes/post.html и posts/post_detail.html:
+# геометрия и параметры должны совпадать с тегами {% thumbnail %}.
+VARIANTS = (
+    ('960x339', {'crop': 'center', 'upscale': True}),
+)
+
+# Столько постов проверяет за раз generate_missing.
+BATCH_SIZE = 100
+
+_executor = None
+_pending = set()
+_lock = Lock()
+
+
+def generate(name):
+    """Создает все миниатюры картинки; выполняется в процессе пула."""
+    backend = ThumbnailBackend()
+    for geometry, options in VARIANTS:
+        backend.get_thumbnail(name, geometry, **options)
+
+
+def get_executor():
+    global _executor
+    if _executor is None:
+        # spawn, а не fork: дочерний процесс не наследует соединения
+        # с базой и сам настраивает Django.
+        _executor = ProcessPoolExecutor(
+            max_workers=settings.THUMBNAIL_WORKERS,
+            mp_context=get_context('spawn'),
+            initializer=django.setup,
+        )
+    return _executor
+
+
+def _finished(name, scopes, future):
+    with _lock:
+        _pending.discard(name)
+    error = future.exception()
+    if error is not None:
+        logger.error('Не удалось создать миниатюры %s: %r', name, error)
+        return
+    # Карточки без картинки уже в кеше фрагментов: перерисуем их.
+    bump_versions(scopes)
+
+
+def submit(name, scopes):
+    """Отдает картинку пулу процессов, если она еще не в очереди.
+
+    При THUMBNAIL_WORKERS = 0 миниатюры создаются сразу в текущем
+    процессе.
+    """
+    if not settings.THUMBNAIL_WORKERS:
+        generate(name)
+        bump_versions(scopes)
+        return
+    with _lock:
+        if name in _pending:
+            return
+        _pending.add(name)
+    future = get_executor().submit(generate, name)
+    future.add_done_callback(
+        lambda future: _finished(name, scopes, future))
+
+
+def schedule(post):
+    """Ставит миниатюры картинки поста в очередь после коммита."""
+    name = post.image.name
+    scopes = post_scopes(post.pk, post.author_id, post.group_id)
+    transaction.on_commit(lambda: submit(name, scopes))
+
+
+class KVStore(cached_db_kvstore.KVStore):
+    """Хранилище метаданных миниатюр в базе с кешем перед ней.
+
+    В отличие от cached_db не запоминает промахи: миниатюру записывает
+    процесс пула, и веб-процесс должен увидеть ее в базе.
+    """
+
+    def _get_raw(self, key):
+        value = self.cache.get(key)
+        if value is None:
+            value = KVStoreModel.objects.filter(key=key).values_list(
+                'value', flat=True).first()
+            if value is not None:
+                self.cache.set(
+                    key, value, thumbnail_settings.THUMBNAIL_CACHE_TIMEOUT)
+        return value
+
+
+class QueuedThumbnailBackend(ThumbnailBackend):
+    """Бэкенд для шаблонов: миниатюры берутся только из хранилища ключей.
+
+    Отрисовка ничего не создает и файлы картинок не открывает. Если
+    миниатюры еще нет, тег {% thumbnail %} ничего не выводит: ее создаст
+    пул после сохранения поста (`schedule`) или команда
+    generate_thumbnails.
+    """
+
+    def get_thumbnail(self, file_, geometry_string, **options):
+        if not file_:
+            raise ValueError('falsey file_ argument in get_thumbnail()')
+        source = ImageFile(file_)
+        for key, value in self.default_options.items():
+            options.setdefault(key, value)
+        for key, attr in self.extra_options:
+            value = getattr(thumbnail_settings, attr)
+            if value != getattr(default_settings, attr):
+                options.setdefault(key, value)
+
+        name = self._get_thumbnail_filename(source, geometry_string, options)
+        return default.kvstore.get(ImageFile(name, default.storage))
+
+
+def has_thumbnails(name):
+    """Есть ли в хранилище ключей все миниатюры картинки `name`."""
+    backend = QueuedThumbnailBackend()
+    return all(
+        backend.get_thumbnail(name, geometry, **options) is not None
+        for geometry, options in VARIANTS
+    )
+
+
+def generate_missing(on_batch=None):
+    """Создает недостающие миниатюры картинок всех постов.
+
+    Посты читаются пачками по pk; картинки без миниатюр обрабатывает
+    пул (или текущий процесс при THUMBNAIL_WORKERS = 0), после чего
+    карточки постов перерисовываются. После пачки вызывается
+    `on_batch(created)`. Возвращает число обработанных картинок.
+    """
+    posts = Post.objects.exclude(image='').order_by('pk').values_list(
+        'pk', 'author_id', 'group_id', 'image', named=True)
+    created = 0
+    last_pk = 0
+    while True:
+        rows = list(posts.filter(pk__gt=last_pk)[:BATCH_SIZE])
+        if not rows:
+            return created
+        last_pk = rows[-1].pk
+        missing = [row for row in rows if not has_thumbnails(row.image)]
+        names = [row.image for row in missing]
+        if settings.THUMBNAIL_WORKERS:
+            results = get_executor().map(generate, names)
+        else:
+            results = map(generate, names)
+        for row, _ in zip(missing, results):
+            bump_versions(post_scopes(row.pk, row.author_id, row.group_id))
+        created += len(missing)
+        if on_batch is not None:
+            on_batch(created)
@@ -0,0 +1,148 @@
+from collections import defaultdict
+from heapq import merge
+from itertools import islice
+
+from core.tasks import task
+
+from .models import AuthorCounter, Follow, Post, TimelineEntry
+from .paginators import FORWARD, CursorPaginator, decode_cursor, seek
+
+INSERT_BATCH = 1000
+BACKFILL_POSTS = 1000
+
+
+def _insert(entries):
+    entries = iter(entries)
+    while True:
+        batch = list(islice(entries, INSERT_BATCH))
+        if not batch:
+            return
+        TimelineEntry.objects.bulk_create(batch, ignore_conflicts=True)
+
+
+def fan_out(posts):
+    """Раскладывает новые посты по лентам подписчиков их авторов.
+
+    Посты авторов со сборкой ленты при чтении пропускаются.
+    """
+    by_author = defaultdict(list)
+    for post in posts:
+        by_author[post.author_id].append(post)
+    pulled = AuthorCounter.objects.filter(
+        author_id__in=by_author, fan_out_on_read=True
+    ).values_list('author_id', flat=True)
+    for author_id in pulled:
+        del by_author[author_id]
+
+    for author_id, author_posts in by_author.items():
+        followers = Follow.objects.filter(author_id=author_id).values_list(
+            'user_id', flat=True)
+        _insert(
+            TimelineEntry(
+                user_id=user_id, post_id=post.pk, pub_date=post.pub_date)
+            for user_id in followers.iterator()
+            for post in author_posts
+        )
+
+
+@task
+def fan_out_post(post_id):
+    """Раскладывает новый пост по лентам в обработчике очереди."""
+    post = Post.objects.filter(pk=post_id).only(
+        'author', 'pub_date').first()
+    if post is not None:
+        fan_out([post])
+
+
+def reassign_post(post):
+    """Перекладывает пост в ленты подписчиков нового автора."""
+    TimelineEntry.objects.filter(post_id=post.pk).delete()
+    fan_out([post])
+
+
+def add_author(user_id, author_id):
+    """Добавляет в ленту подписчика последние посты нового автора.
+
+    Для авторов со сборкой при чтении ничего не делает, а остальным
+    переносит не больше `BACKFILL_POSTS` постов.
+    """
+    pulled = AuthorCounter.objects.filter(
+        author_id=author_id, fan_out_on_read=True).exists()
+    if pulled:
+        return
+    posts = Post.objects.filter(author_id=author_id).order_by(
+        '-pub_date', '-id').values_list('pk', 'pub_date')
+    _insert(
+        TimelineEntry(user_id=user_id, post_id=pk, pub_date=pub_date)
+        for pk, pub_date in posts[:BACKFILL_POSTS]
+    )
+
+
+def remove_author(user_id, author_id):
+    """Убирает из ленты посты автора после отписки."""
+    TimelineEntry.objects.filter(
+        user_id=user_id, post__author_id=author_id).delete()
+
+
+class TimelinePaginator(CursorPaginator):
+    """Лента подписок пользователя по курсору.
+
+    Посты берутся из материализованной ленты и одним запросом из постов
+    всех авторов со сборкой при чтении. Каждый источник читает не больше
+    `per_page + 1` строк, затем ключи сливаются, поэтому стоимость
+    страницы не зависит ни от длины ленты, ни от числа таких авторов.
+    """
+
+    def __init__(self, user, per_page):
+        super().__init__(Post.objects.for_feed(), per_page)
+        pulled = Follow.objects.filter(
+            user=user, author__counter__fan_out_on_read=True
+        ).values('author_id')
+        self.sources = [
+            (TimelineEntry.objects.filter(user=user), 'post_id'),
+            (Post.objects.filter(author_id__in=pulled), 'id'),
+        ]
+
+    def get_cursor_page(self, cursor=None):
+        position = decode_cursor(cursor) if cursor else None
+        if position is None:
+            return self._keys_page(self._keys(), has_previous=False)
+
+        keys = self._keys(*position)
+        if position[0] == FORWARD:
+            return self._keys_page(keys, has_previous=True)
+        if len(keys) <= self.per_page:
+            return self.get_cursor_page()
+        return self._keys_page(
+            keys[:self.per_page][::-1], has_next=True, has_previous=True)
+
+    def _keys(self, direction=FORWARD, pub_date=None, pk=None):
+        """Ключи (pub_date, id) следующих постов из всех источников."""
+        limit = self.per_page + 1
+        rows = []
+        for queryset, id_field in self.sources:
+            if pub_date is None:
+                queryset = queryset.order_by('-pub_date', f'-{id_field}')
+            else:
+                queryset = seek(queryset, direction, pub_date, pk, id_field)
+            rows.append(list(
+                queryset.values_list('pub_date', id_field)[:limit]))
+
+        keys = []
+        for key in merge(*rows, reverse=direction == FORWARD):
+            # Пост автора, перешедшего на сборку при чтении, может
+            # прийти и из ленты, и из его постов.
+            if not keys or keys[-1] != key:
+                keys.append(key)
+            if len(keys) == limit:
+                break
+        return keys
+
+    def _keys_page(self, keys, has_previous, has_next=None):
+        if has_next is None:
+            has_next = len(keys) > self.per_page
+        keys = keys[:self.per_page]
+        posts = self.object_list.in_bulk([pk for _, pk in keys])
+        return self._get_page(
+            [posts[pk] for _, pk in keys if pk in posts], None, self,
+            has_next=has_next, has_previous=has_previous)
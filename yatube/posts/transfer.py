@@ -0,0 +1,233 @@
+import csv
+import json
+from itertools import islice
+
+from django.contrib.auth.hashers import make_password
+from django.db import transaction
+from django.utils import timezone
+from django.utils.dateparse import parse_datetime
+
+from .models import AuthorCounter, Group, Post, User
+
+CHUNK_SIZE = 5000
+FORMATS = ('jsonl', 'csv')
+
+FIELDS = {
+    'users': ('username', 'first_name', 'last_name', 'email', 'date_joined'),
+    'groups': ('slug', 'title', 'description'),
+    'posts': ('id', 'text', 'pub_date', 'author', 'group'),
+}
+
+
+class TransferError(Exception):
+    """Запись нельзя импортировать; `line` - ее номер, начиная с 1."""
+
+    def __init__(self, line, message):
+        super().__init__(f'Запись {line}: {message}')
+        self.line = line
+
+
+class RecordConflict(ValueError):
+    """Запись пачки под номером `index` (с 0) конфликтует с базой."""
+
+    def __init__(self, index, message):
+        super().__init__(message)
+        self.index = index
+
+
+def guess_format(path):
+    return 'csv' if path.lower().endswith('.csv') else 'jsonl'
+
+
+def _isoformat(value):
+    return value.isoformat() if value is not None else ''
+
+
+def export_records(model):
+    """Записи модели по порядку pk; в памяти не больше одной пачки."""
+    if model == 'users':
+        rows = User.objects.order_by('pk').values_list(*FIELDS['users'])
+        convert = {'date_joined': _isoformat}
+    elif model == 'groups':
+        rows = Group.objects.order_by('pk').values_list(*FIELDS['groups'])
+        convert = {}
+    else:
+        rows = Post.objects.order_by('pk').values_list(
+            'pk', 'text', 'pub_date', 'author__username', 'group__slug')
+        convert = {'pub_date': _isoformat, 'group': lambda slug: slug or ''}
+
+    for row in rows.iterator(chunk_size=CHUNK_SIZE):
+        record = dict(zip(FIELDS[model], row))
+        for field, function in convert.items():
+            record[field] = function(record[field])
+        yield record
+
+
+def write_records(model, records, stream, fmt):
+    """Пишет записи в поток построчно и возвращает их число."""
+    written = 0
+    if fmt == 'csv':
+        writer = csv.DictWriter(stream, FIELDS[model])
+        writer.writeheader()
+        write = writer.writerow
+    else:
+        def write(record):
+            stream.write(json.dumps(record, ensure_ascii=False) + '\n')
+
+    for record in records:
+        write(record)
+        written += 1
+    return written
+
+
+def read_records(stream, fmt):
+    """Записи из потока по одной; пустые строки JSONL не считаются."""
+    if fmt == 'csv':
+        yield from csv.DictReader(stream)
+        return
+    number = 0
+    for line in stream:
+        if not line.strip():
+            continue
+        number += 1
+        try:
+            yield json.loads(line)
+        except ValueError as error:
+            raise TransferError(number, error) from error
+
+
+class UserImporter:
+    """Пользователи создаются без пароля; существующие не меняются."""
+
+    def __init__(self):
+        self.password = make_password(None)
+
+    def build(self, record):
+        if not record.get('username'):
+            raise ValueError('нет username')
+        return User(
+            username=record['username'],
+            first_name=record.get('first_name') or '',
+            last_name=record.get('last_name') or '',
+            email=record.get('email') or '',
+            date_joined=(
+                parse_datetime(record.get('date_joined') or '')
+                or timezone.now()),
+            password=self.password,
+        )
+
+    def save(self, users):
+        User.objects.bulk_create(users, ignore_conflicts=True)
+        # bulk_create не вызывает сигналы, счетчики создаем сами.
+        missing = User.objects.filter(
+            username__in=[user.username for user in users],
+            counter__isnull=True,
+        ).values_list('pk', flat=True)
+        AuthorCounter.objects.bulk_create(
+            [AuthorCounter(author_id=pk) for pk in missing],
+            ignore_conflicts=True)
+
+
+class GroupImporter:
+    """Группы с уже занятым slug пропускаются."""
+
+    def build(self, record):
+        if not record.get('slug') or not record.get('title'):
+            raise ValueError('нет slug или title')
+        return Group(
+            slug=record['slug'],
+            title=record['title'],
+            description=record.get('description') or '',
+        )
+
+    def save(self, groups):
+        Group.objects.bulk_create(groups, ignore_conflicts=True)
+
+
+class PostImporter:
+    """Автор и группа ищутся по username и slug в словарях в памяти.
+
+    Посты с id, который уже есть в базе, пропускаются, если совпадают
+    с записью, поэтому повторный импорт того же файла ничего не
+    дублирует. Другой пост под тем же id останавливает загрузку.
+    """
+
+    def __init__(self):
+        self.users = dict(
+            User.objects.values_list('username', 'pk').iterator())
+        self.groups = dict(Group.objects.values_list('slug', 'pk'))
+
+    def build(self, record):
+        if not record.get('text'):
+            raise ValueError('нет текста')
+        author_id = self.users.get(record.get('author'))
+        if author_id is None:
+            raise ValueError(f'нет пользователя {record.get("author")!r}')
+        group_id = None
+        if record.get('group'):
+            group_id = self.groups.get(record['group'])
+            if group_id is None:
+                raise ValueError(f'нет группы {record["group"]!r}')
+        return Post(
+            pk=int(record['id']) if record.get('id') else None,
+            text=record['text'],
+            pub_date=(
+                parse_datetime(record.get('pub_date') or '')
+                or timezone.now()),
+            author_id=author_id,
+            group_id=group_id,
+        )
+
+    def save(self, posts):
+        ids = [post.pk for post in posts if post.pk]
+        existing = {
+            pk: row for pk, *row in Post.objects.filter(pk__in=ids)
+            .values_list('pk', 'text', 'author_id', 'pub_date').iterator()
+        }
+        for index, post in enumerate(posts):
+            row = existing.get(post.pk)
+            if row is not None and row != [
+                    post.text, post.author_id, post.pub_date]:
+                raise RecordConflict(
+                    index, f'id {post.pk} занят другим постом')
+        Post.objects.bulk_create(
+            (post for post in posts if post.pk not in existing),
+            keep_pub_date=True)
+
+
+IMPORTERS = {
+    'users': UserImporter,
+    'groups': GroupImporter,
+    'posts': PostImporter,
+}
+
+
+def import_records(model, records, skip=0, on_chunk=None):
+    """Импортирует записи пачками, каждую пачку в своей транзакции.
+
+    Первые `skip` записей пропускаются (продолжение прерванного
+    импорта). После каждой сохраненной пачки вызывается
+    `on_chunk(done)` с числом обработанных записей. Возвращает итоговое
+    число обработанных записей.
+    """
+    importer = IMPORTERS[model]()
+    records = islice(records, skip, None)
+    done = skip
+    while True:
+        chunk = list(islice(records, CHUNK_SIZE))
+        if not chunk:
+            return done
+        objs = []
+        for line, record in enumerate(chunk, done + 1):
+            try:
+                objs.append(importer.build(record))
+            except (TypeError, ValueError) as error:
+                raise TransferError(line, error) from error
+        try:
+            with transaction.atomic():
+                importer.save(objs)
+        except RecordConflict as error:
+            raise TransferError(done + 1 + error.index, error) from error
+        done += len(chunk)
+        if on_chunk is not None:
+            on_chunk(done)
@@ -1,63 +1,177 @@
+from urllib.parse import urlencode
+
 from django.contrib.auth.decorators import login_required
-from django.core.paginator import Paginator
 from django.shortcuts import get_object_or_404, redirect, render
 
+from core.db import replica_reads
+
+from .cache import (FEED, HEADER_HOLE, attach_card_versions,
+                    cache_feed_page, cached_feed_page, conditional_page,
+                    feed_page_key, post_scopes)
+from .counters import author_counter, total_posts
 from .forms import PostForm
-from .models import Group, Post, User
+from .models import Follow, Group, Post, User
+from .paginators import CursorPaginator
+from .search import search_page
+from .timeline import TimelinePaginator
 
 VISIBLE_POSTCOUNT: int = 10
 
 
+def group_scopes(slug):
+    group_id = Group.objects.filter(slug=slug).values_list(
+        'pk', flat=True).first()
+    return None if group_id is None else [('group', group_id)]
+
+
+def profile_scopes(username):
+    author_id = User.objects.filter(username=username).values_list(
+        'pk', flat=True).first()
+    return None if author_id is None else [('author', author_id)]
+
+
+def post_detail_scopes(post_id):
+    ids = Post.objects.filter(pk=post_id).values_list(
+        'author_id', 'group_id').first()
+    return None if ids is None else post_scopes(post_id, *ids)
+
+
+@replica_reads
+@conditional_page(lambda: [FEED])
 def index(request):
-    posts = Post.objects.all().order_by('-pub_date')
-    page_obj = paginator_page_obj(posts, request)
+    page_key = feed_page_key(request, [FEED])
+    response = cached_feed_page(page_key, request)
+    if response is not None:
+        return response
+
+    posts = Post.objects.for_feed()
+    page_obj = paginator_page_obj(posts, request, total_posts)
 
     context = {
         'page_obj': page_obj,
+        'header_hole': HEADER_HOLE,
     }
-    return render(request, 'posts/index.html', context)
+    return cache_feed_page(
+        page_key, render(request, 'posts/index.html', context), request)
 
 
+@replica_reads
+@conditional_page(group_scopes)
 def group_posts(request, slug):
 
     group = get_object_or_404(Group, slug=slug)
-    posts = group.posts.all()
-    page_obj = paginator_page_obj(posts, request)
+    page_key = feed_page_key(request, [('group', group.pk)])
+    response = cached_feed_page(page_key, request)
+    if response is not None:
+        return response
+
+    posts = group.posts.for_feed()
+    page_obj = paginator_page_obj(posts, request, group.posts_count)
 
     context = {
         'group': group,
         'page_obj': page_obj,
+        'header_hole': HEADER_HOLE,
     }
-    return render(request, 'posts/group_list.html', context)
+    return cache_feed_page(
+        page_key, render(request, 'posts/group_list.html', context),
+        request)
 
 
+@replica_reads
+@conditional_page(profile_scopes)
 def profile(request, username):
-    author = get_object_or_404(User, username=username)
-    posts = author.posts.all()
-    page_obj = paginator_page_obj(posts, request)
-
+    author = get_object_or_404(
+        User.objects.select_related('counter'), username=username)
+    # Кнопка подписки своя у каждого пользователя.
+    page_key = feed_page_key(
+        request, [('author', author.pk)], anonymous_only=True)
+    response = cached_feed_page(page_key, request)
+    if response is not None:
+        return response
+
+    posts_count = author_counter(author).posts_count
+    posts = author.posts.for_feed()
+    page_obj = paginator_page_obj(posts, request, posts_count)
+
+    following = (
+        request.user.is_authenticated
+        and request.user != author
+        and Follow.objects.filter(user=request.user, author=author).exists()
+    )
     context = {
         'author': author,
+        'posts_count': posts_count,
         'page_obj': page_obj,
-
+        'following': following,
+        'header_hole': HEADER_HOLE,
     }
-    return render(request, 'posts/profile.html', context)
+    return cache_feed_page(
+        page_key, render(request, 'posts/profile.html', context), request)
 
 
+@replica_reads
+@conditional_page(post_detail_scopes)
 def post_detail(request, post_id):
-    post = get_object_or_404(Post, id=post_id)
+    post = get_object_or_404(
+        Post.objects.select_related('author__counter', 'group'),
+        id=post_id)
     context = {
         'post': post,
+        'author_posts_count': author_counter(post.author).posts_count,
     }
     template = 'posts/post_detail.html'
 
     return render(request, template, context)
 
 
+def search(request):
+    query = request.GET.get('q', '').strip()
+    page_obj = None
+    if query:
+        page_obj = search_page(
+            query, request.GET.get('cursor'), VISIBLE_POSTCOUNT)
+        attach_card_versions(page_obj.object_list)
+
+    context = {
+        'query': query,
+        'page_obj': page_obj,
+        'page_query': urlencode({'q': query}),
+    }
+    return render(request, 'posts/search.html', context)
+
+
+@login_required
+def follow_index(request):
+    paginator = TimelinePaginator(request.user, VISIBLE_POSTCOUNT)
+    page_obj = paginator.get_cursor_page(request.GET.get('cursor'))
+    attach_card_versions(page_obj.object_list)
+
+    context = {
+        'page_obj': page_obj,
+    }
+    return render(request, 'posts/follow.html', context)
+
+
+@login_required
+def profile_follow(request, username):
+    author = get_object_or_404(User, username=username)
+    if author != request.user:
+        Follow.objects.get_or_create(user=request.user, author=author)
+    return redirect('posts:profile', username)
+
+
+@login_required
+def profile_unfollow(request, username):
+    Follow.objects.filter(
+        user=request.user, author__username=username).delete()
+    return redirect('posts:profile', username)
+
+
 @login_required
 def post_create(request):
 
-    form = PostForm(request.POST or None)
+    form = PostForm(request.POST or None, files=request.FILES or None)
 
     if form.is_valid():
         post = form.save(commit=False)
@@ -77,7 +191,8 @@ def post_edit(request, post_id):
     post = get_object_or_404(Post, pk=post_id)
     if post.author != request.user:
         return redirect('posts:post_detail', post_id)
-    form = PostForm(request.POST or None, instance=post)
+    form = PostForm(
+        request.POST or None, files=request.FILES or None, instance=post)
 
     if form.is_valid():
         form.save()
@@ -89,7 +204,12 @@ def post_edit(request, post_id):
     return render(request, 'posts/create.html', context)
 
 
-def paginator_page_obj(posts, request):
-    paginator = Paginator(posts, VISIBLE_POSTCOUNT)
+def paginator_page_obj(posts, request, count=None):
+    paginator = CursorPaginator(posts, VISIBLE_POSTCOUNT, count=count)
     page_number = request.GET.get('page')
-    return paginator.get_page(page_number)
+    if page_number and 'cursor' not in request.GET:
+        page_obj = paginator.get_page(page_number)
+    else:
+        page_obj = paginator.get_cursor_page(request.GET.get('cursor'))
+    attach_card_versions(page_obj.object_list)
+    return page_obj
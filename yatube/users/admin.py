@@ -0,0 +1,77 @@
+from django.contrib import admin, messages
+from django.contrib.admin import helpers
+from django.contrib.auth import get_user_model
+from django.contrib.auth.admin import UserAdmin as BaseUserAdmin
+from django.template.response import TemplateResponse
+
+from .deletion import schedule_deletion
+from .models import UserDeletion
+
+User = get_user_model()
+
+
+class UserAdmin(BaseUserAdmin):
+    actions = ('delete_in_background',)
+
+    def has_delete_permission(self, request, obj=None):
+        # Коллектор удаления загрузил бы все посты пользователя разом и
+        # держал бы одну долгую транзакцию; удаляем только в фоне.
+        return False
+
+    def has_background_delete_permission(self, request):
+        return super().has_delete_permission(request)
+
+    def delete_in_background(self, request, queryset):
+        if not request.POST.get('apply'):
+            return TemplateResponse(
+                request, 'admin/auth/user/delete_in_background.html', {
+                    **self.admin_site.each_context(request),
+                    'opts': self.model._meta,
+                    'title': 'Удаление пользователей в фоне',
+                    'users': queryset.select_related('counter'),
+                    'action_checkbox_name': helpers.ACTION_CHECKBOX_NAME,
+                    'selected': request.POST.getlist(
+                        helpers.ACTION_CHECKBOX_NAME),
+                    'select_across':
+                        request.POST.get('select_across') == '1',
+                })
+        number = schedule_deletion(queryset)
+        self.message_user(
+            request,
+            f'Аккаунты заблокированы, удаление запущено: {number}. '
+            f'Ход удаления - в разделе «Удаления пользователей».',
+            messages.SUCCESS,
+        )
+
+    delete_in_background.short_description = 'Удалить в фоне'
+    delete_in_background.allowed_permissions = ('background_delete',)
+
+
+class UserDeletionAdmin(admin.ModelAdmin):
+    list_display = (
+        'username',
+        'requested_at',
+        'progress',
+        'finished_at',
+    )
+    readonly_fields = list_display
+    fields = list_display
+
+    def progress(self, obj):
+        return f'{obj.posts_deleted} / {obj.posts_total}'
+
+    progress.short_description = 'Удалено постов'
+
+    def has_add_permission(self, request):
+        return False
+
+    def has_change_permission(self, request, obj=None):
+        return False
+
+    def has_delete_permission(self, request, obj=None):
+        return False
+
+
+admin.site.unregister(User)
+admin.site.register(User, UserAdmin)
+admin.site.register(UserDeletion, UserDeletionAdmin)
@@ -0,0 +1,31 @@
+from django.contrib.auth.backends import ModelBackend
+from django.core.cache import caches
+
+USER_CACHE_TIMEOUT = 60 * 60
+
+
+def user_cache_key(user_id):
+    return f'users:user:{user_id}'
+
+
+class CachedModelBackend(ModelBackend):
+    """ModelBackend, который берет пользователя сессии из кеша.
+
+    Запись сбрасывается сигналами при любом сохранении или удалении
+    пользователя, в том числе при смене пароля. Сброс виден другим
+    процессам только через общий кеш, поэтому в настройках бэкенд
+    включается лишь при SHARED_CACHE.
+    """
+
+    cache_alias = 'default'
+
+    def get_user(self, user_id):
+        cache = caches[self.cache_alias]
+        key = user_cache_key(user_id)
+        user = cache.get(key)
+        if user is None:
+            user = super().get_user(user_id)
+            if user is not None:
+                cache.set(key, user, USER_CACHE_TIMEOUT)
+            return user
+        return user if self.user_can_authenticate(user) else None
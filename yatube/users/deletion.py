@@ -0,0 +1,89 @@
+import logging
+
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.db import transaction
+from django.utils import timezone
+
+from core.tasks import task
+from posts.bulk import CHUNK_SIZE, delete_posts
+from posts.models import AuthorCounter, Follow, Post, TimelineEntry
+
+from .backends import user_cache_key
+from .models import UserDeletion
+
+User = get_user_model()
+logger = logging.getLogger(__name__)
+
+
+def schedule_deletion(users):
+    """Сразу блокирует аккаунты и ставит их удаление в очередь.
+
+    Посты удаляются потом, в обработчике очереди задач, небольшими
+    транзакциями. Возвращает число пользователей.
+    """
+    users = list(users.values_list('pk', 'username'))
+    counts = dict(AuthorCounter.objects.filter(
+        author_id__in=[pk for pk, _ in users]
+    ).values_list('author_id', 'posts_count'))
+    with transaction.atomic():
+        User.objects.filter(pk__in=[pk for pk, _ in users]).update(
+            is_active=False)
+        UserDeletion.objects.bulk_create(
+            [
+                UserDeletion(
+                    user_id=pk, username=username,
+                    posts_total=counts.get(pk, 0))
+                for pk, username in users
+            ],
+            ignore_conflicts=True,
+        )
+        for pk, _ in users:
+            process_deletion.delay(pk)
+    # update() не вызывает сигналы: пользователь из кеша был бы активен.
+    cache.delete_many([user_cache_key(pk) for pk, _ in users])
+    return len(users)
+
+
+def _delete_in_chunks(queryset):
+    """Удаляет строки пачками по pk, каждую пачку в своей транзакции."""
+    model = queryset.model
+    pks = queryset.values_list('pk', flat=True)
+    while True:
+        chunk = list(pks[:CHUNK_SIZE])
+        if not chunk:
+            return
+        with transaction.atomic():
+            model.objects.filter(pk__in=chunk).delete()
+
+
+@task(lease=60 * 60)
+def process_deletion(user_id):
+    """Удаляет посты, подписки и сам аккаунт по заявке.
+
+    Можно вызывать повторно после сбоя: продолжит с того же места.
+    """
+    deletion = UserDeletion.objects.filter(
+        user_id=user_id, finished_at=None).first()
+    if deletion is None:
+        return
+    deleted_before = deletion.posts_deleted
+
+    def progress(done):
+        deletion.posts_deleted = deleted_before + done
+        UserDeletion.objects.filter(pk=deletion.pk).update(
+            posts_deleted=deletion.posts_deleted)
+
+    delete_posts(Post.objects.filter(author_id=deletion.user_id), progress)
+    # Подписки удаляются с сигналами: они правят счетчики подписчиков.
+    _delete_in_chunks(Follow.objects.filter(user_id=deletion.user_id))
+    _delete_in_chunks(Follow.objects.filter(author_id=deletion.user_id))
+    _delete_in_chunks(
+        TimelineEntry.objects.filter(user_id=deletion.user_id))
+    with transaction.atomic():
+        User.objects.filter(pk=deletion.user_id).delete()
+        deletion.finished_at = timezone.now()
+        UserDeletion.objects.filter(pk=deletion.pk).update(
+            finished_at=deletion.finished_at)
+    logger.info('Пользователь %s удален, постов: %d',
+                deletion.username, deletion.posts_deleted)
@@ -0,0 +1,24 @@
+from django.db import models
+
+
+class UserDeletion(models.Model):
+    """Заявка на фоновое удаление пользователя и ход ее выполнения.
+
+    Ссылается на пользователя обычным числом, а не ключом, чтобы
+    пережить удаление аккаунта и остаться в журнале.
+    """
+
+    user_id = models.PositiveIntegerField('Пользователь', unique=True)
+    username = models.CharField('Имя пользователя', max_length=150)
+    requested_at = models.DateTimeField('Запрошено', auto_now_add=True)
+    finished_at = models.DateTimeField('Завершено', null=True, blank=True)
+    posts_total = models.PositiveIntegerField('Постов', default=0)
+    posts_deleted = models.PositiveIntegerField('Удалено постов', default=0)
+
+    class Meta:
+        ordering = ('-requested_at',)
+        verbose_name = 'Удаление пользователя'
+        verbose_name_plural = 'Удаления пользователей'
+
+    def __str__(self):
+        return self.username
@@ -0,0 +1,126 @@
+import shutil
+import tempfile
+from importlib import import_module
+
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.core.cache import cache, caches
+from django.db import connection
+from django.test import TestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+
+from users.backends import CachedModelBackend
+
+User = get_user_model()
+
+SHARED_CACHE_DIR = tempfile.mkdtemp()
+
+
+def file_cache():
+    return {
+        'BACKEND': 'django.core.cache.backends.filebased.FileBasedCache',
+        'LOCATION': SHARED_CACHE_DIR,
+    }
+
+
+# Два объекта кеша над одним каталогом - кеши двух процессов.
+@override_settings(
+    CACHES={'default': file_cache(), 'other_worker': file_cache()},
+    SHARED_CACHE=True,
+    SESSION_ENGINE='django.contrib.sessions.backends.cached_db',
+    AUTHENTICATION_BACKENDS=['users.backends.CachedModelBackend'],
+)
+class CachedSessionUserTests(TestCase):
+    """Сессия и пользователь берутся из общего кеша, а не из базы."""
+
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.user = User.objects.create_user(
+            username='HasNoName', password='old-password')
+
+    @classmethod
+    def tearDownClass(cls):
+        super().tearDownClass()
+        shutil.rmtree(SHARED_CACHE_DIR, ignore_errors=True)
+
+    def setUp(self):
+        cache.clear()
+        self.client.force_login(self.user)
+
+    def other_worker_backend(self):
+        backend = CachedModelBackend()
+        backend.cache_alias = 'other_worker'
+        return backend
+
+    def test_feed_skips_session_and_user_queries(self):
+        """Повторный запрос не читает сессию и пользователя из базы."""
+
+        url = reverse('posts:index')
+        self.client.get(url)
+        with CaptureQueriesContext(connection) as context:
+            response = self.client.get(url)
+        self.assertTrue(response.context['user'].is_authenticated)
+        for query in context.captured_queries:
+            with self.subTest(sql=query['sql']):
+                self.assertNotIn('FROM "django_session"', query['sql'])
+                self.assertNotIn('FROM "auth_user" WHERE', query['sql'])
+
+    def test_user_change_expires_cache(self):
+        """Изменение пользователя сбрасывает его запись в кеше."""
+
+        backend = CachedModelBackend()
+        backend.get_user(self.user.pk)
+        self.user.first_name = 'Новое имя'
+        self.user.save()
+        self.assertEqual(
+            backend.get_user(self.user.pk).first_name, 'Новое имя')
+
+    def test_password_change_logs_out_sessions(self):
+        """Смена пароля завершает сессии, несмотря на кеш."""
+
+        url = reverse('posts:index')
+        self.client.get(url)
+        self.user.set_password('new-password')
+        self.user.save()
+        response = self.client.get(url)
+        self.assertFalse(response.context['user'].is_authenticated)
+
+    def test_deactivation_reaches_other_worker(self):
+        """Блокировку в одном процессе видит кеш другого процесса."""
+
+        backend = self.other_worker_backend()
+        self.assertEqual(backend.get_user(self.user.pk), self.user)
+        user = User.objects.get(pk=self.user.pk)
+        user.is_active = False
+        user.save()
+        self.assertIsNone(backend.get_user(self.user.pk))
+
+    def test_logout_reaches_other_worker(self):
+        """Сессия, завершенная в одном процессе, не читается в другом."""
+
+        engine = import_module(settings.SESSION_ENGINE)
+        session_key = self.client.session.session_key
+        other = engine.SessionStore(session_key)
+        other._cache = caches['other_worker']
+        self.assertTrue(other.load())
+
+        self.client.logout()
+        other = engine.SessionStore(session_key)
+        other._cache = caches['other_worker']
+        self.assertEqual(other.load(), {})
+
+
+class LocalCacheSettingsTests(TestCase):
+
+    def test_local_cache_reads_sessions_from_database(self):
+        """Без общего кеша сессии и пользователь читаются из базы."""
+
+        if settings.SHARED_CACHE:
+            self.skipTest('Настроен общий кеш.')
+        self.assertEqual(
+            settings.SESSION_ENGINE, 'django.contrib.sessions.backends.db')
+        self.assertEqual(
+            settings.AUTHENTICATION_BACKENDS,
+            ['django.contrib.auth.backends.ModelBackend'])
@@ -0,0 +1,98 @@
+from io import StringIO
+from unittest.mock import patch
+
+from django.contrib.admin import helpers
+from django.contrib.auth import get_user_model
+from django.contrib.auth.models import Permission
+from django.core.management import call_command
+from django.test import TestCase
+from django.urls import reverse
+
+from posts.models import AuthorCounter, Follow, Post, TimelineEntry
+from core.tasks import run_pending
+from users.deletion import schedule_deletion
+from users.models import UserDeletion
+
+User = get_user_model()
+
+
+class UserDeletionTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.admin = User.objects.create_superuser(
+            username='admin', email='admin@example.com', password='pass')
+        cls.author = User.objects.create_user(username='prolific')
+        cls.reader = User.objects.create_user(username='reader')
+        Follow.objects.create(user=cls.reader, author=cls.author)
+        Follow.objects.create(user=cls.author, author=cls.admin)
+        Post.objects.bulk_create(
+            Post(text=f'Пост {number}', author=cls.author)
+            for number in range(7)
+        )
+        Post.objects.create(text='Пост админа', author=cls.admin)
+
+    def test_schedule_blocks_account_and_keeps_posts(self):
+        schedule_deletion(User.objects.filter(pk=self.author.pk))
+        self.author.refresh_from_db()
+        self.assertFalse(self.author.is_active)
+        deletion = UserDeletion.objects.get(user_id=self.author.pk)
+        self.assertEqual(deletion.posts_total, 7)
+        self.assertIsNone(deletion.finished_at)
+        self.assertEqual(Post.objects.filter(author=self.author).count(), 7)
+
+    @patch('users.deletion.CHUNK_SIZE', 2)
+    @patch('posts.bulk.CHUNK_SIZE', 2)
+    def test_process_deletes_posts_follows_and_user(self):
+        schedule_deletion(User.objects.filter(pk=self.author.pk))
+        run_pending()
+
+        deletion = UserDeletion.objects.get(user_id=self.author.pk)
+        self.assertIsNotNone(deletion.finished_at)
+        self.assertEqual(deletion.posts_deleted, 7)
+        self.assertFalse(User.objects.filter(pk=self.author.pk).exists())
+        self.assertEqual(Post.objects.count(), 1)
+        self.assertFalse(TimelineEntry.objects.filter(
+            user=self.reader).exists())
+        self.assertFalse(Follow.objects.exists())
+        self.assertEqual(
+            AuthorCounter.objects.get(author=self.admin).followers_count, 0)
+
+    def test_admin_action_and_progress(self):
+        self.client.force_login(self.admin)
+        data = {
+            'action': 'delete_in_background',
+            helpers.ACTION_CHECKBOX_NAME: [self.author.pk],
+        }
+        response = self.client.post(
+            reverse('admin:auth_user_changelist'), data)
+        self.assertTemplateUsed(
+            response, 'admin/auth/user/delete_in_background.html')
+        self.assertContains(response, 'prolific: 7')
+        self.assertFalse(UserDeletion.objects.exists())
+        self.assertTrue(User.objects.get(pk=self.author.pk).is_active)
+
+        self.client.post(
+            reverse('admin:auth_user_changelist'), {**data, 'apply': 'yes'})
+        self.assertTrue(
+            UserDeletion.objects.filter(user_id=self.author.pk).exists())
+        call_command('run_tasks', '--once', stdout=StringIO())
+        response = self.client.get(
+            reverse('admin:users_userdeletion_changelist'))
+        self.assertContains(response, '7 / 7')
+
+    def test_action_requires_delete_permission(self):
+        """Сотрудник без права удаления не видит действие."""
+        staff = User.objects.create_user(username='staff', is_staff=True)
+        staff.user_permissions.add(
+            Permission.objects.get(codename='view_user'))
+        self.client.force_login(staff)
+        response = self.client.get(reverse('admin:auth_user_changelist'))
+        self.assertNotContains(response, 'delete_in_background')
+
+        self.client.post(reverse('admin:auth_user_changelist'), {
+            'action': 'delete_in_background',
+            helpers.ACTION_CHECKBOX_NAME: [self.author.pk],
+            'apply': 'yes',
+        })
+        self.assertFalse(UserDeletion.objects.exists())
+        self.assertTrue(User.objects.get(pk=self.author.pk).is_active)
@@ -40,6 +40,7 @@ INSTALLED_APPS = [
     'users.apps.UsersConfig',
     'core.apps.CoreConfig',
     'about.apps.AboutConfig',
+    'api.apps.ApiConfig',
     'django.contrib.admin',
     'django.contrib.auth',
     'django.contrib.contenttypes',
@@ -51,10 +52,12 @@ INSTALLED_APPS = [
 
 MIDDLEWARE = [
     'django.middleware.security.SecurityMiddleware',
+    'core.middleware.RequestTimingMiddleware',
     'django.contrib.sessions.middleware.SessionMiddleware',
     'django.middleware.common.CommonMiddleware',
     'django.middleware.csrf.CsrfViewMiddleware',
     'django.contrib.auth.middleware.AuthenticationMiddleware',
+    'core.middleware.ReadAfterWriteMiddleware',
     'django.contrib.messages.middleware.MessageMiddleware',
     'django.middleware.clickjacking.XFrameOptionsMiddleware',
 ]
@@ -62,12 +65,21 @@ MIDDLEWARE = [
 ROOT_URLCONF = 'yatube.urls'
 
 TEMPLATES_DIR = os.path.join(BASE_DIR, 'templates')
+TEMPLATE_LOADERS = [
+    'django.template.loaders.filesystem.Loader',
+    'django.template.loaders.app_directories.Loader',
+]
+# Без отладки шаблоны компилируются один раз на процесс.
+if not DEBUG:
+    TEMPLATE_LOADERS = [
+        ('django.template.loaders.cached.Loader', TEMPLATE_LOADERS),
+    ]
 TEMPLATES = [
     {
-        'BACKEND': 'django.template.backends.django.DjangoTemplates',
+        'BACKEND': 'core.template_backends.TimedDjangoTemplates',
         'DIRS': [TEMPLATES_DIR],
-        'APP_DIRS': True,
         'OPTIONS': {
+            'loaders': TEMPLATE_LOADERS,
             'context_processors': [
                 'django.template.context_processors.debug',
                 'django.template.context_processors.request',
@@ -85,13 +97,110 @@ WSGI_APPLICATION = 'yatube.wsgi.application'
 # Database
 # https://docs.djangoproject.com/en/2.2/ref/settings/#databases
 
+# Параметры базы берутся из окружения; без них используется SQLite.
+# DB_CONN_MAX_AGE держит соединение открытым между запросами (0 - закрывать).
+
+DB_ENGINE = os.environ.get('DB_ENGINE', 'django.db.backends.sqlite3')
+
 DATABASES = {
     'default': {
-        'ENGINE': 'django.db.backends.sqlite3',
-        'NAME': os.path.join(BASE_DIR, 'db.sqlite3'),
+        'ENGINE': DB_ENGINE,
+        'NAME': os.environ.get('DB_NAME', os.path.join(BASE_DIR, 'db.sqlite3')),
+        'USER': os.environ.get('DB_USER', ''),
+        'PASSWORD': os.environ.get('DB_PASSWORD', ''),
+        'HOST': os.environ.get('DB_HOST', ''),
+        'PORT': os.environ.get('DB_PORT', ''),
+        'CONN_MAX_AGE': int(os.environ.get('DB_CONN_MAX_AGE', 60)),
     }
 }
 
+# Настройки каждого нового соединения с SQLite (core.db.tune_sqlite):
+# WAL не блокирует читателей во время записи, synchronous=NORMAL
+# достаточно для WAL, busy_timeout ждет блокировку вместо ошибки.
+# SQLITE_TUNED=0 возвращает поведение SQLite по умолчанию.
+
+SQLITE_PRAGMAS = {
+    'journal_mode': 'WAL',
+    'synchronous': 'NORMAL',
+    'mmap_size': 256 * 1024 * 1024,
+    'busy_timeout': 20000,
+} if os.environ.get('SQLITE_TUNED', '1') == '1' else {}
+
+if DB_ENGINE == 'django.db.backends.sqlite3':
+    DATABASES['default']['OPTIONS'] = {'timeout': 20}
+
+# Реплики для чтения: DB_REPLICAS - имена баз (для SQLite - пути к
+# файлам) через запятую, остальные параметры как у default. Ленты и
+# страница поста читают из реплик (core.db.replica_reads), а сессия,
+# которая писала, REPLICA_LAG_WINDOW секунд читает из default. Локально
+# реплики SQLite обновляет команда sync_replicas.
+
+REPLICA_DATABASES = []
+
+for number, name in enumerate(
+        filter(None, os.environ.get('DB_REPLICAS', '').split(',')), 1):
+    alias = f'replica{number}'
+    DATABASES[alias] = {
+        **DATABASES['default'],
+        'NAME': name,
+        'TEST': {'MIRROR': 'default'},
+    }
+    REPLICA_DATABASES.append(alias)
+
+DATABASE_ROUTERS = ['core.db.ReplicaRouter']
+
+REPLICA_LAG_WINDOW = int(os.environ.get('DB_REPLICA_LAG_WINDOW', 10))
+
+
+# Cache
+# https://docs.djangoproject.com/en/2.2/topics/cache/
+# По умолчанию кеш в памяти процесса; YATUBE_CACHE_DIR включает файловый
+# кеш, общий для всех процессов на одной машине.
+#
+# Сброс кеша лент, карточек и условного GET (posts.cache) меняет версии
+# только в этом кеше. С кешем в памяти другие процессы сброса не видят
+# и бессрочно отдают старые страницы и 304, поэтому он годится лишь для
+# одного процесса: под несколькими воркерами нужен YATUBE_CACHE_DIR
+# или другой общий бэкенд.
+
+YATUBE_CACHE_DIR = os.environ.get('YATUBE_CACHE_DIR')
+
+if YATUBE_CACHE_DIR:
+    CACHES = {
+        'default': {
+            'BACKEND': 'django.core.cache.backends.filebased.FileBasedCache',
+            'LOCATION': YATUBE_CACHE_DIR,
+        }
+    }
+else:
+    CACHES = {
+        'default': {
+            'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+            'LOCATION': 'yatube',
+        }
+    }
+
+# Кеш общий для всех процессов. С другим общим бэкендом (memcached,
+# redis) вместе с CACHES нужно выставить и SHARED_CACHE = True.
+
+SHARED_CACHE = bool(YATUBE_CACHE_DIR)
+
+# С общим кешем сессии читаются из кеша и только при промахе из базы,
+# а пользователь сессии тоже берется из кеша (users.backends). С кешем
+# в памяти процесса выход, смену пароля и блокировку увидел бы только
+# тот процесс, где они произошли, поэтому сессии читаются из базы.
+# SESSION_ENGINE позволяет выбрать, например, подписанные cookie
+# (django.contrib.sessions.backends.signed_cookies) без базы вовсе.
+
+if SHARED_CACHE:
+    SESSION_ENGINE = os.environ.get(
+        'SESSION_ENGINE', 'django.contrib.sessions.backends.cached_db')
+    AUTHENTICATION_BACKENDS = ['users.backends.CachedModelBackend']
+else:
+    SESSION_ENGINE = os.environ.get(
+        'SESSION_ENGINE', 'django.contrib.sessions.backends.db')
+    AUTHENTICATION_BACKENDS = ['django.contrib.auth.backends.ModelBackend']
+
 
 # Password validation
 # https://docs.djangoproject.com/en/2.2/ref/settings/#auth-password-validators
@@ -137,12 +246,47 @@ STATIC_URL = '/static/'
 
 STATICFILES_DIRS = (os.path.join(BASE_DIR, 'static'),)
 
+MEDIA_URL = '/media/'
+
+MEDIA_ROOT = os.path.join(BASE_DIR, 'media')
+
+
+def profile_url(user):
+    """user.get_absolute_url() для шаблонов: адрес профиля автора."""
+    # Импорт при вызове: настройки не должны зависеть от кода приложений.
+    from core.reverse import cached_reverse
+    return cached_reverse('posts:profile', user.username)
+
+
+ABSOLUTE_URL_OVERRIDES = {'auth.user': profile_url}
+
 LOGIN_URL = 'users:login'
 LOGIN_REDIRECT_URL = 'posts:index'
 
 
-EMAIL_BACKEND = 'django.core.mail.backends.filebased.EmailBackend'
+# Письма уходят в очередь задач, а отправляет их TASK_EMAIL_BACKEND
+# в обработчике очереди (manage.py run_tasks).
+EMAIL_BACKEND = 'core.mail.QueuedEmailBackend'
+TASK_EMAIL_BACKEND = 'django.core.mail.backends.filebased.EmailBackend'
 # указываем директорию, в которую будут складываться файлы писем
 EMAIL_FILE_PATH = os.path.join(BASE_DIR, 'sent_emails')
 
 CSRF_FAILURE_VIEW = 'core.views.csrf_failure'
+
+# Каталог готовых страниц для анонимов (manage.py prerender); пока он
+# не задан, ленты при изменениях не перерисовываются.
+PRERENDER_ROOT = os.environ.get('PRERENDER_ROOT')
+PRERENDER_FEED_PAGES = int(os.environ.get('PRERENDER_FEED_PAGES', 3))
+
+# Посты авторов, у которых подписчиков больше этого числа, не
+# раскладываются по лентам подписок, а читаются при открытии ленты.
+TIMELINE_FANOUT_LIMIT = 1000
+
+# Миниатюры картинок постов создает пул процессов (posts.thumbnails)
+# после сохранения поста, а шаблоны только читают их метаданные из базы
+# через кеш. Потерянные при перезапуске миниатюры досоздает команда
+# generate_thumbnails.
+# THUMBNAIL_WORKERS = 0 создает миниатюры сразу после сохранения поста.
+THUMBNAIL_BACKEND = 'posts.thumbnails.QueuedThumbnailBackend'
+THUMBNAIL_KVSTORE = 'posts.thumbnails.KVStore'
+THUMBNAIL_WORKERS = int(os.environ.get('THUMBNAIL_WORKERS', 2))